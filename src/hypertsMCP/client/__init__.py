@@ -0,0 +1,12 @@
+"""Client package initialization."""
+from .async_client import HyperTSClient, EncodingCache
+from .transport import HTTPTransport, MCPTransport, RetryPolicy, ToolCallError
+
+__all__ = [
+    'HyperTSClient',
+    'EncodingCache',
+    'HTTPTransport',
+    'MCPTransport',
+    'RetryPolicy',
+    'ToolCallError'
+]
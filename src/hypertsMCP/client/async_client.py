@@ -0,0 +1,221 @@
+"""Async client for the HyperTS MCP server with client-side encoding caches."""
+import asyncio
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..tracing import span
+from ..utils import df_to_json, json_to_df, array_to_compact, compact_to_array, is_compact_array
+from .transport import HTTPTransport, MCPTransport, RetryPolicy
+
+Frame = Union[pd.DataFrame, str]
+
+
+class EncodingCache:
+    """LRU cache of ``df_to_json`` payloads keyed by DataFrame identity.
+
+    Frames handed to the client are treated as immutable: call ``invalidate``
+    after mutating a frame in place. Frames decoded from server responses are
+    primed with the JSON they came from, so they are never re-encoded.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[weakref.ref, str]]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, frame: Frame) -> str:
+        if isinstance(frame, str):
+            return frame
+        key = id(frame)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0]() is frame:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        encoded = df_to_json(frame)
+        self.put(frame, encoded)
+        return encoded
+
+    def decode(self, encoded: str) -> pd.DataFrame:
+        frame = json_to_df(encoded)
+        self.put(frame, encoded)
+        return frame
+
+    def put(self, frame: pd.DataFrame, encoded: str):
+        self.invalidate(frame)
+        if len(encoded) > self.max_bytes:
+            return
+        key = id(frame)
+        self._entries[key] = (weakref.ref(frame, lambda _, key=key: self._discard(key)), encoded)
+        self._size += len(encoded)
+        while self._size > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self, frame: pd.DataFrame):
+        self._discard(id(frame))
+
+    def _discard(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class HyperTSClient:
+    """High-level async client over an HTTP or MCP transport.
+
+    Example:
+        async with HyperTSClient.http("http://localhost:9000") as client:
+            train_df, test_df = await client.train_test_split(df, test_size=0.3)
+            model_id = await client.train_model(train_df, task="classification", target="target")
+            y_pred = await client.predict(test_df, model_id)
+            scores = await client.evaluate(test_df, y_pred, model_id)
+    """
+
+    def __init__(self, transport, retry: Optional[RetryPolicy] = None,
+                 cache: Optional[EncodingCache] = None, concurrency: int = 8):
+        self.transport = transport
+        self.retry = retry or RetryPolicy()
+        self.cache = cache or EncodingCache()
+        self.concurrency = concurrency
+
+    @classmethod
+    def http(cls, base_url: str = "http://localhost:9000", pool_size: int = 16,
+             timeout: float = 600.0, **kwargs) -> "HyperTSClient":
+        return cls(HTTPTransport(base_url, pool_size, timeout), **kwargs)
+
+    @classmethod
+    def mcp(cls, base_url: str = "http://localhost:9000", pool_size: int = 1,
+            timeout: float = 600.0, **kwargs) -> "HyperTSClient":
+        return cls(MCPTransport(base_url, pool_size, timeout), **kwargs)
+
+    async def __aenter__(self) -> "HyperTSClient":
+        await self.transport.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.transport.close()
+
+    async def call(self, tool: str, **arguments) -> Dict[str, Any]:
+        """Call any tool; DataFrames go through the cache and arrays are sent compact."""
+        with span(f"client {tool}", tool=tool):
+            with span("encode"):
+                arguments = {k: self._encode(v) for k, v in arguments.items() if v is not None}
+            return await self.retry.run(self.transport.call, tool, arguments)
+
+    def _encode(self, value):
+        if isinstance(value, pd.DataFrame):
+            return self.cache.encode(value)
+        if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+            return array_to_compact(value, dtype=value.dtype.name)
+        return value
+
+    async def train_test_split(self, data: Frame, **kwargs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        result = await self.call("train_test_split", data=data, **kwargs)
+        return self.cache.decode(result["train_set"]), self.cache.decode(result["test_set"])
+
+    async def train_model(self, train_data: Frame, task: str, **kwargs) -> str:
+        result = await self.call("train_model", train_data=train_data, task=task, **kwargs)
+        return result["model_id"]
+
+    async def predict(self, test_data: Frame, model_id: str, **kwargs) -> Union[List, np.ndarray]:
+        """Predict; numeric predictions returned compact (compact_dtypes) come back as an array."""
+        result = await self.call("predict", test_data=test_data, model_id=model_id, **kwargs)
+        return self._prediction(result["prediction"])
+
+    @staticmethod
+    def _prediction(prediction):
+        return compact_to_array(prediction)[0] if is_compact_array(prediction) else prediction
+
+    async def predict_proba(self, test_data: Frame, model_id: str,
+                            **kwargs) -> Tuple[List, np.ndarray, Optional[List]]:
+        """Predict labels and probabilities in one call; returns (labels, proba, classes)."""
+        result = await self.call("predict", test_data=test_data, model_id=model_id,
+                                 proba=True, **kwargs)
+        proba, classes = compact_to_array(result["proba"])
+        return self._prediction(result["prediction"]), proba, classes
+
+    async def evaluate(self, test_data: Frame, y_pred: List, model_id: str, **kwargs) -> pd.DataFrame:
+        result = await self.call("evaluate", test_data=test_data, y_pred=y_pred,
+                                 model_id=model_id, **kwargs)
+        return json_to_df(result["scores"])
+
+    async def score(self, y_true, y_pred, task: str, **kwargs) -> pd.DataFrame:
+        """
+        Score predictions against ``y_true`` without a model on the server.
+
+        ``y_pred`` is one array, or a dict of named prediction sets scored in one
+        call (one score column per set); ``y_proba`` follows the same shape.
+        """
+        if isinstance(y_pred, dict):
+            kwargs["y_preds"] = {name: self._array(y) for name, y in y_pred.items()}
+            if isinstance(kwargs.get("y_proba"), dict):
+                kwargs["y_probas"] = {name: self._array(p) for name, p in kwargs.pop("y_proba").items()}
+        else:
+            kwargs["y_pred"] = self._array(y_pred)
+        if "y_proba" in kwargs:
+            kwargs["y_proba"] = self._array(kwargs["y_proba"])
+        result = await self.call("evaluate", y_true=self._array(y_true), task=task, **kwargs)
+        return json_to_df(result["scores"])
+
+    def _array(self, value):
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            value = value.to_numpy()
+        value = self._encode(value)
+        return value.tolist() if isinstance(value, np.ndarray) else value
+
+    async def run_pipeline(self, data: Frame, steps: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """Run a split/train/predict/evaluate chain server-side in one round trip."""
+        return await self.call("run_pipeline", data=data, steps=steps, **kwargs)
+
+    async def forecast_backtest(self, data: Frame, model_id: str, **kwargs) -> Dict[str, Any]:
+        """Backtest a forecast model over rolling cutoffs; forecast arrays are decoded."""
+        result = await self.call("forecast_backtest", data=data, model_id=model_id, **kwargs)
+        for key in ("forecast", "actual"):
+            if key in result:
+                result[key] = compact_to_array(result[key])[0]
+        return result
+
+    async def stream_open(self, model_id: str, **kwargs) -> str:
+        """Open a streaming detection session and return its ID."""
+        result = await self.call("stream_open", model_id=model_id, **kwargs)
+        return result["session_id"]
+
+    async def stream_append(self, session_id: str, points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append points to a session; returns one anomaly flag and score per point."""
+        result = await self.call("stream_append", session_id=session_id, points=points)
+        return result["results"]
+
+    async def stream_close(self, session_id: str, **kwargs) -> Dict[str, Any]:
+        return await self.call("stream_close", session_id=session_id, **kwargs)
+
+    async def gather(self, calls: Iterable[Awaitable], concurrency: Optional[int] = None) -> List:
+        """Await ``calls`` with at most ``concurrency`` in flight, preserving order."""
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def bounded(call):
+            async with semaphore:
+                return await call
+
+        return await asyncio.gather(*(bounded(call) for call in calls))
+
+    async def predict_many(self, frames: Iterable[Frame], model_id: str,
+                           concurrency: Optional[int] = None, **kwargs) -> List[List]:
+        """Predict over many test frames with bounded concurrency."""
+        return await self.gather((self.predict(f, model_id, **kwargs) for f in frames), concurrency)
+
+    async def evaluate_many(self, items: Iterable[Tuple[Frame, List]], model_id: str,
+                            concurrency: Optional[int] = None, **kwargs) -> List[pd.DataFrame]:
+        """Evaluate many ``(test_data, y_pred)`` pairs with bounded concurrency."""
+        return await self.gather(
+            (self.evaluate(f, y, model_id, **kwargs) for f, y in items), concurrency
+        )
@@ -0,0 +1,312 @@
+"""Non-interactive load generator for the HTTP and MCP endpoints.
+
+Drives N concurrent virtual users through a weighted mix of
+train_test_split / train_model / predict / evaluate calls and reports
+throughput, latency percentiles and error rates over time.
+
+Example:
+    python -m hypertsMCP.client.load_test --transport http --users 16 \
+        --duration 60 --mix split=2,predict=6,evaluate=2 --start-server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from hypertsMCP.utils import df_to_json
+from hypertsMCP.client.transport import HTTPTransport, MCPTransport
+
+OPERATIONS = ("split", "train", "predict", "evaluate")
+PERCENTILES = (50, 90, 99)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse a mix spec such as ``split=1,predict=4`` into normalized weights."""
+    weights: Dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation in mix: {name}")
+        weights[name] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("mix must contain at least one positive weight")
+    return {name: w / total for name, w in weights.items() if w > 0}
+
+
+@dataclass
+class Sample:
+    start: float
+    op: str
+    latency: float
+    ok: bool
+
+
+@dataclass
+class LoadStats:
+    """Collect per-call samples and summarize them per interval and per operation."""
+    started: float = field(default_factory=time.perf_counter)
+    samples: List[Sample] = field(default_factory=list)
+
+    def record(self, start: float, op: str, latency: float, ok: bool):
+        self.samples.append(Sample(start - self.started, op, latency, ok))
+
+    @staticmethod
+    def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+        if not samples:
+            return {"requests": 0, "throughput": 0.0, "error_rate": 0.0,
+                    **{f"p{p}": None for p in PERCENTILES}}
+        latencies = np.array([s.latency for s in samples])
+        errors = sum(1 for s in samples if not s.ok)
+        summary = {
+            "requests": len(samples),
+            "throughput": len(samples) / elapsed if elapsed > 0 else 0.0,
+            "error_rate": errors / len(samples),
+        }
+        for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+            summary[f"p{p}"] = float(value)
+        return summary
+
+    def window(self, start: float, end: float) -> Dict[str, Any]:
+        """Summary of calls that started in ``[start, end)`` seconds since launch."""
+        samples = [s for s in self.samples if start <= s.start < end]
+        return self.summarize(samples, end - start)
+
+    def by_operation(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        ops = sorted({s.op for s in self.samples})
+        return {op: self.summarize([s for s in self.samples if s.op == op], elapsed) for op in ops}
+
+
+class Workload:
+    """Pre-encoded payloads so that client-side encoding is not part of the measurement."""
+
+    def __init__(self, rows: Optional[int], task: str, mode: str, target: str):
+        from hyperts.datasets import load_basic_motions
+        df = load_basic_motions()
+        if rows:
+            df = df.head(rows)
+        self.task = task
+        self.mode = mode
+        self.target = target
+        self.data_json = df_to_json(df)
+        self.train_json: Optional[str] = None
+        self.test_json: Optional[str] = None
+        self.model_id: Optional[str] = None
+        self.y_pred: Optional[list] = None
+
+    async def bootstrap(self, transport, model_id: Optional[str]):
+        """Produce the split, model and predictions that the other operations reuse."""
+        result = await transport.call("train_test_split", {"data": self.data_json, "test_size": 0.3})
+        self.train_json = result["train_set"]
+        self.test_json = result["test_set"]
+        self.model_id = model_id or (await transport.call("train_model", self.train_args()))["model_id"]
+        self.y_pred = (await transport.call("predict", self.predict_args()))["prediction"]
+
+    def train_args(self) -> Dict[str, Any]:
+        return {"train_data": self.train_json, "task": self.task, "mode": self.mode,
+                "target": self.target, "max_trials": 1}
+
+    def predict_args(self) -> Dict[str, Any]:
+        return {"test_data": self.test_json, "model_id": self.model_id}
+
+    def request(self, op: str) -> Tuple[str, Dict[str, Any]]:
+        if op == "split":
+            return "train_test_split", {"data": self.data_json, "test_size": 0.3}
+        if op == "train":
+            return "train_model", self.train_args()
+        if op == "predict":
+            return "predict", self.predict_args()
+        return "evaluate", {"test_data": self.test_json, "y_pred": self.y_pred, "model_id": self.model_id}
+
+
+class LoadGenerator:
+    def __init__(self, transport, workload: Workload, mix: Dict[str, float], users: int,
+                 duration: float, rate: Optional[float], think_time: float, seed: Optional[int]):
+        self.transport = transport
+        self.workload = workload
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.users = users
+        self.duration = duration
+        self.rate = rate
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.stats = LoadStats()
+
+    def pick(self) -> str:
+        return self.rng.choices(self.ops, weights=self.weights)[0]
+
+    async def issue(self, op: str, scheduled: Optional[float] = None):
+        """Issue one call; latency is measured from the scheduled time when given."""
+        tool, arguments = self.workload.request(op)
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            await self.transport.call(tool, arguments)
+            ok = True
+        except Exception:
+            ok = False
+        self.stats.record(start, op, time.perf_counter() - start, ok)
+
+    async def closed_loop_user(self, deadline: float):
+        while time.perf_counter() < deadline:
+            await self.issue(self.pick())
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1.0 / self.think_time))
+
+    async def run_closed_loop(self, deadline: float):
+        await asyncio.gather(*(self.closed_loop_user(deadline) for _ in range(self.users)))
+
+    async def run_open_loop(self, deadline: float):
+        """Poisson arrivals at ``rate``/s; ``users`` bounds the number of calls in flight."""
+        in_flight = asyncio.Semaphore(self.users)
+        tasks = []
+
+        async def arrival(op: str, scheduled: float):
+            async with in_flight:
+                await self.issue(op, scheduled)
+
+        next_arrival = time.perf_counter()
+        while next_arrival < deadline:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(arrival(self.pick(), next_arrival)))
+            next_arrival += self.rng.expovariate(self.rate)
+        await asyncio.gather(*tasks)
+
+    async def report_progress(self, interval: float, deadline: float):
+        start = 0.0
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(interval)
+            end = time.perf_counter() - self.stats.started
+            print_window(start, end, self.stats.window(start, end))
+            start = end
+
+    async def run(self, report_interval: float) -> LoadStats:
+        self.stats = LoadStats()
+        deadline = self.stats.started + self.duration
+        reporter = asyncio.create_task(self.report_progress(report_interval, deadline))
+        try:
+            if self.rate:
+                await self.run_open_loop(deadline)
+            else:
+                await self.run_closed_loop(deadline)
+        finally:
+            reporter.cancel()
+        return self.stats
+
+
+def format_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+def print_window(start: float, end: float, summary: Dict[str, Any]):
+    print(f"[{start:7.1f}s-{end:7.1f}s] req={summary['requests']:5d} "
+          f"rps={summary['throughput']:7.2f} err={summary['error_rate']:.1%} "
+          + " ".join(f"p{p}={format_ms(summary[f'p{p}'])}ms" for p in PERCENTILES))
+
+
+def start_local_server(base_url: str, timeout: float = 120.0) -> subprocess.Popen:
+    """Start ``main.py`` from the project root and wait until ``/http/ready`` answers 200."""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    proc = subprocess.Popen([sys.executable, "main.py"], cwd=project_root)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            # 503 while startup warm-up is still running
+            if httpx.get(base_url.rstrip("/") + "/http/ready", timeout=2.0).status_code == 200:
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise TimeoutError("server did not become ready in time")
+
+
+async def main_async(opts: argparse.Namespace) -> Dict[str, Any]:
+    transport_cls = HTTPTransport if opts.transport == "http" else MCPTransport
+    pool_size = opts.pool_size or opts.users
+    transport = transport_cls(opts.base_url, pool_size, opts.timeout)
+    await transport.start()
+    try:
+        workload = Workload(opts.rows, opts.task, opts.mode, opts.target)
+        await workload.bootstrap(transport, opts.model_id)
+        generator = LoadGenerator(transport, workload, parse_mix(opts.mix), opts.users,
+                                  opts.duration, opts.rate, opts.think_time, opts.seed)
+        stats = await generator.run(opts.report_interval)
+    finally:
+        await transport.close()
+
+    elapsed = max(s.start + s.latency for s in stats.samples) if stats.samples else opts.duration
+    report = {
+        "transport": opts.transport,
+        "users": opts.users,
+        "arrival": f"open@{opts.rate}/s" if opts.rate else "closed",
+        "total": LoadStats.summarize(stats.samples, elapsed),
+        "operations": stats.by_operation(elapsed),
+    }
+    print("\nSummary:")
+    print_window(0.0, elapsed, report["total"])
+    for op, summary in report["operations"].items():
+        print(f"  {op:<9}", end="")
+        print_window(0.0, elapsed, summary)
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load generator for the HyperTS MCP server.")
+    parser.add_argument("--base-url", default="http://localhost:9000")
+    parser.add_argument("--transport", choices=("http", "mcp"), default="http")
+    parser.add_argument("--users", type=int, default=8, help="virtual users / max calls in flight")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="pooled connections (http) or persistent sessions (mcp); defaults to --users")
+    parser.add_argument("--duration", type=float, default=60.0, help="test duration in seconds")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="open-loop arrival rate in calls/s; closed loop when omitted")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean think time between calls of a closed-loop user, in seconds")
+    parser.add_argument("--mix", default="split=2,predict=6,evaluate=2",
+                        help="weighted operation mix, e.g. split=1,train=0.1,predict=5,evaluate=2")
+    parser.add_argument("--rows", type=int, default=None, help="limit the dataset to the first N rows")
+    parser.add_argument("--task", default="classification")
+    parser.add_argument("--mode", default="stats")
+    parser.add_argument("--target", default="target")
+    parser.add_argument("--model-id", default=None, help="reuse an existing model instead of training one")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json-out", default=None, help="write the final report to this file")
+    parser.add_argument("--start-server", action="store_true", help="start a local server for the run")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    opts = build_parser().parse_args(argv)
+    server = start_local_server(opts.base_url) if opts.start_server else None
+    try:
+        report = asyncio.run(main_async(opts))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if opts.json_out:
+        with open(opts.json_out, "w", encoding="UTF-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
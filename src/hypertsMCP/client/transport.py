@@ -0,0 +1,181 @@
+"""Pooled HTTP and persistent MCP transports with retries."""
+import asyncio
+import json
+import random
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from ..compression import compress, supported_encodings
+from ..tracing import SPAN_KIND_CLIENT, TRACEPARENT, span
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Tools that can safely run twice, retried even when a request may have reached the server
+IDEMPOTENT_TOOLS = ("train_test_split", "predict", "evaluate", "forecast_backtest")
+# Errors raised before the request was sent
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class ToolCallError(RuntimeError):
+    """A tool call failed on the server or could not be delivered."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring server retry-after hints."""
+
+    def __init__(self, retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def run(self, call, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return await call(*args, **kwargs)
+            except ToolCallError as e:
+                if not e.retryable or attempt >= self.retries:
+                    raise
+                await asyncio.sleep(self.delay(attempt, e.retry_after))
+                attempt += 1
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _transport_error(tool: str, error: Exception) -> ToolCallError:
+    """
+    Build an error from a failed delivery. It is retryable when the request was never
+    sent, or when the tool is safe to run again: a read timeout or dropped connection
+    can come after the server started e.g. a training run.
+    """
+    sent = not isinstance(error, CONNECT_ERRORS)
+    return ToolCallError(f"{tool}: {error!r}", retryable=not sent or tool in IDEMPOTENT_TOOLS)
+
+
+def _mcp_error(tool: str, text: str) -> ToolCallError:
+    """Build an error from an MCP error result, keeping admission-control hints."""
+    try:
+        detail = json.loads(text)
+    except ValueError:
+        detail = None
+    if not isinstance(detail, dict) or "status_code" not in detail:
+        return ToolCallError(f"{tool}: {text}")
+    return ToolCallError(
+        f"{tool}: {detail.get('error')}",
+        status_code=detail["status_code"],
+        retry_after=detail.get("retry_after"),
+        retryable=detail["status_code"] in RETRY_STATUS_CODES,
+    )
+
+
+class HTTPTransport:
+    """Calls tools through the ``/http`` routes over one pooled ``httpx.AsyncClient``.
+
+    Request bodies of at least ``compress_min_size`` bytes are sent with
+    ``compression`` ("zstd" when available, else "gzip"; ``None`` disables it),
+    and compressed responses are accepted and decoded transparently.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:9000", pool_size: int = 16,
+                 timeout: float = 600.0, headers: Optional[Dict[str, str]] = None,
+                 compression: Optional[str] = "auto", compress_min_size: int = 1024):
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.base_url = base_url.rstrip("/") + "/http/"
+        self.compression = supported_encodings()[0] if compression == "auto" else compression
+        self.compress_min_size = compress_min_size
+        headers = {"Accept-Encoding": ", ".join(supported_encodings()), **(headers or {})}
+        self.client = httpx.AsyncClient(timeout=timeout, limits=limits, headers=headers)
+
+    async def _encode(self, arguments: Dict[str, Any]):
+        body = json.dumps(arguments).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.compression and len(body) >= self.compress_min_size:
+            with span("compress", encoding=self.compression, bytes=len(body)):
+                body = await asyncio.to_thread(compress, body, self.compression)
+            headers["Content-Encoding"] = self.compression
+        return body, headers
+
+    async def start(self):
+        pass
+
+    async def call(self, tool: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        body, headers = await self._encode(arguments)
+        with span(f"POST /{tool}", kind=SPAN_KIND_CLIENT, bytes=len(body)) as current:
+            if current is not None:
+                headers[TRACEPARENT] = current.traceparent
+            try:
+                res = await self.client.post(self.base_url + tool, content=body, headers=headers)
+            except httpx.TransportError as e:
+                raise _transport_error(tool, e) from e
+            if current is not None:
+                current.set_attribute("http.status_code", res.status_code)
+        if res.status_code >= 400:
+            raise ToolCallError(
+                f"{tool}: HTTP {res.status_code} {res.text[:500]}",
+                status_code=res.status_code,
+                retry_after=_retry_after(res.headers.get("retry-after")),
+                retryable=res.status_code in RETRY_STATUS_CODES,
+            )
+        return res.json()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class MCPTransport:
+    """A fixed pool of persistent MCP sessions over SSE, used round-robin."""
+
+    def __init__(self, base_url: str = "http://localhost:9000", pool_size: int = 1,
+                 timeout: float = 600.0):
+        self.url = base_url.rstrip("/") + "/mcp/sse"
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.sessions: List[ClientSession] = []
+        self._stack = AsyncExitStack()
+        self._next = 0
+
+    async def start(self):
+        for _ in range(self.pool_size):
+            streams = await self._stack.enter_async_context(
+                sse_client(url=self.url, sse_read_timeout=self.timeout)
+            )
+            session = await self._stack.enter_async_context(ClientSession(*streams))
+            await session.initialize()
+            self.sessions.append(session)
+
+    async def call(self, tool: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        session = self.sessions[self._next % len(self.sessions)]
+        self._next += 1
+        with span(f"mcp {tool}", kind=SPAN_KIND_CLIENT) as current:
+            meta = {TRACEPARENT: current.traceparent} if current is not None else None
+            try:
+                res = await session.call_tool(name=tool, arguments=arguments, meta=meta)
+            except (httpx.TransportError, ConnectionError) as e:
+                raise _transport_error(tool, e) from e
+        text = res.content[0].text if res.content else ""
+        if res.isError:
+            raise _mcp_error(tool, text)
+        return json.loads(text)
+
+    async def close(self):
+        await self._stack.aclose()
@@ -3,8 +3,15 @@ from ..utils import (
     is_3d_array,
     is_nested,
     df_to_json,
-    json_to_df
+    json_to_df,
+    array_to_compact,
+    compact_to_array,
+    is_compact_array,
+    compact_dtypes,
+    frame_nbytes
 )
 
-__all__ = ['is_3d_array', 'is_nested', 'df_to_json', 'json_to_df']
+__all__ = ['is_3d_array', 'is_nested', 'df_to_json', 'json_to_df',
+           'array_to_compact', 'compact_to_array', 'is_compact_array',
+           'compact_dtypes', 'frame_nbytes']
 
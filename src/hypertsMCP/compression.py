@@ -0,0 +1,104 @@
+"""Shared gzip/zstd helpers for HTTP Content-Encoding."""
+import zlib
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional
+    zstandard = None
+
+THREAD_THRESHOLD = 1024 * 1024  # compress bodies larger than this off the event loop
+
+
+def supported_encodings() -> List[str]:
+    """Encodings this process can decode and produce, in order of preference."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+# Upper bound on zstd's output per input byte: an RLE block header plus its byte
+# can stand for a whole 128 KB block
+ZSTD_MAX_RATIO = 128 * 1024 // 4
+
+
+class StreamDecompressor:
+    """Incremental decompressor exposing ``decompress(chunk, max_length)`` and ``eof``."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "zstd" and zstandard is not None:
+            self._obj = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise ValueError(f"unsupported content encoding: {encoding}")
+
+    @property
+    def eof(self) -> bool:
+        """Whether the end of the compressed stream has been reached."""
+        return self._obj.eof
+
+    def decompress(self, data: bytes, max_length: Optional[int] = None) -> bytes:
+        """
+        Decode a chunk. With ``max_length``, stop once that many bytes are decoded.
+
+        The rest of the chunk is then dropped, so reaching ``max_length`` means the
+        body is too large. zlib bounds its output itself. zstd cannot, so the chunk
+        is fed in slices too short to decode much past ``max_length``.
+        """
+        if max_length is None:
+            return self._obj.decompress(data)
+        if self.encoding == "gzip":
+            return self._obj.decompress(data, max_length)
+        out, decoded, view = [], 0, memoryview(data)
+        while view and decoded < max_length:
+            step = max(1, (max_length - decoded) // ZSTD_MAX_RATIO)
+            out.append(self._obj.decompress(view[:step]))
+            decoded += len(out[-1])
+            view = view[step:]
+        return b"".join(out)
+
+
+def make_decompressor(encoding: str) -> StreamDecompressor:
+    """Incremental decompressor exposing ``decompress(chunk)``."""
+    return StreamDecompressor(encoding)
+
+
+class StreamCompressor:
+    """Incremental compressor exposing ``compress(chunk)`` and ``flush()``."""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "zstd" and zstandard is not None:
+            self._obj = zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+        else:
+            raise ValueError(f"unsupported content encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding from an Accept-Encoding header."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
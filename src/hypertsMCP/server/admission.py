@@ -0,0 +1,241 @@
+"""Admission control and backpressure for tool calls."""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional
+
+MB = 1024 * 1024
+
+
+class AdmissionRejected(Exception):
+    """A call was refused before running; ``status_code`` maps to the HTTP response."""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"error": str(self), "status_code": self.status_code, "retry_after": self.retry_after}
+
+
+@dataclass
+class AdmissionLimits:
+    """Per-tool limits. ``None`` disables the corresponding check."""
+    max_concurrency: Optional[int] = None
+    max_queue: int = 32  # calls allowed to wait for a slot
+    queue_timeout: float = 30.0  # seconds a call may wait for a slot and memory
+    max_payload_bytes: Optional[int] = None
+    memory_factor: float = 0.0  # estimated peak memory per payload byte
+
+
+class MemoryBudget:
+    """Estimated-memory budget shared by all tools."""
+
+    def __init__(self, budget_bytes: Optional[int]):
+        self.budget_bytes = budget_bytes
+        self.used = 0
+        self._changed: Optional[asyncio.Condition] = None
+
+    @property
+    def changed(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def reserve(self, nbytes: int, timeout: float):
+        if self.budget_bytes is None or nbytes <= 0:
+            return
+        if nbytes > self.budget_bytes:
+            raise AdmissionRejected(
+                f"estimated memory {nbytes // MB} MB exceeds the budget of {self.budget_bytes // MB} MB",
+                status_code=413,
+            )
+        fits = lambda: self.used + nbytes <= self.budget_bytes
+        async with self.changed:
+            if not fits():
+                await asyncio.wait_for(self.changed.wait_for(fits), timeout)
+            self.used += nbytes
+
+    async def release(self, nbytes: int):
+        if self.budget_bytes is None or nbytes <= 0:
+            return
+        async with self.changed:
+            self.used -= nbytes
+            self.changed.notify_all()
+
+
+class Admission:
+    """A call let through a gate, with the memory reserved for its payload."""
+
+    def __init__(self, gate: "ToolGate", payload_bytes: int):
+        self.gate = gate
+        self.payload_bytes = payload_bytes
+        self.reserved = int(payload_bytes * gate.limits.memory_factor)
+        self.loop = asyncio.get_running_loop()
+
+    async def grow(self, payload_bytes: int):
+        """Check and reserve memory for a payload now known to be ``payload_bytes`` long."""
+        if payload_bytes <= self.payload_bytes:
+            return
+        self.gate.check_payload(payload_bytes)
+        await self.reserve(int((payload_bytes - self.payload_bytes) * self.gate.limits.memory_factor))
+        self.payload_bytes = payload_bytes
+
+    async def reserve(self, nbytes: int):
+        """Reserve ``nbytes`` more of the memory budget, released with the rest when the call ends."""
+        if nbytes <= 0:
+            return
+        budget = self.gate.budget
+        if budget.budget_bytes is not None and self.reserved + nbytes > budget.budget_bytes:
+            self.gate.rejected += 1
+            raise AdmissionRejected(
+                f"estimated memory {(self.reserved + nbytes) // MB} MB exceeds the budget of "
+                f"{budget.budget_bytes // MB} MB", status_code=413)
+        await self.gate._reserve(nbytes, self.gate.limits.queue_timeout)
+        self.reserved += nbytes
+
+
+# The admitted call a handler runs for; asyncio.to_thread carries it into worker threads
+current_admission: ContextVar[Optional[Admission]] = ContextVar("current_admission", default=None)
+
+
+def reserve_source(nbytes: int):
+    """
+    Reserve memory for ``nbytes`` of data a handler reads server-side, as for payload bytes.
+
+    Called from the worker thread of an admitted call; blocks until the memory
+    is reserved and raises AdmissionRejected like admission itself. Does nothing
+    outside an admitted call.
+    """
+    admission = current_admission.get()
+    if admission is None:
+        return
+    nbytes = int(nbytes * admission.gate.limits.memory_factor)
+    asyncio.run_coroutine_threadsafe(admission.reserve(nbytes), admission.loop).result()
+
+
+class ToolGate:
+    """Concurrency cap plus bounded wait queue for one tool."""
+
+    def __init__(self, name: str, limits: AdmissionLimits, budget: MemoryBudget):
+        self.name = name
+        self.limits = limits
+        self.budget = budget
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.avg_seconds = 1.0  # EWMA of service time, used for retry-after hints
+        self._slots = asyncio.Semaphore(limits.max_concurrency) if limits.max_concurrency else None
+
+    def retry_after(self) -> float:
+        slots = self.limits.max_concurrency or 1
+        return float(max(1, math.ceil(self.avg_seconds * (self.waiting + 1) / slots)))
+
+    def check_payload(self, payload_bytes: Optional[int]):
+        limit = self.limits.max_payload_bytes
+        if limit is not None and payload_bytes is not None and payload_bytes > limit:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"{self.name}: payload of {payload_bytes} bytes exceeds the limit of {limit} bytes",
+                status_code=413,
+            )
+
+    async def _reserve(self, nbytes: int, timeout: float):
+        try:
+            await self.budget.reserve(nbytes, timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected(f"{self.name}: memory budget exhausted",
+                                    status_code=503, retry_after=self.retry_after()) from None
+
+    @asynccontextmanager
+    async def admit(self, payload_bytes: Optional[int] = None):
+        """
+        Hold a slot and the payload's estimated memory for the duration of the block.
+
+        Yields an ``Admission`` whose reservation can grow once the payload turns
+        out larger than announced, e.g. a compressed or chunked body being read,
+        or once the call reads server-side data (see ``reserve_source``).
+        """
+        self.check_payload(payload_bytes)
+        deadline = time.monotonic() + self.limits.queue_timeout
+        if self._slots is not None:
+            if self._slots.locked() and self.waiting >= self.limits.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(f"{self.name}: too many queued calls",
+                                        status_code=429, retry_after=self.retry_after())
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.limits.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AdmissionRejected(f"{self.name}: timed out waiting for a free slot",
+                                        status_code=503, retry_after=self.retry_after()) from None
+            finally:
+                self.waiting -= 1
+
+        admission = Admission(self, payload_bytes or 0)
+        try:
+            await self._reserve(admission.reserved, max(0.0, deadline - time.monotonic()))
+            self.running += 1
+            started = time.monotonic()
+            token = current_admission.set(admission)
+            try:
+                yield admission
+            finally:
+                current_admission.reset(token)
+                self.running -= 1
+                self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.monotonic() - started)
+                await self.budget.release(admission.reserved)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "waiting": self.waiting, "rejected": self.rejected,
+                "max_concurrency": self.limits.max_concurrency}
+
+
+class AdmissionController:
+    """Creates one gate per tool from handler defaults and configured overrides."""
+
+    def __init__(self, max_payload_bytes: Optional[int] = None,
+                 memory_budget_bytes: Optional[int] = None,
+                 overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.max_payload_bytes = max_payload_bytes
+        self.budget = MemoryBudget(memory_budget_bytes)
+        self.overrides = overrides or {}
+        self._gates: Dict[str, ToolGate] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "AdmissionController":
+        to_bytes = lambda mb: int(mb * MB) if mb is not None else None
+        return cls(to_bytes(settings.max_payload_mb), to_bytes(settings.memory_budget_mb),
+                   settings.admission)
+
+    def gate(self, tool) -> ToolGate:
+        gate = self._gates.get(tool.name)
+        if gate is None:
+            limits = tool.admission_limits
+            if limits.max_payload_bytes is None:
+                limits = replace(limits, max_payload_bytes=self.max_payload_bytes)
+            known = {f.name for f in fields(AdmissionLimits)}
+            override = {k: v for k, v in self.overrides.get(tool.name, {}).items() if k in known}
+            gate = self._gates[tool.name] = ToolGate(tool.name, replace(limits, **override), self.budget)
+        return gate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_used_bytes": self.budget.used,
+            "memory_budget_bytes": self.budget.budget_bytes,
+            "tools": {name: gate.stats() for name, gate in self._gates.items()},
+        }
+
+
+def payload_size(arguments: Dict[str, Any]) -> int:
+    """Approximate payload size of already-decoded arguments (dominated by encoded frames)."""
+    return sum(len(v) for v in arguments.values() if isinstance(v, str))
@@ -0,0 +1,129 @@
+"""Content-Encoding middleware (gzip, zstd) for HTTP request and response bodies."""
+import asyncio
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from ..compression import THREAD_THRESHOLD, StreamCompressor, compress, make_decompressor, negotiate
+
+# Incremental responses whose messages must reach the client as soon as they are sent
+PASSTHROUGH_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+class ContentEncodingMiddleware:
+    """ASGI middleware that decodes compressed request bodies and compresses responses.
+
+    Request bodies are decompressed chunk by chunk as the application reads them,
+    so the compressed body is never buffered, and decoding stops as soon as it
+    passes ``max_decoded_bytes``. Event-stream and NDJSON responses and bodies
+    smaller than ``minimum_size`` are passed through unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[dict] = None,
+                 max_decoded_bytes: Optional[int] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels or {}
+        self.max_decoded_bytes = max_decoded_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").lower()
+        if content_encoding not in ("identity", ""):
+            try:
+                decompressor = make_decompressor(content_encoding)
+            except ValueError as e:
+                await JSONResponse({"error": str(e)}, status_code=415)(scope, receive, send)
+                return
+            scope = dict(scope)
+            scope["headers"] = [(k, v) for k, v in scope["headers"]
+                                if k not in (b"content-encoding", b"content-length")]
+            receive = self._decompressing_receive(receive, decompressor)
+
+        encoding = negotiate(headers.get("accept-encoding", ""))
+        if encoding is not None:
+            send = self._compressing_send(send, encoding)
+        await self.app(scope, receive, send)
+
+    def _decompressing_receive(self, receive: Callable, decompressor):
+        decoded = 0
+
+        async def wrapped():
+            nonlocal decoded
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                # One byte past the limit is enough to tell the body is too large
+                limit = None if self.max_decoded_bytes is None else self.max_decoded_bytes - decoded + 1
+                try:
+                    body = decompressor.decompress(chunk, limit) if chunk else b""
+                except Exception as e:
+                    raise HTTPException(400, f"invalid compressed request body: {e}") from e
+                decoded += len(body)
+                if self.max_decoded_bytes is not None and decoded > self.max_decoded_bytes:
+                    raise HTTPException(413, "decoded request body too large")
+                if not message.get("more_body", False) and not decompressor.eof:
+                    raise HTTPException(400, "invalid compressed request body: truncated stream")
+                message = dict(message, body=body)
+            return message
+
+        return wrapped
+
+    def _compressing_send(self, send: Callable, encoding: str):
+        level = self.levels.get(encoding)
+        start_message = None
+        streaming = None  # incremental compressor once a body spans several messages
+
+        async def wrapped(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if ("content-encoding" in headers
+                        or headers.get("content-type", "").startswith(PASSTHROUGH_TYPES)):
+                    start_message = False  # pass through unchanged
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is False:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None and not more_body:
+                # Single-message body: compress it in one go when it is worth it
+                headers = MutableHeaders(raw=start_message["headers"])
+                if len(body) >= self.minimum_size:
+                    if len(body) > THREAD_THRESHOLD:
+                        body = await asyncio.to_thread(compress, body, encoding, level)
+                    else:
+                        body = compress(body, encoding, level)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                start_message = None
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                del headers["Content-Length"]
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                await send(start_message)
+                start_message = None
+                streaming = StreamCompressor(encoding, level)
+            if streaming is None:
+                await send(message)
+                return
+            chunk = streaming.compress(body) + (streaming.flush() if not more_body else b"")
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        return wrapped
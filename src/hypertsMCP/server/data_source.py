@@ -0,0 +1,216 @@
+"""Server-side data sources: Parquet and Feather files under allow-listed directories.
+
+Requests can name a file on the server host instead of uploading a
+``df_to_json`` frame. Files are memory-mapped and read in Arrow record batches,
+restricted to the requested columns and row range, so a handler can work
+through a file larger than memory one batch at a time. Before reading, the
+memory of the rows about to be held is reserved from the file metadata, the
+way request payloads are admitted.
+
+List columns become nested series cells, the layout HyperTS expects for
+panel classification and regression data.
+"""
+import os
+from typing import Iterator, List, Literal, Optional
+
+import pandas as pd
+from pydantic import BaseModel, Field, model_validator
+
+from .admission import reserve_source
+from .settings import settings
+from .utils import compact_dtypes, use_compact
+from ..tracing import span, start_span
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for *_source arguments
+    pa = None
+
+SUFFIXES = {'.parquet': 'parquet', '.pq': 'parquet', '.feather': 'feather', '.arrow': 'feather',
+            '.ipc': 'feather'}
+
+
+class DataSource(BaseModel):
+    path: str = Field(description="file on the server host, under one of the configured data roots")
+    format: Optional[Literal['parquet', 'feather']] = Field(
+        default=None, description="file format (default: from the file extension)")
+    columns: Optional[List[str]] = Field(default=None, description="columns to read (default: all)")
+    start: int = Field(default=0, ge=0, description="first row to read")
+    stop: Optional[int] = Field(default=None, ge=0, description="row after the last one to read (default: end)")
+
+    @model_validator(mode='after')
+    def check_rows(self):
+        if self.stop is not None and self.stop < self.start:
+            raise ValueError("stop must not be before start")
+        return self
+
+
+def resolve_path(path: str, roots: Optional[List[str]] = None) -> str:
+    """Real path of ``path``, which must lie under one of the allowed roots."""
+    roots = settings.data_roots if roots is None else roots
+    if not roots:
+        raise PermissionError("data sources are disabled: no HYPERTS_MCP_DATA_ROOTS configured")
+    real = os.path.realpath(path)
+    for root in roots:
+        root = os.path.realpath(root)
+        if os.path.commonpath([real, root]) == root:
+            return real
+    raise PermissionError(f"{path} is outside the allowed data roots")
+
+
+def _format(source: DataSource, path: str) -> str:
+    if source.format is not None:
+        return source.format
+    fmt = SUFFIXES.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"cannot tell the format of {source.path}; set format")
+    return fmt
+
+
+def _record_batches(source: DataSource, path: str, batch_rows: int) -> Iterator["pa.RecordBatch"]:
+    """Record batches covering the requested rows, with the requested columns."""
+    stop = source.stop
+    if _format(source, path) == 'parquet':
+        parquet = pq.ParquetFile(path, memory_map=True)
+        groups, offset, first = [], 0, None
+        for i in range(parquet.metadata.num_row_groups):
+            rows = parquet.metadata.row_group(i).num_rows
+            # Skip row groups entirely outside the range without reading them
+            if offset + rows > source.start and (stop is None or offset < stop):
+                groups.append(i)
+                first = offset if first is None else first
+            offset += rows
+        if not groups:
+            return
+        batches = parquet.iter_batches(batch_size=batch_rows, row_groups=groups, columns=source.columns)
+        offset = first
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        columns = source.columns
+
+        def feather_batches():
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns is not None else batch
+
+        batches, offset = feather_batches(), 0
+    for batch in batches:
+        begin = max(source.start - offset, 0)
+        end = batch.num_rows if stop is None else min(stop - offset, batch.num_rows)
+        offset += batch.num_rows
+        if end > begin:
+            yield batch.slice(begin, end - begin)
+        if stop is not None and offset >= stop:
+            return
+
+
+def estimate_bytes(source: DataSource, path: str, rows: Optional[int] = None) -> int:
+    """
+    Arrow size of the selected columns over the selected rows, or over at most
+    ``rows`` of them, from the file metadata alone.
+    """
+    columns = None if source.columns is None else set(source.columns)
+    if _format(source, path) == 'parquet':
+        metadata = pq.ParquetFile(path, memory_map=True).metadata
+        total_rows, nbytes = metadata.num_rows, 0
+        for i in range(metadata.num_row_groups):
+            group = metadata.row_group(i)
+            for j in range(group.num_columns):
+                chunk = group.column(j)
+                if columns is None or chunk.path_in_schema.split('.')[0] in columns:
+                    nbytes += chunk.total_uncompressed_size
+    else:
+        # Memory-mapped: batch sizes come from the buffer layout without reading any data
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        total_rows, nbytes = 0, 0
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            total_rows += batch.num_rows
+            nbytes += (batch.select(source.columns) if source.columns is not None else batch).nbytes
+    stop = total_rows if source.stop is None else min(source.stop, total_rows)
+    selected = max(stop - source.start, 0)
+    if rows is not None:
+        selected = min(selected, rows)
+    return int(selected * nbytes / total_rows) if total_rows else 0
+
+
+def _open(source: DataSource) -> str:
+    if pa is None:
+        raise ImportError("data sources need the pyarrow package")
+    return resolve_path(source.path)
+
+
+def _to_frame(batches: List["pa.RecordBatch"], schema, compact: bool) -> pd.DataFrame:
+    table = pa.Table.from_batches(batches, schema=schema)
+    df = table.to_pandas()
+    for field in table.schema:
+        if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+            dtype = 'float32' if compact else None
+            df[field.name] = [pd.Series(v, dtype=dtype) if v is not None else None for v in df[field.name]]
+    return df
+
+
+def _iter(source: DataSource, batch_rows: Optional[int], compact: bool,
+          min_rows: int) -> Iterator[pd.DataFrame]:
+    path = _open(source)
+    batch_rows = batch_rows or settings.source_batch_rows
+    # One frame is held back while the next is built
+    reserve_source(estimate_bytes(source, path, 2 * batch_rows))
+    # Not made the current span: the frames are consumed outside this generator
+    read_span = start_span("source.read", path=path, batch_rows=batch_rows)
+    pending, rows, total, schema, ready = [], 0, 0, None, None
+    try:
+        for batch in _record_batches(source, path, batch_rows):
+            schema = batch.schema
+            pending.append(batch)
+            rows += batch.num_rows
+            if rows >= batch_rows:
+                if ready is not None:
+                    yield ready
+                ready = _to_frame(pending, schema, compact)
+                total += rows
+                pending, rows = [], 0
+        if pending:
+            tail = _to_frame(pending, schema, compact)
+            total += rows
+            if ready is not None and len(tail) < min_rows:
+                ready = pd.concat([ready, tail], ignore_index=True)
+            else:
+                if ready is not None:
+                    yield ready
+                ready = tail
+        if ready is not None:
+            yield ready
+    finally:
+        if read_span is not None:
+            read_span.set_attribute("rows", total)
+            read_span.end()
+
+
+def iter_frames(source: DataSource, batch_rows: Optional[int] = None, compact: Optional[bool] = None,
+                min_rows: int = 1) -> Iterator[pd.DataFrame]:
+    """
+    The selected rows as frames of about ``batch_rows`` rows.
+
+    A last frame shorter than ``min_rows`` is merged into the one before it,
+    since some models cannot predict on very short frames.
+    """
+    compact = use_compact(compact)
+    for frame in _iter(source, batch_rows, compact, min_rows):
+        yield compact_dtypes(frame) if compact else frame
+
+
+def read_frame(source: DataSource, compact: Optional[bool] = None) -> pd.DataFrame:
+    """All selected rows as one frame, converted from a single Arrow table."""
+    compact = use_compact(compact)
+    path = _open(source)
+    reserve_source(estimate_bytes(source, path))
+    with span("source.read", path=path) as read_span:
+        batches = list(_record_batches(source, path, settings.source_batch_rows))
+        if not batches:
+            raise ValueError(f"{source.path} has no rows in the selected range")
+        df = _to_frame(batches, batches[0].schema, compact)
+        if read_span is not None:
+            read_span.set_attribute("rows", len(df))
+    return compact_dtypes(df) if compact else df
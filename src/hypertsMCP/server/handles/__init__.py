@@ -2,10 +2,18 @@ from .train_model import RunTrainModel
 from .train_test_split import RunSplit
 from .predict import RunPredict
 from .evaluate import RunEvaluate
+from .run_pipeline import RunPipeline
+from .forecast_backtest import RunForecastBacktest
+from .stream_detect import RunStreamOpen, RunStreamAppend, RunStreamClose
 
 __all__ = [
     'RunTrainModel',
     'RunSplit',
     'RunPredict',
-    'RunEvaluate'
+    'RunEvaluate',
+    'RunPipeline',
+    'RunForecastBacktest',
+    'RunStreamOpen',
+    'RunStreamAppend',
+    'RunStreamClose'
 ]
\ No newline at end of file
@@ -1,10 +1,13 @@
 """Base handler and tool registry for MCP tools."""
-from typing import Dict, Any, Type, ClassVar
+from typing import Dict, Any, Type, ClassVar, Optional
 from mcp.types import Tool
+from ..admission import AdmissionController, AdmissionLimits, payload_size
+from ..settings import settings
 
 
 class ToolRegistry:
     _tools: ClassVar[Dict[str, 'BaseHandler']] = {}
+    admission: ClassVar[AdmissionController] = AdmissionController.from_settings(settings)
 
     @classmethod
     def register(cls, tool_class: Type['BaseHandler']) -> Type['BaseHandler']:
@@ -22,10 +25,20 @@ class ToolRegistry:
     def get_all_tools(cls) -> list[Tool]:
         return [tool.get_tool_description() for tool in cls._tools.values()]
 
+    @classmethod
+    async def call(cls, name: str, arguments: Dict[str, Any], payload_bytes: Optional[int] = None):
+        """Run a tool under admission control; raises AdmissionRejected when refused."""
+        tool = cls.get_tool(name)
+        if payload_bytes is None:
+            payload_bytes = payload_size(arguments)
+        async with cls.admission.gate(tool).admit(payload_bytes):
+            return await tool.run_tool(arguments)
+
 
 class BaseHandler:
     name: str = ""
     description: str = ""
+    admission_limits: AdmissionLimits = AdmissionLimits()
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -38,4 +51,3 @@ class BaseHandler:
     async def run_tool(self, arguments: Dict[str, Any]):
         """Run the tool with given arguments. Returns dict for HTTP, or Sequence[TextContent] for MCP."""
         raise NotImplementedError
-
@@ -1,21 +1,181 @@
 """Handler for model evaluation functionality."""
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel
+import asyncio
+from typing import Optional, Dict, Any, List, Union
+from pydantic import BaseModel, Field, model_validator
 from mcp import Tool
 from .base import BaseHandler
+from .predict import predict_frame, predict_frame_with_proba, source_batches
+from .train_model import TaskType
+from ..admission import AdmissionLimits
+from ..data_source import DataSource, read_frame
+from ..metrics import score_sets
 from ..storage_manager import ModelStore
 import pandas as pd
-from ..utils import json_to_df, df_to_json
+from ..utils import (json_to_df, df_to_json, compact_to_array, is_compact_array,
+                     compact_dtypes, use_compact, decode_frame)
 import numpy as np
+from hyperts.utils import consts
+from ...tracing import span
+
+
 class EvaluateArgs(BaseModel):
-    test_data: str
-    y_pred: List
-    model_id: str  # ID of the model used for evaluation
-    y_proba: Optional[dict] = None  # Optional predicted probabilities
+    test_data: Optional[str] = None
+    # A list, or a compact array as returned by predict in compact mode
+    y_pred: Optional[Union[List, dict]] = None
+    # ID of the model used for evaluation; without it the arrays are scored directly
+    model_id: Optional[str] = None
+    # Optional predicted probabilities: a compact array as returned by predict(proba=True),
+    # or a df_to_json-encoded frame
+    y_proba: Optional[Union[dict, str]] = None
+    y_true: Optional[Union[List, dict]] = Field(
+        default=None,
+        description="without model_id: true targets as a list or compact array"
+    )
+    target: Optional[Union[str, List[str]]] = Field(
+        default=None,
+        description="without model_id: test_data column(s) holding the true targets instead of y_true"
+    )
+    task: Optional[TaskType] = Field(default=None, description="without model_id: task deciding the metrics")
+    y_preds: Optional[Dict[str, Union[List, dict]]] = Field(
+        default=None,
+        description="without model_id: named prediction sets scored against the same targets"
+    )
+    y_probas: Optional[Dict[str, Union[dict, str]]] = Field(
+        default=None,
+        description="probabilities per named prediction set in y_preds"
+    )
+    metrics: Optional[List[str]] = Field(default=None, description="metric names (default: per task)")
+    pos_label: Optional[Union[int, str]] = None
+    compact_dtypes: Optional[bool] = Field(
+        default=None,
+        description="decode frames as float32 / narrow ints / categoricals (default: server setting)"
+    )
+    precision_report: bool = Field(
+        default=False,
+        description="in compact mode, also score the float64 targets and report the differences (test_data only)"
+    )
+    test_source: Optional[DataSource] = Field(
+        default=None,
+        description=("read the test set from a server-side Parquet/Feather file in row batches instead of "
+                     "test_data; with model_id and no y_pred, the model predicts it batch by batch")
+    )
+    batch_rows: Optional[int] = Field(default=None, ge=1, description="rows per batch (default: server setting)")
+
+    @model_validator(mode='after')
+    def check_inputs(self):
+        if self.test_data is not None and self.test_source is not None:
+            raise ValueError("give either test_data or test_source")
+        has_test = self.test_data is not None or self.test_source is not None
+        if self.model_id is not None:
+            if not has_test or (self.y_pred is None and self.test_source is None):
+                raise ValueError("evaluating with model_id needs test_data and y_pred, or test_source")
+            if self.y_preds is not None:
+                raise ValueError("y_preds is only scored without model_id")
+            return self
+        if self.task is None:
+            raise ValueError("evaluating without model_id needs task")
+        if (self.y_true is None) == (self.target is None or not has_test):
+            raise ValueError("give either y_true, or test_data or test_source with target")
+        if (self.y_pred is None) == (self.y_preds is None):
+            raise ValueError("give either y_pred or y_preds")
+        return self
+
+def decode_proba(y_proba: Union[dict, str, None]) -> Optional[np.ndarray]:
+    """Decode probabilities sent as a compact array or a df_to_json frame."""
+    if y_proba is None:
+        return None
+    if is_compact_array(y_proba):
+        return compact_to_array(y_proba)[0]
+    return json_to_df(y_proba).to_numpy()
+
+
+def decode_pred(y_pred: Union[List, dict]) -> np.ndarray:
+    """Decode predictions sent as a list or a compact array."""
+    if is_compact_array(y_pred):
+        return compact_to_array(y_pred)[0]
+    return np.array(y_pred)
+
+
+def decode_test(test_data: str, compact: bool = False) -> pd.DataFrame:
+    with span("decode", bytes=len(test_data), compact=compact):
+        return json_to_df(test_data, compact=compact)
+
+
+def precision_loss(scores: pd.DataFrame, reference: pd.DataFrame) -> Dict[str, Any]:
+    """Absolute differences between scores computed from compact and float64 targets."""
+    compact = dict(zip(scores.iloc[:, 0], scores.iloc[:, 1].astype(float)))
+    full = dict(zip(reference.iloc[:, 0], reference.iloc[:, 1].astype(float)))
+    diffs = {metric: abs(compact[metric] - full[metric]) for metric in full if metric in compact}
+    return {'max_abs_diff': max(diffs.values(), default=0.0), 'metrics': diffs}
+
+
+def evaluate_frame(model, test_df: pd.DataFrame, y_pred: np.ndarray,
+                   y_proba: Optional[np.ndarray] = None, metrics: Optional[List[str]] = None) -> pd.DataFrame:
+    """Score predictions against the target column of a decoded test frame."""
+    with span("evaluate", rows=len(test_df)):
+        _, y_test = model.split_X_y(test_df.copy())
+        return model.evaluate(y_test, y_pred, y_proba, metrics=metrics)
+
+
+def evaluate_source(model, source: DataSource, y_pred: Optional[np.ndarray] = None,
+                    y_proba: Optional[np.ndarray] = None, metrics: Optional[List[str]] = None,
+                    batch_rows: Optional[int] = None, compact: bool = False) -> pd.DataFrame:
+    """
+    Score predictions against the targets of a server-side file, read one row batch at a time.
+
+    Without y_pred the model predicts each batch as it is read, so features are
+    never held in memory beyond the current batch; only targets and predictions are.
+    Forecasts are read in one batch (see ``source_batches``).
+    """
+    with_proba = y_pred is None and getattr(model, 'task', None) in consts.TASK_LIST_CLASSIFICATION
+    targets, predictions, probas = [], [], []
+    for batch in source_batches(model, source, batch_rows, compact):
+        if y_pred is None:
+            if with_proba:
+                prediction, proba, _ = predict_frame_with_proba(model, batch)
+                probas.append(proba)
+            else:
+                prediction = predict_frame(model, batch)
+            predictions.append(prediction)
+        _, y_test = model.split_X_y(batch)
+        targets.append(y_test)
+    if not targets:
+        raise ValueError(f"{source.path} has no rows in the selected range")
+    if y_pred is None:
+        y_pred = (pd.concat(predictions, ignore_index=True) if isinstance(predictions[0], pd.DataFrame)
+                  else np.concatenate([np.asarray(p) for p in predictions]))
+        y_proba = np.concatenate(probas) if with_proba else None
+    y_test = pd.concat(targets, ignore_index=True)
+    with span("evaluate", rows=len(y_test)):
+        return model.evaluate(y_test, y_pred, y_proba, metrics=metrics)
+
+
+def evaluate_arrays(args: EvaluateArgs) -> pd.DataFrame:
+    """Score y_pred or every y_preds set against y_true with NumPy metrics; no model is loaded."""
+    if args.y_true is not None:
+        y_true = decode_pred(args.y_true)
+    elif args.test_source is not None:
+        # Only the target columns are read from the file
+        target = [args.target] if isinstance(args.target, str) else args.target
+        source = args.test_source.model_copy(update={'columns': target})
+        y_true = read_frame(source, args.compact_dtypes)[args.target].to_numpy()
+    else:
+        y_true = decode_frame(args.test_data, args.compact_dtypes)[args.target].to_numpy()
+    if args.y_pred is not None:
+        preds = {'Score': decode_pred(args.y_pred)}
+        probas = {'Score': decode_proba(args.y_proba)}
+    else:
+        preds = {name: decode_pred(y) for name, y in args.y_preds.items()}
+        probas = {name: decode_proba(p) for name, p in (args.y_probas or {}).items()}
+    with span("evaluate", rows=len(y_true), sets=len(preds)):
+        return score_sets(y_true, preds, args.task, probas, args.metrics, args.pos_label)
+
 
 class RunEvaluate(BaseHandler):
     name = "evaluate"
-    description = "Evaluate model performance against test data."
+    description = ("Evaluate model performance against test data, or score prediction arrays "
+                   "against y_true without loading a model.")
+    admission_limits = AdmissionLimits(max_concurrency=8, max_queue=64, memory_factor=10.0)
 
     def get_tool_description(self) -> Tool:
         return Tool(
@@ -26,16 +186,32 @@ class RunEvaluate(BaseHandler):
     
     async def handle_evaluate(self, args: EvaluateArgs) -> dict:
         """Evaluate model performance against test data."""
-        test_df = json_to_df(args.test_data)
-        y_pred = np.array(args.y_pred)
-        y_proba_df = json_to_df(args.y_proba) if args.y_proba else None
-        
-        model = ModelStore.load(args.model_id)
-        _, y_test = model.split_X_y(test_df.copy())
-        scores = model.evaluate(y_test, y_pred, y_proba_df)
-        scores_json = df_to_json(scores)
+        return await asyncio.to_thread(self.evaluate, args)
+
+    def evaluate(self, args: EvaluateArgs) -> dict:
+        """Blocking part of handle_evaluate, run in a worker thread."""
+        if args.model_id is None:
+            return {'scores': df_to_json(evaluate_arrays(args))}
+        y_pred = decode_pred(args.y_pred) if args.y_pred is not None else None
+        y_proba = decode_proba(args.y_proba)
+        model = ModelStore.get(args.model_id)
+        if args.test_source is not None:
+            scores = evaluate_source(model, args.test_source, y_pred, y_proba, args.metrics,
+                                     args.batch_rows, use_compact(args.compact_dtypes))
+            return {'scores': df_to_json(scores)}
+        if not use_compact(args.compact_dtypes):
+            scores = evaluate_frame(model, decode_test(args.test_data), y_pred, y_proba, args.metrics)
+            return {'scores': df_to_json(scores)}
 
-        return {'scores': scores_json}
+        if not args.precision_report:
+            scores = evaluate_frame(model, decode_test(args.test_data, True), y_pred, y_proba, args.metrics)
+            return {'scores': df_to_json(scores)}
+        # Decode at full precision once; the compact frame is derived from it
+        test_df = decode_test(args.test_data)
+        scores = evaluate_frame(model, compact_dtypes(test_df), y_pred, y_proba, args.metrics)
+        reference = evaluate_frame(model, test_df, y_pred.astype(np.float64)
+                                   if y_pred.dtype.kind == 'f' else y_pred, y_proba, args.metrics)
+        return {'scores': df_to_json(scores), 'precision': precision_loss(scores, reference)}
 
     async def run_tool(self, arguments: Dict[str, Any]) -> dict:
         """Run the evaluate tool."""
@@ -0,0 +1,195 @@
+"""Handler for multi-horizon forecast backtests over many cutoffs."""
+import asyncio
+from typing import Optional, Any, Dict, List, Literal
+from pydantic import BaseModel, Field, model_validator
+from mcp import Tool
+from .base import BaseHandler
+from ..admission import AdmissionLimits
+from ..storage_manager import ModelStore
+from ..utils import decode_frame, array_to_compact
+from ...tracing import span
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from hyperts.utils import consts
+
+
+class BacktestArgs(BaseModel):
+    model_id: str  # ID of a trained forecast model
+    data: str  # history frame with the timestamp, target and covariate columns
+    horizon: int = Field(default=1, ge=1, description="steps forecast from each cutoff")
+    cutoffs: Optional[List[str]] = Field(
+        default=None,
+        description="timestamps of the last observed row of each window"
+    )
+    stride: Optional[int] = Field(
+        default=None, ge=1,
+        description="rows between consecutive cutoffs when cutoffs are not given (default: horizon)"
+    )
+    min_history: int = Field(default=1, ge=1, description="rows observed before the first stride cutoff")
+    dtype: Literal['float32', 'float64'] = 'float32'
+    return_actuals: bool = False
+    compact_dtypes: Optional[bool] = Field(
+        default=None,
+        description="decode frames as float32 / narrow ints / categoricals (default: server setting)"
+    )
+
+    @model_validator(mode='after')
+    def check_cutoffs(self):
+        if self.cutoffs is not None and self.stride is not None:
+            raise ValueError("give either cutoffs or stride, not both")
+        return self
+
+
+def sort_history(model, history_df: pd.DataFrame) -> pd.DataFrame:
+    """Order the history frame by the model's timestamp column."""
+    order = np.argsort(pd.to_datetime(history_df[model.timestamp]).to_numpy(), kind='stable')
+    return history_df.iloc[order].reset_index(drop=True)
+
+
+def cutoff_rows(model, history_df: pd.DataFrame, args: BacktestArgs) -> np.ndarray:
+    """Row positions of the last observed row of every window."""
+    n_rows = len(history_df)
+    if args.cutoffs is not None:
+        timestamps = pd.DatetimeIndex(pd.to_datetime(history_df[model.timestamp]))
+        rows = timestamps.get_indexer(pd.to_datetime(args.cutoffs))
+        missing = [c for c, row in zip(args.cutoffs, rows) if row < 0]
+        if missing:
+            raise ValueError(f"cutoffs not found in the history: {missing}")
+    else:
+        rows = np.arange(args.min_history - 1, n_rows - args.horizon, args.stride or args.horizon)
+    if len(rows) == 0:
+        raise ValueError("no backtest window fits in the history")
+    if rows.max() + args.horizon >= n_rows:
+        raise ValueError(f"history ends before the last cutoff plus a horizon of {args.horizon} rows")
+    return rows
+
+
+def target_columns(model) -> List[str]:
+    """Target column names; univariate models may store a single name as a string."""
+    return [model.target] if isinstance(model.target, str) else list(model.target)
+
+
+def forecast_origin(model) -> str:
+    """
+    'rolling' when each window is forecast from its own cutoff, 'fixed' otherwise.
+
+    Statistical models forecast from the end of their training data whatever the
+    cutoff, so their windows are slices of one fixed-origin forecast.
+    """
+    return 'rolling' if model.mode == consts.Mode_DL else 'fixed'
+
+
+def rolling_forecast(model, history_df: pd.DataFrame, rows: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Forecast ``horizon`` steps after every cutoff row.
+
+    Statistical models forecast from the timestamps and covariates alone, so the
+    rows covered by all windows are predicted in one call and gathered per window
+    (see ``forecast_origin``).
+    Deep learning models are conditioned on the history up to each cutoff and
+    are called once per window, so their backtests cost one forecast per cutoff.
+
+    Returns:
+        Array of shape (n_cutoffs, horizon, n_series)
+    """
+    targets = target_columns(model)
+    X = history_df.drop(columns=targets)
+    if forecast_origin(model) == 'fixed':
+        # (n_cutoffs, horizon) row indices, a view over one arange
+        target_rows = sliding_window_view(np.arange(len(history_df)), horizon)[rows + 1]
+        start, stop = target_rows.min(), target_rows.max() + 1
+        forecast = model.predict(X.iloc[start:stop].copy())
+        values = forecast[targets].to_numpy(dtype=np.float64)
+        return values[target_rows - start]
+
+    forecasts = np.empty((len(rows), horizon, len(targets)))
+    for i, row in enumerate(rows):
+        forecast = model.predict(X.iloc[row + 1:row + 1 + horizon].copy(),
+                                 forecast_start=history_df.iloc[:row + 1])
+        forecasts[i] = forecast[targets].to_numpy(dtype=np.float64)
+    return forecasts
+
+
+def window_actuals(model, history_df: pd.DataFrame, rows: np.ndarray, horizon: int) -> np.ndarray:
+    """Observed targets of every window, shape (n_cutoffs, horizon, n_series)."""
+    y = history_df[target_columns(model)].to_numpy(dtype=np.float64)
+    # sliding_window_view yields (n_rows - horizon + 1, n_series, horizon) views over y
+    return sliding_window_view(y, horizon, axis=0)[rows + 1].transpose(0, 2, 1)
+
+
+def horizon_metrics(forecasts: np.ndarray, actuals: np.ndarray) -> Dict[str, Any]:
+    """MAE, RMSE, MAPE and sMAPE per horizon step and over all windows."""
+    errors = forecasts - actuals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ape = np.abs(errors) / np.abs(actuals)
+        ape[~np.isfinite(ape)] = np.nan
+        sape = 2 * np.abs(errors) / (np.abs(forecasts) + np.abs(actuals))
+        sape[~np.isfinite(sape)] = np.nan
+
+    def reduce(axis):
+        return {
+            'mae': np.nanmean(np.abs(errors), axis=axis),
+            'rmse': np.sqrt(np.nanmean(errors ** 2, axis=axis)),
+            'mape': np.nanmean(ape, axis=axis),
+            'smape': np.nanmean(sape, axis=axis),
+        }
+
+    per_horizon = {k: v.tolist() for k, v in reduce((0, 2)).items()}
+    per_horizon['horizon'] = list(range(1, forecasts.shape[1] + 1))
+    overall = {k: float(v) for k, v in reduce(None).items()}
+    return {'per_horizon': per_horizon, 'overall': overall}
+
+
+class RunForecastBacktest(BaseHandler):
+    name = "forecast_backtest"
+    description = ("Backtest a forecast model from many cutoffs over one history frame. "
+                   "Returns a compact (cutoff x horizon x series) forecast array and "
+                   "per-horizon MAE/RMSE/MAPE/sMAPE. Deep learning models forecast each "
+                   "cutoff separately, so their time grows with the number of cutoffs; "
+                   "use stride or fewer cutoffs for long histories.")
+    admission_limits = AdmissionLimits(max_concurrency=4, max_queue=32, memory_factor=10.0)
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema=BacktestArgs.model_json_schema()
+        )
+
+    async def handle_forecast_backtest(self, args: BacktestArgs) -> dict:
+        """Backtest a forecast model over rolling cutoffs."""
+        return await asyncio.to_thread(self.forecast_backtest, args)
+
+    def forecast_backtest(self, args: BacktestArgs) -> dict:
+        """Blocking part of handle_forecast_backtest, run in a worker thread."""
+        model = ModelStore.get(args.model_id)
+        if getattr(model, 'task', None) not in consts.TASK_LIST_FORECAST:
+            raise ValueError('forecast_backtest is supported for forecast models only.')
+        if forecast_origin(model) == 'rolling':
+            # predict(forecast_start=...) moves the model's history; leave the shared copy alone
+            model = ModelStore.load(args.model_id)
+        history_df = sort_history(model, decode_frame(args.data, args.compact_dtypes))
+        rows = cutoff_rows(model, history_df, args)
+
+        with span("forecast", cutoffs=len(rows), horizon=args.horizon):
+            forecasts = rolling_forecast(model, history_df, rows, args.horizon)
+        actuals = window_actuals(model, history_df, rows, args.horizon)
+        series = target_columns(model)
+        result = {
+            'cutoffs': history_df[model.timestamp].iloc[rows].astype(str).tolist(),
+            'horizon': args.horizon,
+            'origin': forecast_origin(model),
+            'series': series,
+            'forecast': array_to_compact(forecasts, columns=series, dtype=args.dtype),
+            'metrics': horizon_metrics(forecasts, actuals),
+        }
+        if args.return_actuals:
+            result['actual'] = array_to_compact(actuals, columns=series, dtype=args.dtype)
+        return result
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> dict:
+        """Run the forecast_backtest tool."""
+        input_args = BacktestArgs(**arguments)
+        result = await self.handle_forecast_backtest(input_args)
+        return result
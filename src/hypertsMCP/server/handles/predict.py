@@ -1,20 +1,157 @@
 """Handler for model prediction functionality."""
-from typing import Optional, Any, Dict
-from pydantic import BaseModel
+import asyncio
+from typing import Optional, Any, Dict, Iterator, List, Literal, Tuple
+from pydantic import BaseModel, Field, model_validator
 from mcp import Tool
 from .base import BaseHandler
+from ..admission import AdmissionLimits
+from ..data_source import DataSource, iter_frames, read_frame
 from ..storage_manager import ModelStore
-from ..utils import json_to_df
+from ..preprocess_cache import reuse
+from ..utils import decode_frame, use_compact, array_to_compact
+import numpy as np
+import pandas as pd
+from hyperts.utils import consts
+from ...tracing import span
 
 class PredictArgs(BaseModel):
-    test_data: str
+    test_data: Optional[str] = None
     model_id: str  # ID of the model to use for prediction
     proba: bool = False  # Whether to return probability estimates
+    proba_dtype: Literal['float32', 'float64'] = 'float32'
+    compact_dtypes: Optional[bool] = Field(
+        default=None,
+        description="decode frames as float32 / narrow ints / categoricals (default: server setting)"
+    )
+    test_source: Optional[DataSource] = Field(
+        default=None,
+        description="predict on a server-side Parquet/Feather file, in row batches, instead of test_data"
+    )
+    batch_rows: Optional[int] = Field(default=None, ge=1, description="rows per batch (default: server setting)")
+
+    @model_validator(mode='after')
+    def check_data(self):
+        if (self.test_data is None) == (self.test_source is None):
+            raise ValueError("give either test_data or test_source")
+        return self
+
+
+def predict_frame(model, test_df: pd.DataFrame) -> np.ndarray:
+    """Predict on a decoded test frame, dropping the target column if present."""
+    with span("predict", rows=len(test_df)), reuse(model):
+        X_test, _ = model.split_X_y(test_df.copy())
+        return model.predict(X_test)
+
+
+def encode_prediction(prediction, compact: bool = False):
+    """Predictions as a list, or a float32 compact array for numeric output in compact mode."""
+    prediction = np.asarray(prediction)
+    if compact and prediction.dtype.kind in 'fiu':
+        return array_to_compact(prediction, dtype='float32')
+    return prediction.tolist()
+
+
+# Private hypernets GreedyEnsemble methods scoring each member once; any estimator
+# lacking one of them (e.g. after a hypernets upgrade) takes the public path
+ENSEMBLE_INTERNALS = ('_X2predictions', 'predictions2predict_proba', 'predictions2predict',
+                      '_indices2predict')
+
+
+def predict_with_proba(model, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, Optional[List]]:
+    """
+    Predict labels and class probabilities in a single pass over features X.
+
+    The preprocessing steps of the fitted pipeline run once, and for a greedy
+    ensemble every member is scored once; labels and probabilities are both
+    derived from those member predictions. Other estimators predict
+    probabilities once and take the labels as their argmax over ``classes_``.
+
+    Returns:
+        Tuple of (labels, probabilities of shape (n_rows, n_classes), class labels)
+    """
+    steps = model.sk_pipeline.steps
+    Xt = X
+    with span("transform", rows=len(X)):
+        for _, step in steps[:-1]:
+            if step is not None and step != 'passthrough':
+                Xt = step.transform(Xt)
+    estimator = steps[-1][1]
+    classes = getattr(estimator, 'classes_', None)
+    with span("predict", rows=len(X)):
+        if all(hasattr(estimator, name) for name in ENSEMBLE_INTERNALS):
+            member_predictions = estimator._X2predictions(Xt)
+            proba = estimator.predictions2predict_proba(member_predictions)
+            labels = estimator.predictions2predict(member_predictions)
+            if classes is not None:
+                labels = estimator._indices2predict(labels)
+        else:
+            proba = estimator.predict_proba(Xt)
+            if classes is not None and np.ndim(proba) == 2 and np.shape(proba)[1] == len(classes):
+                labels = np.asarray(classes)[np.argmax(proba, axis=1)]
+            else:
+                labels = estimator.predict(Xt)
+    return labels, proba, list(classes) if classes is not None else None
+
+
+def predict_frame_with_proba(model, test_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, Optional[List]]:
+    """Single-pass labels and probabilities for a decoded classification test frame."""
+    if getattr(model, 'task', None) not in consts.TASK_LIST_CLASSIFICATION:
+        raise ValueError('proba is supported for classification tasks only.')
+    X_test, _ = model.split_X_y(test_df.copy())
+    return predict_with_proba(model, X_test)
+
+
+# Batches shorter than this are merged into the one before; some models cannot predict on fewer rows
+MIN_BATCH_ROWS = 3
+
+
+def source_batches(model, source: DataSource, batch_rows: Optional[int] = None,
+                   compact: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Frames of a server-side file to predict on, one row batch at a time.
+
+    Forecast models get the whole range as one frame. Deep learning forecasters
+    forecast the steps right after their history whatever the timestamps asked
+    for, so every batch after the first would be forecast from the wrong origin.
+    """
+    if getattr(model, 'task', None) in consts.TASK_LIST_FORECAST:
+        return iter([read_frame(source, compact)])
+    return iter_frames(source, batch_rows, compact, min_rows=MIN_BATCH_ROWS)
+
+
+def predict_source(model, source: DataSource, batch_rows: Optional[int] = None, compact: bool = False,
+                   proba: bool = False) -> Tuple[Any, Optional[np.ndarray], Optional[List]]:
+    """
+    Predict on a server-side file one row batch at a time.
+
+    Only the current batch and the predictions so far are held in memory
+    (forecasts are read in one batch, see ``source_batches``).
+
+    Returns:
+        Tuple of (predictions, probabilities or None, class labels or None)
+    """
+    predictions, probas, classes = [], [], None
+    for batch in source_batches(model, source, batch_rows, compact):
+        if proba:
+            prediction, batch_proba, classes = predict_frame_with_proba(model, batch)
+            probas.append(batch_proba)
+        else:
+            prediction = predict_frame(model, batch)
+        predictions.append(prediction)
+    if not predictions:
+        raise ValueError(f"{source.path} has no rows in the selected range")
+    if isinstance(predictions[0], pd.DataFrame):
+        # Forecasts come back as frames of timestamps and targets
+        prediction = pd.concat(predictions, ignore_index=True)
+    else:
+        prediction = np.concatenate([np.asarray(p) for p in predictions])
+    return prediction, np.concatenate(probas) if proba else None, classes
 
 
 class RunPredict(BaseHandler):
     name = "predict"
     description = "Make predictions using a trained model."
+    admission_limits = AdmissionLimits(max_concurrency=8, max_queue=64, memory_factor=10.0)
 
     def get_tool_description(self) -> Tool:
         return Tool(
@@ -25,11 +162,29 @@ class RunPredict(BaseHandler):
     
     async def handle_predict(self, args: PredictArgs) -> dict:
         """Make predictions using a trained model."""
-        test_df = json_to_df(args.test_data)
-        model = ModelStore.load(args.model_id)
-        X_test, y_test = model.split_X_y(test_df.copy())
-        prediction = model.predict(X_test)
-        return {'prediction': prediction.tolist()}
+        return await asyncio.to_thread(self.predict, args)
+
+    def predict(self, args: PredictArgs) -> dict:
+        """Blocking part of handle_predict, run in a worker thread."""
+        compact = use_compact(args.compact_dtypes)
+        # Only requests asking for compact mode themselves get the compact response format
+        compact_output = args.compact_dtypes is True
+        if args.test_source is not None:
+            model = ModelStore.get(args.model_id)
+            prediction, proba, classes = predict_source(model, args.test_source, args.batch_rows,
+                                                        compact, args.proba)
+            result = {'prediction': encode_prediction(prediction, compact_output)}
+            if args.proba:
+                result['proba'] = array_to_compact(proba, columns=classes, dtype=args.proba_dtype)
+            return result
+        test_df = decode_frame(args.test_data, compact)
+        model = ModelStore.get(args.model_id)
+        if args.proba:
+            prediction, proba, classes = predict_frame_with_proba(model, test_df)
+            return {'prediction': encode_prediction(prediction, compact_output),
+                    'proba': array_to_compact(proba, columns=classes, dtype=args.proba_dtype)}
+        prediction = predict_frame(model, test_df)
+        return {'prediction': encode_prediction(prediction, compact_output)}
 
     async def run_tool(self, arguments: Dict[str, Any]) -> dict:
         """Run the predict tool."""
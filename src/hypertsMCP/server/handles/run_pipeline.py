@@ -0,0 +1,166 @@
+"""Handler for running a whole split/train/predict/evaluate chain server-side."""
+import asyncio
+import time
+from typing import Optional, Any, Dict, List, Literal
+from pydantic import BaseModel, Field, model_validator
+from mcp import Tool
+import pandas as pd
+from .base import BaseHandler
+from .train_test_split import SplitArgs, split_frame
+from .train_model import TrainModelArgs, fit_model
+from .predict import encode_prediction, predict_frame
+from .evaluate import evaluate_frame
+from ..admission import AdmissionLimits
+from ..storage_manager import ModelStore
+from ..utils import build_cell_indexes, decode_frame, df_to_json
+from ...tracing import span
+
+STEP_ORDER = {'split': 0, 'train': 1, 'predict': 2, 'evaluate': 3}
+# train_model arguments a train step cannot take: the pipeline supplies its frames
+DATA_OPTIONS = ('train_data', 'eval_data', 'test_data', 'train_source', 'eval_source', 'test_source')
+
+
+def encode_branch_prediction(prediction) -> Any:
+    """Predictions as a list, or forecasts (frames of timestamps and targets) as a JSON frame."""
+    if not isinstance(prediction, pd.DataFrame):
+        return encode_prediction(prediction)
+    frame = prediction.copy()
+    for col in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[col]):
+            frame[col] = frame[col].astype(str)
+    return df_to_json(frame)
+
+
+class PipelineStep(BaseModel):
+    op: Literal['split', 'train', 'predict', 'evaluate']
+    name: Optional[str] = None  # label of a train branch
+    options: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="split: train_test_split arguments; train: train_model arguments "
+                    "(without train_data); predict: {'return_predictions': bool}"
+    )
+
+
+class PipelineArgs(BaseModel):
+    data: str  # dataset to split, or the training set when there is no split step
+    steps: List[PipelineStep]
+    test_data: Optional[str] = None  # required for predict/evaluate without a split step
+    # Train branches running at the same time; bounded like train_model's own concurrency,
+    # since branches fit directly rather than through the train_model gate
+    max_parallel: int = Field(default=2, ge=1, le=2)
+    compact_dtypes: Optional[bool] = Field(
+        default=None,
+        description="decode frames as float32 / narrow ints / categoricals (default: server setting)"
+    )
+
+    @model_validator(mode='after')
+    def check_steps(self):
+        ops = [step.op for step in self.steps]
+        if [STEP_ORDER[op] for op in ops] != sorted(STEP_ORDER[op] for op in ops):
+            raise ValueError("steps must be ordered split -> train -> predict -> evaluate")
+        if 'train' not in ops:
+            raise ValueError("pipeline needs at least one train step")
+        for step in self.steps:
+            given = [key for key in DATA_OPTIONS if step.op == 'train' and key in step.options]
+            if given:
+                raise ValueError(f"train step options cannot include {given}; "
+                                 "the pipeline trains on its data and tests on its test split")
+        for op in ('split', 'predict', 'evaluate'):
+            if ops.count(op) > 1:
+                raise ValueError(f"at most one {op} step is allowed")
+        if 'split' not in ops and ('predict' in ops or 'evaluate' in ops) and self.test_data is None:
+            raise ValueError("test_data is required for predict/evaluate without a split step")
+        return self
+
+
+class RunPipeline(BaseHandler):
+    name = "run_pipeline"
+    description = ("Run split -> train -> predict -> evaluate server-side on one dataset. "
+                   "Several train steps are independent branches run concurrently; "
+                   "only model IDs, scores, optional predictions and timings are returned.")
+    admission_limits = AdmissionLimits(max_concurrency=1, max_queue=4, queue_timeout=60.0,
+                                       memory_factor=30.0)
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema=PipelineArgs.model_json_schema()
+        )
+
+    @staticmethod
+    def timed(timings: Dict[str, float], key: str, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[key] = round(time.perf_counter() - start, 4)
+        return result
+
+    def run_branch(self, step: PipelineStep, branch: str, train_df: pd.DataFrame,
+                   test_df: Optional[pd.DataFrame], predict_step: Optional[PipelineStep],
+                   evaluate: bool) -> Dict[str, Any]:
+        """Train one configuration and score it; runs in a worker thread."""
+        timings: Dict[str, float] = {}
+        train_args = TrainModelArgs(train_data="", **step.options)
+        model = self.timed(timings, 'train', fit_model, train_df, train_args)
+        result: Dict[str, Any] = {
+            'name': branch,
+            'model_id': self.timed(timings, 'save', ModelStore.save, model),
+        }
+        if train_args.sampling:
+            result['sampling'] = model.sampling_
+        if getattr(model, 'selection_', None) is not None:
+            result['selection'] = model.selection_
+        if predict_step is not None or evaluate:
+            y_pred = self.timed(timings, 'predict', predict_frame, model, test_df)
+            if predict_step is not None and predict_step.options.get('return_predictions', True):
+                result['prediction'] = encode_branch_prediction(y_pred)
+            if evaluate:
+                scores = self.timed(timings, 'evaluate', evaluate_frame, model, test_df, y_pred)
+                result['scores'] = df_to_json(scores)
+        result['timings'] = timings
+        return result
+
+    async def handle_run_pipeline(self, args: PipelineArgs) -> dict:
+        """Run the declared steps, keeping intermediate frames in memory."""
+        timings: Dict[str, float] = {}
+        steps = {step.op: step for step in args.steps if step.op != 'train'}
+        data_df = await asyncio.to_thread(self.timed, timings, 'decode', decode_frame, args.data, args.compact_dtypes)
+        if 'split' in steps:
+            split_args = SplitArgs(data="", **steps['split'].options)
+            train_df, test_df = await asyncio.to_thread(
+                self.timed, timings, 'split', split_frame, data_df, split_args)
+        else:
+            train_df = data_df
+            test_df = None
+            if args.test_data is not None:
+                test_df = await asyncio.to_thread(
+                    self.timed, timings, 'decode_test', decode_frame, args.test_data,
+                    args.compact_dtypes)
+
+        # Branches share the frames' nested cells
+        await asyncio.to_thread(build_cell_indexes, train_df, test_df)
+        semaphore = asyncio.Semaphore(args.max_parallel)
+
+        async def branch(i: int, step: PipelineStep):
+            name = step.name or f"model_{i}"
+            async with semaphore:
+                with span("branch", branch=name):
+                    return await asyncio.to_thread(
+                        self.run_branch, step, name, train_df, test_df,
+                        steps.get('predict'), 'evaluate' in steps)
+
+        started = time.perf_counter()
+        train_steps = [step for step in args.steps if step.op == 'train']
+        results = await asyncio.gather(*(branch(i, step) for i, step in enumerate(train_steps)))
+        timings['branches'] = round(time.perf_counter() - started, 4)
+
+        response = {'results': results, 'timings': timings}
+        if test_df is not None:
+            response['rows'] = {'train': len(train_df), 'test': len(test_df)}
+        return response
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> dict:
+        """Run the run_pipeline tool."""
+        input_args = PipelineArgs(**arguments)
+        result = await self.handle_run_pipeline(input_args)
+        return result
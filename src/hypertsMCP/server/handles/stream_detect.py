@@ -0,0 +1,120 @@
+"""Handlers for streaming anomaly detection sessions."""
+import asyncio
+import time
+from typing import Optional, Any, Dict, List
+from pydantic import BaseModel, Field
+from mcp import Tool
+from .base import BaseHandler
+from ..admission import AdmissionLimits
+from ..storage_manager import ModelStore
+from ..streaming import sessions
+from ...tracing import span
+
+
+class StreamOpenArgs(BaseModel):
+    model_id: str  # ID of a trained detection model
+    context: Optional[int] = Field(
+        default=None, ge=0,
+        description="buffered points prepended when scoring (default: the model's window)"
+    )
+    buffer_size: Optional[int] = Field(default=None, ge=1, description="points kept per session")
+
+
+class StreamAppendArgs(BaseModel):
+    session_id: str
+    points: List[Dict[str, Any]]  # records with the timestamp and variable columns, in time order
+
+
+class StreamCloseArgs(BaseModel):
+    session_id: str
+    recent: int = Field(default=0, ge=0, description="number of latest scored points to return")
+
+
+class RunStreamOpen(BaseHandler):
+    name = "stream_open"
+    description = "Open a streaming anomaly detection session for a detection model."
+    admission_limits = AdmissionLimits(max_concurrency=4, max_queue=32)
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema=StreamOpenArgs.model_json_schema()
+        )
+
+    async def handle_stream_open(self, args: StreamOpenArgs) -> dict:
+        """Load the model and open a session."""
+        return await asyncio.to_thread(self.stream_open, args)
+
+    def stream_open(self, args: StreamOpenArgs) -> dict:
+        """Blocking part of handle_stream_open, run in a worker thread."""
+        # Scoring never changes the model, so sessions share the in-memory one
+        model = ModelStore.get(args.model_id)
+        session_id = sessions.open(model, args.model_id, args.context, args.buffer_size)
+        stream = sessions.get(session_id)
+        return {'session_id': session_id, 'context': stream.context,
+                'buffer_size': stream.buffer.maxlen, 'idle_timeout': sessions.idle_timeout}
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> dict:
+        """Run the stream_open tool."""
+        input_args = StreamOpenArgs(**arguments)
+        result = await self.handle_stream_open(input_args)
+        return result
+
+
+class RunStreamAppend(BaseHandler):
+    name = "stream_append"
+    description = ("Append points to a streaming detection session; only the new points "
+                   "are scored and their anomaly flags and scores are returned.")
+    admission_limits = AdmissionLimits(max_concurrency=16, max_queue=256, queue_timeout=5.0)
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema=StreamAppendArgs.model_json_schema()
+        )
+
+    async def handle_stream_append(self, args: StreamAppendArgs) -> dict:
+        """Score appended points."""
+        return await asyncio.to_thread(self.stream_append, args)
+
+    def stream_append(self, args: StreamAppendArgs) -> dict:
+        """Blocking part of handle_stream_append, run in a worker thread."""
+        start = time.perf_counter()
+        with span("stream.append", session_id=args.session_id, points=len(args.points)):
+            results = sessions.get(args.session_id).append(args.points)
+        return {'results': results, 'latency_ms': round((time.perf_counter() - start) * 1000, 3)}
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> dict:
+        """Run the stream_append tool."""
+        input_args = StreamAppendArgs(**arguments)
+        result = await self.handle_stream_append(input_args)
+        return result
+
+
+class RunStreamClose(BaseHandler):
+    name = "stream_close"
+    description = "Close a streaming detection session and return its summary."
+    admission_limits = AdmissionLimits(max_concurrency=16, max_queue=256, queue_timeout=5.0)
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema=StreamCloseArgs.model_json_schema()
+        )
+
+    async def handle_stream_close(self, args: StreamCloseArgs) -> dict:
+        """Close a session."""
+        stream = sessions.close(args.session_id)
+        result = stream.summary()
+        if args.recent:
+            result['recent'] = stream.recent(args.recent)
+        return result
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> dict:
+        """Run the stream_close tool."""
+        input_args = StreamCloseArgs(**arguments)
+        result = await self.handle_stream_close(input_args)
+        return result
@@ -1,11 +1,23 @@
 """Handler for model training functionality."""
+import asyncio
+import contextlib
+import threading
 from typing import Optional, Any, Dict, List, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from mcp import Tool
 from .base import BaseHandler
+from ..admission import AdmissionLimits
+from ..settings import settings
 from ..storage_manager import ModelStore
+from ..data_source import DataSource, read_frame
+from ..sampling import SamplingArgs, install_sampling
+from ..selection import install_budget, measure_model
+from .. import preprocess_cache
 from hyperts import make_experiment
-from ..utils import json_to_df, is_nested
+from hypernets.core.callbacks import Callback
+import pandas as pd
+from ... import tracing
+from ..utils import decode_frame, is_nested
 
 
 TaskType = Literal[
@@ -15,8 +27,44 @@ TaskType = Literal[
     'multivariate-binaryclass', 'multivariate-multiclass'
 ]
 
+# Deep learning searches build Keras models on TensorFlow's process-global graph,
+# session and seeds, so only one of them runs at a time; stats searches run in parallel.
+_dl_fit_lock = threading.Lock()
+
+WARMUP_ROWS = 8
+
+
+class TrialSpanCallback(Callback):
+    """Search callback recording every HyperTS trial as a span under the current one."""
+
+    def __init__(self, parent: tracing.Span):
+        super().__init__()
+        self.parent = parent
+        self.spans: Dict[int, tracing.Span] = {}
+
+    def __deepcopy__(self, memo):
+        # The search deep-copies the hyper model; keep reporting to the same parent
+        return self
+
+    def on_trial_begin(self, hyper_model, space, trial_no):
+        self.spans[trial_no] = tracing.start_span("trial", parent=self.parent, trial_no=trial_no)
+
+    def on_trial_end(self, hyper_model, space, trial_no, reward, improved, elapsed):
+        trial = self.spans.pop(trial_no, None)
+        if trial is not None:
+            trial.set_attribute("reward", float(reward[0] if isinstance(reward, (list, tuple)) else reward))
+            trial.set_attribute("improved", bool(improved))
+            trial.end()
+
+    def on_trial_error(self, hyper_model, space, trial_no):
+        trial = self.spans.pop(trial_no, None)
+        if trial is not None:
+            trial.error = "trial failed"
+            trial.end()
+
+
 class TrainModelArgs(BaseModel):
-    train_data: str
+    train_data: Optional[str] = None
     task: TaskType
 
     eval_data: Optional[str] = None
@@ -63,11 +111,124 @@ class TrainModelArgs(BaseModel):
     clear_cache: Optional[bool] = None
     columns: Optional[str] = None
     cells_as_array: bool = False
+    compact_dtypes: Optional[bool] = Field(
+        default=None,
+        description="decode frames as float32 / narrow ints / categoricals (default: server setting)"
+    )
+    max_inference_latency_ms: Optional[float] = Field(
+        default=None, gt=0,
+        description="per-row prediction latency budget of the final model or ensemble"
+    )
+    max_model_size_mb: Optional[float] = Field(default=None, gt=0, description="size budget of the final model")
+    benchmark_rows: int = Field(default=256, ge=1, description="held-out rows used to time candidates")
+    sampling: Optional[SamplingArgs] = Field(
+        default=None,
+        description="run the model search on a subsample of the training set"
+    )
+    train_source: Optional[DataSource] = Field(
+        default=None,
+        description="read the training set from a server-side Parquet/Feather file instead of train_data"
+    )
+    eval_source: Optional[DataSource] = Field(default=None, description="server-side file instead of eval_data")
+    test_source: Optional[DataSource] = Field(default=None, description="server-side file instead of test_data")
+
+    @model_validator(mode='after')
+    def check_data(self):
+        if (self.train_data is None) == (self.train_source is None):
+            raise ValueError("give either train_data or train_source")
+        if self.eval_data and self.eval_source or self.test_data and self.test_source:
+            raise ValueError("give each of eval and test data either inline or as a source, not both")
+        return self
+
+
+def fit_model(train_df: pd.DataFrame, args: TrainModelArgs,
+              eval_df: Optional[pd.DataFrame] = None, test_df: Optional[pd.DataFrame] = None):
+    """Run a HyperTS experiment on a decoded frame and return the fitted model."""
+    with tracing.span("train", task=args.task, mode=args.mode, rows=len(train_df),
+                      max_trials=args.max_trials) as train_span:
+        return _fit_model(train_df, args, eval_df, test_df, train_span)
+
+
+def _fit_model(train_df: pd.DataFrame, args: TrainModelArgs, eval_df: Optional[pd.DataFrame],
+               test_df: Optional[pd.DataFrame], train_span: Optional[tracing.Span]):
+    experiment = make_experiment(
+        train_data=train_df.copy(),
+        task=args.task,
+        eval_data=eval_df,
+        test_data=test_df,
+        mode=args.mode,
+        max_trials=args.max_trials,
+        eval_size=args.eval_size,
+        cv=args.cv,
+        num_folds=args.num_folds,
+        ensemble_size=args.ensemble_size,
+        target=args.target,
+        freq=args.freq,
+        timestamp=args.timestamp,
+        forecast_train_data_periods=args.forecast_train_data_periods,
+        forecast_drop_part_sample=args.forecast_drop_part_sample,
+        timestamp_format=args.timestamp_format,
+        covariates=args.covariates,
+        dl_forecast_window=args.dl_forecast_window,
+        dl_forecast_horizon=args.dl_forecast_horizon,
+        contamination=args.contamination,
+        id=args.id,
+        searcher=args.searcher,
+        search_space=args.search_space,
+        search_callbacks=args.search_callbacks,
+        searcher_options=args.searcher_options,
+        callbacks=args.callbacks,
+        early_stopping_rounds=args.early_stopping_rounds,
+        early_stopping_time_limit=args.early_stopping_time_limit,
+        early_stopping_reward=args.early_stopping_reward,
+        reward_metric=args.reward_metric,
+        optimize_direction=args.optimize_direction,
+        discriminator=args.discriminator,
+        hyper_model_options=args.hyper_model_options,
+        tf_gpu_usage_strategy=args.tf_gpu_usage_strategy,
+        tf_memory_limit=args.tf_memory_limit,
+        final_retrain_on_wholedata=args.final_retrain_on_wholedata,
+        verbose=args.verbose,
+        log_level=args.log_level,
+        random_state=args.random_state,
+        clear_cache=args.clear_cache
+    )
+    report = install_sampling(experiment, args.sampling, args.task) if args.sampling else None
+    budget = None
+    if args.max_inference_latency_ms is not None or args.max_model_size_mb is not None:
+        budget = install_budget(experiment, args.max_inference_latency_ms, args.max_model_size_mb,
+                                args.benchmark_rows)
+    if train_span is not None:
+        experiment.hyper_model.callbacks.append(TrialSpanCallback(train_span))
+    uninstall = preprocess_cache.install(experiment)
+    try:
+        with _dl_fit_lock if args.mode != 'stats' else contextlib.nullcontext():
+            model = experiment.run()
+    finally:
+        if uninstall is not None:
+            uninstall()
+    if model is None:
+        raise RuntimeError("Training failed: no trial finished successfully")
+    if settings.warmup_store_sample:
+        # A few training rows, replayed through predict when the server warms the model up
+        model.warmup_sample_ = train_df.iloc[-WARMUP_ROWS:].copy()
+    if report is not None:
+        model.sampling_ = report
+    if budget is not None:
+        # Without eval or test data the training rows stand in; the report says which was used
+        source, frame = next((name, df) for name, df in
+                             (('eval_data', eval_df), ('test_data', test_df), ('train_data', train_df))
+                             if df is not None)
+        measure_model(model, frame, budget, args.benchmark_rows, source)
+        model.selection_ = budget
+    return model
 
 
 class RunTrainModel(BaseHandler):
     name = "train_model"
     description = "Train a machine learning model and return a model ID."
+    admission_limits = AdmissionLimits(max_concurrency=2, max_queue=8, queue_timeout=60.0,
+                                       memory_factor=20.0)
 
     def get_tool_description(self) -> Tool:
         return Tool(
@@ -78,56 +239,33 @@ class RunTrainModel(BaseHandler):
     
     async def handle_train_model(self, args: TrainModelArgs) -> dict:
         """Train a machine learning model using HyperTS."""
-        train_df = json_to_df(args.train_data)
+        return await asyncio.to_thread(self.train_model, args)
+
+    def train_model(self, args: TrainModelArgs) -> dict:
+        """Blocking part of handle_train_model, run in a worker thread."""
+        train_df = self.load(args.train_data, args.train_source, args.compact_dtypes)
         if args.task in ("classification", "regression") and not is_nested(train_df):
             # Note: Non-nested data may need transformation for classification/regression tasks
             pass
         
-        experiment = make_experiment(
-            train_data=train_df.copy(),
-            task=args.task,
-            eval_data=args.eval_data,
-            test_data=args.test_data,
-            mode=args.mode,
-            max_trials=args.max_trials,
-            eval_size=args.eval_size,
-            cv=args.cv,
-            num_folds=args.num_folds,
-            ensemble_size=args.ensemble_size,
-            target=args.target,
-            freq=args.freq,
-            timestamp=args.timestamp,
-            forecast_train_data_periods=args.forecast_train_data_periods,
-            forecast_drop_part_sample=args.forecast_drop_part_sample,
-            timestamp_format=args.timestamp_format,
-            covariates=args.covariates,
-            dl_forecast_window=args.dl_forecast_window,
-            dl_forecast_horizon=args.dl_forecast_horizon,
-            contamination=args.contamination,
-            id=args.id,
-            searcher=args.searcher,
-            search_space=args.search_space,
-            search_callbacks=args.search_callbacks,
-            searcher_options=args.searcher_options,
-            callbacks=args.callbacks,
-            early_stopping_rounds=args.early_stopping_rounds,
-            early_stopping_time_limit=args.early_stopping_time_limit,
-            early_stopping_reward=args.early_stopping_reward,
-            reward_metric=args.reward_metric,
-            optimize_direction=args.optimize_direction,
-            discriminator=args.discriminator,
-            hyper_model_options=args.hyper_model_options,
-            tf_gpu_usage_strategy=args.tf_gpu_usage_strategy,
-            tf_memory_limit=args.tf_memory_limit,
-            final_retrain_on_wholedata=args.final_retrain_on_wholedata,
-            verbose=args.verbose,
-            log_level=args.log_level,
-            random_state=args.random_state,
-            clear_cache=args.clear_cache
-        )
-        model = experiment.run()
+        eval_df = self.load(args.eval_data, args.eval_source, args.compact_dtypes)
+        test_df = self.load(args.test_data, args.test_source, args.compact_dtypes)
+        model = fit_model(train_df, args, eval_df, test_df)
         unique_id = ModelStore.save(model)
-        return {"model_id": unique_id}
+        result = {"model_id": unique_id}
+        if args.sampling:
+            result["sampling"] = model.sampling_
+        if getattr(model, "selection_", None) is not None:
+            result["selection"] = model.selection_
+        return result
+
+    @staticmethod
+    def load(data: Optional[str], source: Optional[DataSource],
+             compact: Optional[bool]) -> Optional[pd.DataFrame]:
+        """A frame given inline or as a server-side source; None when neither is given."""
+        if source is not None:
+            return read_frame(source, compact)
+        return decode_frame(data, compact) if data else None
 
     async def run_tool(self, arguments: Dict[str, Any]) -> dict:
         args = TrainModelArgs(**arguments)
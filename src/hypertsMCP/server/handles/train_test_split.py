@@ -1,10 +1,14 @@
 """Handler for train/test split functionality."""
-from typing import Dict, Any, Optional, List, Union
-from pydantic import BaseModel
+import asyncio
+from typing import Dict, Any, Optional, List, Tuple, Union
+import pandas as pd
+from pydantic import BaseModel, Field
 from mcp import Tool
 from sklearn.model_selection import train_test_split
-from ..utils import df_to_json, json_to_df
+from ..utils import df_to_json, decode_frame
 from .base import BaseHandler
+from ..admission import AdmissionLimits
+from ...tracing import span
 
 
 class SplitArgs(BaseModel):
@@ -14,11 +18,29 @@ class SplitArgs(BaseModel):
     random_state: Optional[int] = None
     shuffle: bool = True
     stratify: Optional[List[Any]] = None
+    compact_dtypes: Optional[bool] = Field(
+        default=None,
+        description="decode frames as float32 / narrow ints / categoricals (default: server setting)"
+    )
+
+
+def split_frame(data_df: pd.DataFrame, args: SplitArgs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split a decoded frame with scikit-learn's train_test_split."""
+    train_set, test_set = train_test_split(
+        data_df,
+        test_size=args.test_size,
+        train_size=args.train_size,
+        random_state=args.random_state,
+        shuffle=args.shuffle,
+        stratify=args.stratify
+    )
+    return train_set, test_set
 
 
 class RunSplit(BaseHandler):
     name = "train_test_split"
     description = "Split input data into train/test sets using scikit-learn."
+    admission_limits = AdmissionLimits(max_concurrency=8, max_queue=64, memory_factor=6.0)
 
     def get_tool_description(self) -> Tool:
         return Tool(
@@ -29,17 +51,15 @@ class RunSplit(BaseHandler):
     
     async def handle_train_test_split(self, args: SplitArgs) -> dict:
         """Perform train/test split on the input data."""
-        data_df = json_to_df(args.data)
-        train_set, test_set = train_test_split(
-            data_df,
-            test_size=args.test_size,
-            train_size=args.train_size,
-            random_state=args.random_state,
-            shuffle=args.shuffle,
-            stratify=args.stratify
-        )
-        train_set_json = df_to_json(train_set)
-        test_set_json = df_to_json(test_set)
+        return await asyncio.to_thread(self.split, args)
+
+    def split(self, args: SplitArgs) -> dict:
+        """Blocking part of handle_train_test_split, run in a worker thread."""
+        data_df = decode_frame(args.data, args.compact_dtypes)
+        train_set, test_set = split_frame(data_df, args)
+        with span("encode", rows=len(data_df)):
+            train_set_json = df_to_json(train_set)
+            test_set_json = df_to_json(test_set)
         return {"train_set": train_set_json, "test_set": test_set_json}
 
     async def run_tool(self, arguments: Dict[str, Any]) -> dict:
@@ -0,0 +1,214 @@
+"""NumPy scoring of prediction arrays, without the model that made them.
+
+Metric names, defaults and conventions follow ``TSPipeline.evaluate`` (HyperTS
+``calc_score`` with scikit-learn's uniform averaging over target columns), so
+the scores match the model-based evaluate path.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from hyperts.utils import consts
+
+REGRESSION_METRICS = ['mae', 'mse', 'rmse', 'mape', 'smape']
+CLASSIFICATION_METRICS = ['accuracy', 'f1', 'precision', 'recall']
+DETECTION_METRICS = ['f1', 'precision', 'recall', 'roc_auc_score']
+
+_ALIASES = {
+    'mean_absolute_error': 'mae', 'mean_squared_error': 'mse', 'root_mean_squared_error': 'rmse',
+    'mean_absolute_percentage_error': 'mape', 'r2_score': 'r2', 'auc': 'roc_auc_score',
+    'logloss': 'log_loss',
+}
+
+
+def task_kind(task: str, y_true: np.ndarray) -> str:
+    """'regression', 'binary' or 'multiclass' for a HyperTS task name."""
+    if task in consts.TASK_LIST_FORECAST + consts.TASK_LIST_REGRESSION:
+        return 'regression'
+    if task in consts.TASK_LIST_DETECTION or 'binaryclass' in task:
+        return 'binary'
+    if 'multiclass' in task:
+        return 'multiclass'
+    return 'binary' if len(np.unique(y_true)) <= 2 else 'multiclass'
+
+
+def default_metrics(task: str) -> List[str]:
+    if task in consts.TASK_LIST_FORECAST + consts.TASK_LIST_REGRESSION:
+        return REGRESSION_METRICS
+    if task in consts.TASK_LIST_DETECTION:
+        return DETECTION_METRICS
+    return CLASSIFICATION_METRICS
+
+
+def infer_pos_label(y_true: np.ndarray, pos_label=None):
+    """Positive class as HyperTS picks it: the given one, 1, 'yes', 'true', else the rarest label."""
+    labels, counts = np.unique(y_true, return_counts=True)
+    present = set(labels.tolist())
+    if pos_label is not None and pos_label in present:
+        return pos_label
+    for candidate in (1, 'yes', 'true'):
+        if candidate in present:
+            return candidate
+    rarest = labels[np.argmin(counts)]
+    return rarest.item() if isinstance(rarest, np.generic) else rarest
+
+
+# Regression: y_true is (n, d) and Y stacks k prediction sets as (k, n, d); every
+# metric is averaged over the d target columns and returned per set as (k,).
+
+def _mae(y_true, Y):
+    return np.abs(Y - y_true).mean(axis=1).mean(axis=-1)
+
+
+def _mse(y_true, Y):
+    return ((Y - y_true) ** 2).mean(axis=1).mean(axis=-1)
+
+
+def _rmse(y_true, Y):
+    return np.sqrt(((Y - y_true) ** 2).mean(axis=1)).mean(axis=-1)
+
+
+def _mape(y_true, Y):
+    scale = np.maximum(np.abs(y_true), np.finfo(np.float64).eps)
+    return (np.abs(Y - y_true) / scale).mean(axis=1).mean(axis=-1)
+
+
+def _smape(y_true, Y):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.abs(Y - y_true) / (np.abs(Y) + np.abs(y_true))
+    return 2.0 * np.nanmean(ratio.reshape(len(Y), -1), axis=1)
+
+
+def _r2(y_true, Y):
+    total = ((y_true - y_true.mean(axis=0)) ** 2).sum(axis=0)
+    residual = ((Y - y_true) ** 2).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r2 = np.where(total > 0, 1 - residual / total, np.where(residual == 0, 1.0, 0.0))
+    return r2.mean(axis=-1)
+
+
+REGRESSION = {'mae': _mae, 'mse': _mse, 'rmse': _rmse, 'mape': _mape, 'smape': _smape, 'r2': _r2}
+
+
+def _counts(y_true: np.ndarray, y_pred: np.ndarray, labels: np.ndarray):
+    """True positives, predicted and actual counts per label."""
+    true_hits = y_true[:, None] == labels
+    pred_hits = y_pred[:, None] == labels
+    return (true_hits & pred_hits).sum(axis=0), pred_hits.sum(axis=0), true_hits.sum(axis=0)
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    # scikit-learn's zero_division: an undefined precision/recall scores 0
+    return np.divide(num, den, out=np.zeros(len(num)), where=den > 0)
+
+
+def _auc(positive: np.ndarray, score: np.ndarray) -> float:
+    """ROC AUC as the Mann-Whitney statistic, ties counted half."""
+    _, inverse, counts = np.unique(score, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    n_pos = positive.sum()
+    n_neg = len(positive) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError('roc_auc_score needs both classes in y_true')
+    return float((ranks[positive].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def _ovo_auc(y_true: np.ndarray, proba: np.ndarray, classes: np.ndarray) -> float:
+    """Macro one-vs-one AUC (Hand & Till), as scikit-learn's multi_class='ovo'."""
+    pairs = []
+    for i in range(len(classes)):
+        for j in range(i + 1, len(classes)):
+            mask = (y_true == classes[i]) | (y_true == classes[j])
+            a = _auc(y_true[mask] == classes[i], proba[mask, i])
+            b = _auc(y_true[mask] == classes[j], proba[mask, j])
+            pairs.append((a + b) / 2)
+    return float(np.mean(pairs))
+
+
+def _log_loss(y_true: np.ndarray, proba: np.ndarray, classes: np.ndarray) -> float:
+    if proba.ndim == 1:
+        proba = np.column_stack([1 - proba, proba])
+    proba = np.clip(proba, 1e-15, 1 - 1e-15)
+    proba = proba / proba.sum(axis=1, keepdims=True)
+    rows = np.arange(len(y_true))
+    return float(-np.log(proba[rows, np.searchsorted(classes, y_true)]).mean())
+
+
+def classification_scores(y_true: np.ndarray, y_pred: np.ndarray, y_proba: Optional[np.ndarray],
+                          metrics: Sequence[str], kind: str, pos_label=None) -> Dict[str, float]:
+    """Scores of one set of class predictions."""
+    y_true, y_pred = y_true.reshape(-1), y_pred.reshape(-1)
+    if y_proba is None:
+        y_proba = y_pred
+    if y_proba.ndim == 2 and y_proba.shape[1] == 1:
+        y_proba = y_proba.reshape(-1)
+    classes = np.unique(y_true)
+    if kind == 'binary':
+        labels = np.array([infer_pos_label(y_true, pos_label)], dtype=y_true.dtype)
+    else:
+        labels = np.union1d(y_true, y_pred)
+    tp, predicted, actual = _counts(y_true, y_pred, labels)
+    precision, recall = _ratio(tp, predicted), _ratio(tp, actual)
+    scores = {}
+    for metric in metrics:
+        name = _ALIASES.get(metric.lower(), metric.lower())
+        if name == 'accuracy':
+            scores[metric] = float(np.mean(y_true == y_pred))
+        elif name == 'precision':
+            scores[metric] = float(precision.mean())
+        elif name == 'recall':
+            scores[metric] = float(recall.mean())
+        elif name == 'f1':
+            scores[metric] = float(_ratio(2 * tp, predicted + actual).mean())
+        elif name == 'roc_auc_score':
+            if y_proba.ndim == 2 and kind == 'multiclass':
+                scores[metric] = _ovo_auc(y_true, y_proba, classes)
+            else:
+                # scikit-learn scores the greater label as positive, whatever pos_label is
+                score = y_proba[:, 1] if y_proba.ndim == 2 else y_proba
+                scores[metric] = _auc(y_true == classes[-1], score.astype(np.float64))
+        elif name == 'log_loss':
+            scores[metric] = _log_loss(y_true, y_proba.astype(np.float64), classes)
+        else:
+            raise ValueError(f'unsupported metric for classification: {metric}')
+    return scores
+
+
+def score_sets(y_true: np.ndarray, preds: Dict[str, np.ndarray], task: str,
+               probas: Optional[Dict[str, np.ndarray]] = None, metrics: Optional[Sequence[str]] = None,
+               pos_label=None) -> pd.DataFrame:
+    """
+    Score any number of prediction sets against one ``y_true``.
+
+    Returns a frame shaped like ``TSPipeline.evaluate`` output: a ``Metirc`` column
+    and one score column per prediction set (``Score`` for a single unnamed set).
+    """
+    y_true = np.asarray(y_true)
+    metrics = list(metrics or default_metrics(task))
+    kind = task_kind(task, y_true)
+    names = list(preds)
+    for name in names:
+        if len(preds[name]) != len(y_true):
+            raise ValueError(f"prediction set '{name}' has {len(preds[name])} rows, y_true has {len(y_true)}")
+
+    columns: Dict[str, List[float]] = {}
+    if kind == 'regression':
+        truth = y_true.astype(np.float64).reshape(len(y_true), -1)
+        Y = np.stack([np.asarray(preds[name], dtype=np.float64).reshape(truth.shape) for name in names])
+        per_metric = {}
+        for metric in metrics:
+            func = REGRESSION.get(_ALIASES.get(metric.lower(), metric.lower()))
+            if func is None:
+                raise ValueError(f'unsupported metric for {task}: {metric}')
+            per_metric[metric] = func(truth, Y)
+        for i, name in enumerate(names):
+            columns[name] = [float(per_metric[metric][i]) for metric in metrics]
+    else:
+        probas = probas or {}
+        for name in names:
+            proba = probas.get(name)
+            scores = classification_scores(y_true, np.asarray(preds[name]),
+                                           None if proba is None else np.asarray(proba),
+                                           metrics, kind, pos_label)
+            columns[name] = [scores[metric] for metric in metrics]
+    return pd.DataFrame({'Metirc': metrics, **columns})
@@ -0,0 +1,294 @@
+"""Cache of the data preprocessing step, shared by experiments and predictions on the same data.
+
+The HyperTS data preprocessing step (timestamp sorting, de-duplication and
+gap filling, imputation, covariate cleaning, the eval split) depends only on
+its input frames and a few parameters. Its results are kept under a key made of
+a fingerprint of the inputs plus those parameters:
+
+- ``install`` makes an experiment's step reuse the transformed train/eval frames
+  and fitted state of an earlier experiment on the same data
+- ``reuse`` makes ``transform`` calls of a fitted model's step, i.e. predictions,
+  reuse frames transformed before
+
+Entries live in a byte-bounded LRU in memory and, when a directory is
+configured, in a second bounded LRU of pickles on disk.
+"""
+import contextlib
+import contextvars
+import copy
+import hashlib
+import os
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from hyperts.utils import consts
+
+from .settings import settings
+from .storage_manager import DiskCache
+from ..tracing import span
+from ..utils import frame_nbytes
+from .utils import build_cell_indexes
+
+# Step attributes that define the transform; fitted ones are looked up after fit
+STEP_PARAMS = ('cv', 'freq', 'timestamp_col', 'covariate_cols', 'train_data_periods',
+               'anomaly_label_col', 'contamination', 'target_cols', 'indicator_cols_')
+
+_reuse: contextvars.ContextVar[bool] = contextvars.ContextVar("preprocess_reuse", default=False)
+
+
+def fingerprint(*frames) -> str:
+    """Content hash of frames or series, including nested series cells; None entries count too."""
+    h = hashlib.blake2b(digest_size=16)
+    for frame in frames:
+        if frame is None:
+            h.update(b"\0none")
+            continue
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame()
+        h.update(repr((list(frame.columns), [str(t) for t in frame.dtypes], frame.shape)).encode())
+        for col in frame.columns:
+            values = frame[col]
+            if values.dtype == object and len(values) and isinstance(values.iloc[0], pd.Series):
+                lengths = np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+                h.update(lengths.tobytes())
+                try:
+                    h.update(np.concatenate([np.asarray(v, dtype=np.float64) for v in values]).tobytes())
+                except (TypeError, ValueError):
+                    h.update(pickle.dumps([v.tolist() for v in values]))
+            else:
+                h.update(pd.util.hash_pandas_object(values, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return frame_nbytes(value)
+    if isinstance(value, pd.Series):
+        return frame_nbytes(value.to_frame())
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return 64
+
+
+class PreprocessCache:
+    """Two-tier LRU of preprocessing results."""
+
+    def __init__(self, max_bytes: int = 0, directory: Optional[str] = None,
+                 disk_max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.disk = DiskCache(directory, disk_max_bytes) if directory else None
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self.disk is not None
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.disk is not None and self.disk.touch(key):
+            try:
+                value = joblib.load(self.disk.path(key))
+            except FileNotFoundError:
+                self.disk.discard(key)
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value):
+        self._remember(key, value)
+        if self.disk is not None:
+            path = self.disk.path(key)
+            # Concurrent experiments on the same data put the same key at the same time
+            part = f"{path}.{uuid.uuid4().hex}.part"
+            try:
+                joblib.dump(value, part)
+                os.replace(part, path)
+            finally:
+                if os.path.exists(part):
+                    os.remove(part)
+            self.disk.add(key)
+
+    def _remember(self, key: str, value):
+        size = _nbytes(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            total = sum(self._sizes.values())
+            while total > self.max_bytes:
+                oldest, _ = self._entries.popitem(last=False)
+                total -= self._sizes.pop(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {"entries": len(self._entries), "bytes": sum(self._sizes.values()),
+                      "max_bytes": self.max_bytes, "hits": self.hits, "disk_hits": self.disk_hits,
+                      "misses": self.misses, "evictions": self.evictions}
+        if self.disk is not None:
+            result["disk"] = self.disk.stats()
+        return result
+
+
+def from_settings(s) -> PreprocessCache:
+    disk_max = int(s.preprocess_cache_disk_mb * 1024 * 1024) if s.preprocess_cache_disk_mb else None
+    return PreprocessCache(int(s.preprocess_cache_mb * 1024 * 1024), s.preprocess_cache_dir, disk_max)
+
+
+cache = from_settings(settings)
+
+
+def configure(new_cache: PreprocessCache):
+    global cache
+    cache = new_cache
+
+
+def step_signature(step) -> str:
+    """Parameters (and, once fitted, learned settings) of a preprocessing step."""
+    experiment = getattr(step, 'experiment', None)
+    params = {name: getattr(step, name, None) for name in STEP_PARAMS}
+    params.update(step=type(step).__name__, task=getattr(experiment, 'task', None),
+                  eval_size=getattr(experiment, 'eval_size', None),
+                  random_state=getattr(experiment, 'random_state', None))
+    return repr(sorted(params.items(), key=lambda kv: kv[0]))
+
+
+def _copy(value):
+    return value.copy() if isinstance(value, (pd.DataFrame, pd.Series)) else value
+
+
+def install(experiment) -> Optional[Callable[[], None]]:
+    """
+    Make the experiment's data preprocessing step reuse cached results.
+
+    Returns a function removing the hook again, to be called once the experiment
+    has run: the step ends up in the fitted model, which must stay picklable.
+    """
+    if not cache.enabled:
+        return None
+    step = next((s for s in experiment.steps if s.name == consts.StepName_DATA_PREPROCESSING), None)
+    if step is None:
+        return None
+    fit_transform = step.fit_transform
+
+    def cached_fit_transform(hyper_model, X_train, y_train, X_test=None, X_eval=None, y_eval=None, **kwargs):
+        key = "fit-" + fingerprint(X_train, y_train, X_eval, y_eval) + hashlib.blake2b(
+            step_signature(step).encode(), digest_size=8).hexdigest()
+        with span("preprocess", rows=len(X_train)) as current:
+            entry = cache.get(key)
+            if current is not None:
+                current.set_attribute("cache_hit", entry is not None)
+            if entry is None:
+                before = dict(vars(step))
+                _, X_train, y_train, X_test, X_eval, y_eval = fit_transform(
+                    hyper_model, X_train, y_train, X_test=X_test, X_eval=X_eval, y_eval=y_eval, **kwargs)
+                fitted = {k: v for k, v in vars(step).items()
+                          if k != 'fit_transform' and (k not in before or before[k] is not v)}
+                # The search may modify its frames in place, so the cache keeps its own copies;
+                # their cells are shared by every experiment hitting the entry
+                build_cell_indexes(X_train, X_eval)
+                cache.put(key, {'fitted': fitted,
+                                'frames': tuple(_copy(v) for v in (X_train, y_train, X_eval, y_eval))})
+            else:
+                vars(step).update(copy.deepcopy(entry['fitted']))
+                X_train, y_train, X_eval, y_eval = (_copy(v) for v in entry['frames'])
+        return hyper_model, X_train, y_train, X_test, X_eval, y_eval
+
+    step.fit_transform = cached_fit_transform
+
+    def uninstall():
+        vars(step).pop('fit_transform', None)
+
+    return uninstall
+
+
+class _CachedTransform:
+    """``transform`` of a fitted preprocessing step, answered from the cache inside ``reuse``."""
+
+    def __init__(self, step):
+        self.step = step
+        self.signature: Optional[str] = None
+
+    def __call__(self, X, y=None, **kwargs):
+        transform = type(self.step).transform.__get__(self.step)
+        if not _reuse.get() or y is not None or not cache.enabled:
+            return transform(X, y, **kwargs)
+        if self.signature is None:
+            cleaner = getattr(self.step, 'covariate_cleaner', None)
+            self.signature = hashlib.blake2b(
+                (step_signature(self.step) + (pickle.dumps(cleaner).hex() if cleaner is not None else ""))
+                .encode(), digest_size=8).hexdigest()
+        key = "transform-" + fingerprint(X) + self.signature
+        result = cache.get(key)
+        if result is None:
+            result = transform(X, y, **kwargs)
+            cache.put(key, result)
+        return _copy(result)
+
+    def __reduce__(self):
+        # Pickled models get the plain method back
+        return _plain_transform, (self.step,)
+
+
+def _plain_transform(step):
+    return type(step).transform.__get__(step)
+
+
+def attach(model):
+    """Route the model's preprocessing ``transform`` through the cache (only active inside ``reuse``)."""
+    pipeline = getattr(model, 'sk_pipeline', None)
+    step = pipeline.steps[0][1] if pipeline is not None and pipeline.steps else None
+    if step is None or not hasattr(type(step), 'transform'):
+        return
+    if not isinstance(vars(step).get('transform'), _CachedTransform):
+        step.transform = _CachedTransform(step)
+
+
+@contextlib.contextmanager
+def reuse(model) -> Iterator[None]:
+    """
+    Let the model's preprocessing reuse frames transformed before, for the duration of the block.
+
+    Only forecast and detection models take part: their preprocessing sorts,
+    gap-fills and imputes the series, while classification and regression only
+    copy the frame, which costs less than fingerprinting it.
+    """
+    if getattr(model, 'task', None) not in consts.TASK_LIST_FORECAST + consts.TASK_LIST_DETECTION:
+        yield
+        return
+    attach(model)
+    token = _reuse.set(True)
+    try:
+        yield
+    finally:
+        _reuse.reset(token)
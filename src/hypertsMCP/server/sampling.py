@@ -0,0 +1,201 @@
+"""Training-set subsampling for the model search stage of a HyperTS experiment."""
+import time
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+from hyperts.utils import consts
+
+
+class SamplingArgs(BaseModel):
+    """How to subsample the (preprocessed) training set the search runs on.
+
+    ``auto`` picks ``stratified`` for classification, ``recent`` for forecast and
+    detection and ``random`` otherwise. ``series`` samples target columns of a
+    multivariate forecast and can be combined with a row limit, which then keeps
+    the most recent rows.
+    """
+    strategy: Literal['auto', 'random', 'stratified', 'recent', 'series'] = 'auto'
+    fraction: Optional[float] = Field(default=None, gt=0, le=1, description="share of rows to keep")
+    max_rows: Optional[int] = Field(default=None, ge=1)
+    max_series: Optional[int] = Field(default=None, ge=1, description="series kept by the series strategy")
+    series_fraction: Optional[float] = Field(default=None, gt=0, le=1)
+    time_budget: Optional[float] = Field(
+        default=None, gt=0,
+        description="seconds for the whole search; the row count is derived from a one-trial pilot"
+    )
+    pilot_rows: int = Field(default=256, ge=2)
+    min_rows: int = Field(default=50, ge=1)
+    random_state: Optional[int] = None
+
+
+def resolve_strategy(strategy: str, task: str) -> str:
+    if strategy != 'auto':
+        return strategy
+    if task in consts.TASK_LIST_CLASSIFICATION:
+        return 'stratified'
+    if task in consts.TASK_LIST_FORECAST + consts.TASK_LIST_DETECTION:
+        return 'recent'
+    return 'random'
+
+
+def target_rows(n_rows: int, args: SamplingArgs) -> int:
+    """Row count from fraction/max_rows, never below min_rows."""
+    n = n_rows
+    if args.fraction is not None:
+        n = min(n, int(round(n_rows * args.fraction)))
+    if args.max_rows is not None:
+        n = min(n, args.max_rows)
+    return min(n_rows, max(n, args.min_rows))
+
+
+def sample_rows(n_rows: int, n: int, strategy: str, rng: np.random.Generator,
+                labels: Optional[pd.Series] = None) -> np.ndarray:
+    """Positions of the rows to keep, in their original order."""
+    if n >= n_rows:
+        return np.arange(n_rows)
+    if strategy in ('recent', 'series'):
+        return np.arange(n_rows - n, n_rows)
+    if strategy == 'stratified':
+        if labels is None:
+            raise ValueError("stratified sampling needs a label column")
+        _, codes = np.unique(np.asarray(labels).reshape(n_rows, -1)[:, 0], return_inverse=True)
+        counts = np.bincount(codes)
+        if len(counts) > n:
+            raise ValueError(f"stratified sampling of {n} rows cannot keep all {len(counts)} classes; "
+                             "raise fraction, max_rows or min_rows")
+        # Proportional allocation, at least one row per class
+        quota = np.maximum(1, np.floor(counts * n / n_rows)).astype(int)
+        remainder = n - quota.sum()
+        if remainder > 0:
+            frac = counts * n / n_rows - np.floor(counts * n / n_rows)
+            quota[np.argsort(-frac)[:remainder]] += 1
+        # Rows given to rare classes by the minimum of one come out of the largest quotas
+        for _ in range(-remainder):
+            quota[np.argmax(quota)] -= 1
+        picked = [rng.choice(np.flatnonzero(codes == c), size=min(q, counts[c]), replace=False)
+                  for c, q in enumerate(quota)]
+        return np.sort(np.concatenate(picked))
+    return np.sort(rng.choice(n_rows, size=n, replace=False))
+
+
+def sample_series(columns: List[str], args: SamplingArgs, rng: np.random.Generator) -> List[str]:
+    k = len(columns)
+    if args.series_fraction is not None:
+        k = min(k, max(1, int(round(len(columns) * args.series_fraction))))
+    if args.max_series is not None:
+        k = min(k, args.max_series)
+    if k >= len(columns):
+        return list(columns)
+    keep = set(rng.choice(len(columns), size=k, replace=False))
+    return [c for i, c in enumerate(columns) if i in keep]
+
+
+def _take(frame, rows: np.ndarray):
+    if frame is None:
+        return None
+    return frame.iloc[rows].reset_index(drop=True)
+
+
+def install_sampling(experiment, args: SamplingArgs, task: str) -> Dict[str, Any]:
+    """
+    Make the experiment's search step run on a subsample of the training set.
+
+    The preprocessing step still sees all rows and the ensemble / final training
+    steps receive the full training set, so with ``final_retrain_on_wholedata``
+    the selected models are refit on everything. Returns the report dict that is
+    filled in while the experiment runs.
+    """
+    strategy = resolve_strategy(args.strategy, task)
+    if strategy == 'stratified' and task not in consts.TASK_LIST_CLASSIFICATION + consts.TASK_LIST_DETECTION:
+        raise ValueError("stratified sampling needs a classification or detection task")
+    if strategy in ('recent', 'series') and task not in consts.TASK_LIST_FORECAST + consts.TASK_LIST_DETECTION:
+        raise ValueError(f"{strategy} sampling needs a forecast or detection task")
+    if strategy == 'series' and task in consts.TASK_LIST_DETECTION:
+        raise ValueError("series sampling needs a forecast task")
+
+    rng = np.random.default_rng(args.random_state)
+    report: Dict[str, Any] = {'strategy': strategy}
+    steps = {step.name: step for step in experiment.steps}
+    search_step = steps[consts.StepName_SPACE_SEARCHING]
+    search = search_step.search
+
+    def sampled_search(X_train, y_train, X_test=None, X_eval=None, y_eval=None, **kwargs):
+        n_rows = len(X_train)
+        n = target_rows(n_rows, args)
+        if args.time_budget is not None:
+            n = budgeted_rows(X_train, y_train, X_test, X_eval, y_eval, kwargs, n_rows)
+        rows = sample_rows(n_rows, n, strategy, rng, y_train)
+        X_sub, y_sub = _take(X_train, rows), _take(y_train, rows)
+        if strategy == 'series':
+            series = sample_series(list(y_train.columns), args, rng)
+            y_sub = y_sub[series]
+            y_eval = y_eval[series] if y_eval is not None else None
+            report['series'] = {'total': y_train.shape[1], 'used': series}
+        report['rows'] = {'total': int(n_rows), 'used': int(len(rows))}
+        start = time.perf_counter()
+        model = search(X_sub, y_sub, X_test=X_test, X_eval=X_eval, y_eval=y_eval, **kwargs)
+        report['search_seconds'] = round(time.perf_counter() - start, 3)
+        return model
+
+    def budgeted_rows(X_train, y_train, X_test, X_eval, y_eval, kwargs, n_rows):
+        """Time one trial on pilot_rows and scale linearly to the search budget."""
+        pilot = sample_rows(n_rows, min(args.pilot_rows, n_rows), strategy, rng, y_train)
+        y_pilot = _take(y_train, pilot)
+        y_eval_pilot = y_eval
+        if strategy == 'series':
+            # one series is enough to time a trial; the search itself uses the sampled ones
+            y_pilot = y_pilot[y_pilot.columns[:1]]
+            y_eval_pilot = y_eval[y_eval.columns[:1]] if y_eval is not None else None
+        start = time.perf_counter()
+        search(_take(X_train, pilot), y_pilot, X_test=X_test, X_eval=X_eval, y_eval=y_eval_pilot,
+               **{**kwargs, 'max_trials': 1})
+        trial_seconds = time.perf_counter() - start
+        max_trials = kwargs.get('max_trials') or experiment.run_kwargs.get('max_trials') or 1
+        per_row = trial_seconds / len(pilot)
+        n = int(args.time_budget / (max_trials * per_row)) if per_row > 0 else n_rows
+        n = min(n_rows, max(n, args.min_rows))
+        report['budget'] = {'seconds': args.time_budget, 'pilot_rows': int(len(pilot)),
+                            'pilot_trial_seconds': round(trial_seconds, 3),
+                            'max_trials': int(max_trials), 'rows': int(n)}
+        return n
+
+    search_step.search = sampled_search
+
+    if strategy == 'series':
+        ensemble_step = steps.get(consts.StepName_FINAL_ENSEMBLE)
+        final_step = ensemble_step or steps[consts.StepName_FINAL_TRAINING]
+        if not final_step.retrain_on_wholedata:
+            raise ValueError("series sampling needs final_retrain_on_wholedata=True")
+        if ensemble_step is not None:
+            ensemble_step.build_estimator = _series_ensemble(ensemble_step, report)
+
+    report['final_retrain_on_wholedata'] = any(
+        getattr(step, 'retrain_on_wholedata', False) for step in experiment.steps)
+    return report
+
+
+def _series_ensemble(step, report: Dict[str, Any]):
+    """Fit ensemble weights on the searched series, then retrain members on all series."""
+    build_estimator = step.build_estimator
+
+    def build(hyper_model, X_train, y_train, X_eval=None, y_eval=None, **kwargs):
+        series = report['series']['used']
+        step.retrain_on_wholedata = False
+        try:
+            ensemble = build_estimator(hyper_model, X_train, y_train[series], X_eval=X_eval,
+                                       y_eval=y_eval[series] if y_eval is not None else None, **kwargs)
+        finally:
+            step.retrain_on_wholedata = True
+        # Per-estimator weights averaged over the searched series, applied to every series
+        weights = np.asarray(ensemble.weights_, dtype=float).reshape(len(ensemble.estimators), -1)
+        weights = weights.mean(axis=1)
+        trials = step.select_trials(hyper_model)
+        ensemble.estimators = list(step.est_retrain(trials, hyper_model, X_train, y_train,
+                                                    X_eval, y_eval, weights.tolist(), **kwargs))
+        ensemble.target_dims = y_train.shape[1]
+        ensemble.weights_ = np.repeat(weights[:, None], ensemble.target_dims, axis=1)
+        return ensemble
+
+    return build
@@ -0,0 +1,126 @@
+"""Choosing the final model of a HyperTS experiment under inference latency and size budgets."""
+import pickle
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from hyperts.utils import consts
+
+
+def per_row_ms(predict, X, repeats: int = 3) -> float:
+    """Best-of-``repeats`` wall time of ``predict(X)`` per row, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / max(len(X), 1)
+
+
+def size_mb(obj) -> float:
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)) / (1024 * 1024)
+
+
+def _reward(trial) -> float:
+    reward = trial.reward
+    return float(reward[0] if isinstance(reward, (list, tuple)) else reward)
+
+
+def benchmark_trials(hyper_model, X: pd.DataFrame, repeats: int = 3) -> List[Dict[str, Any]]:
+    """Latency and size of every succeeded trial's estimator, best reward first."""
+    trials = [t for t in hyper_model.get_top_trials(len(hyper_model.history.trials))
+              if getattr(t, 'model_file', None)]
+    candidates = []
+    for trial in trials:
+        estimator = hyper_model.load_estimator(trial.model_file)
+        candidates.append({
+            'trial': trial,
+            'trial_no': trial.trial_no,
+            'reward': _reward(trial),
+            'latency_ms': per_row_ms(estimator.predict, X, repeats),
+            'size_mb': size_mb(estimator),
+        })
+    return candidates
+
+
+def choose(candidates: List[Dict[str, Any]], max_members: int,
+           max_latency_ms: Optional[float], max_size_mb: Optional[float]) -> List[Dict[str, Any]]:
+    """
+    Best-reward candidates whose summed latency and size fit the budgets.
+
+    An ensemble scores every member, so members are added in reward order while
+    the totals stay within budget. When not even one candidate fits, the fastest
+    one is returned on its own.
+    """
+    chosen, latency, size = [], 0.0, 0.0
+    for candidate in candidates:
+        if len(chosen) >= max_members:
+            break
+        if max_latency_ms is not None and latency + candidate['latency_ms'] > max_latency_ms:
+            continue
+        if max_size_mb is not None and size + candidate['size_mb'] > max_size_mb:
+            continue
+        chosen.append(candidate)
+        latency += candidate['latency_ms']
+        size += candidate['size_mb']
+    return chosen or [min(candidates, key=lambda c: c['latency_ms'])]
+
+
+def install_budget(experiment, max_latency_ms: Optional[float], max_size_mb: Optional[float],
+                   benchmark_rows: int = 256) -> Dict[str, Any]:
+    """
+    Make the experiment's final step build from the trials that fit the budgets.
+
+    The trial estimators from the search are benchmarked on (up to)
+    ``benchmark_rows`` preprocessed evaluation rows before the ensemble or the
+    final model is built. Returns the report dict filled in while the experiment runs.
+    """
+    report: Dict[str, Any] = {'max_inference_latency_ms': max_latency_ms,
+                              'max_model_size_mb': max_size_mb}
+    steps = {step.name: step for step in experiment.steps}
+    ensemble_step = steps.get(consts.StepName_FINAL_ENSEMBLE)
+    step = ensemble_step or steps[consts.StepName_FINAL_TRAINING]
+    build_estimator = step.build_estimator
+
+    def budgeted_build(hyper_model, X_train, y_train, **kwargs):
+        X_eval = kwargs.get('X_eval')
+        if X_eval is not None:
+            X = X_eval.iloc[:benchmark_rows]
+        else:
+            # Cross-validated searches have no eval split left: latencies then come from training rows
+            X = X_train.iloc[-benchmark_rows:]
+        report['candidates_measured_on'] = 'eval_split' if X_eval is not None else 'train_data'
+        candidates = benchmark_trials(hyper_model, X)
+        max_members = ensemble_step.ensemble_size if ensemble_step is not None else 1
+        chosen = choose(candidates, max_members, max_latency_ms, max_size_mb)
+        chosen_trials = [c['trial'] for c in chosen]
+        report['candidates'] = [
+            {'trial_no': c['trial_no'], 'reward': c['reward'],
+             'latency_ms': round(c['latency_ms'], 4), 'size_mb': round(c['size_mb'], 4),
+             'selected': any(c is s for s in chosen)}
+            for c in candidates
+        ]
+        if ensemble_step is not None:
+            step.select_trials = lambda hm: chosen_trials
+        else:
+            hyper_model.get_best_trial = lambda: chosen_trials[0]
+        return build_estimator(hyper_model, X_train, y_train, **kwargs)
+
+    step.build_estimator = budgeted_build
+    return report
+
+
+def measure_model(model, frame: pd.DataFrame, report: Dict[str, Any], rows: int = 256,
+                  source: str = 'eval_data'):
+    """
+    Add the end-to-end per-row latency and pickled size of the final model to the report.
+
+    ``source`` names the request frame measured on and is reported as ``measured_on``.
+    """
+    report['measured_on'] = source
+    X, _ = model.split_X_y(frame.iloc[-rows:].copy())
+    report['latency_ms'] = round(per_row_ms(lambda x: model.predict(x.copy()), X), 4)
+    report['size_mb'] = round(size_mb(model), 4)
+    max_latency, max_size = report['max_inference_latency_ms'], report['max_model_size_mb']
+    report['within_budget'] = ((max_latency is None or report['latency_ms'] <= max_latency)
+                               and (max_size is None or report['size_mb'] <= max_size))
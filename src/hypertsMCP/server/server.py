@@ -1,4 +1,6 @@
 """Main server with MCP and HTTP endpoints."""
+import asyncio
+import contextlib
 import json
 import starlette
 from starlette.responses import Response
@@ -7,13 +9,25 @@ import uvicorn
 from typing import Sequence, Dict, Any
 from mcp.server.sse import SseServerTransport
 from mcp.server.lowlevel import Server
-from mcp.types import Tool, TextContent
+from mcp.types import Tool, TextContent, CallToolResult
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.applications import Starlette
+from starlette.requests import ClientDisconnect
 from starlette.routing import Route, Mount
 
+from .. import tracing
+from .admission import AdmissionRejected, MB
+from .compression import ContentEncodingMiddleware
 from .handles.base import ToolRegistry
+from .settings import settings
+from .storage_manager import ModelStore
+from . import preprocess_cache
+from .streaming import sessions
+from .warmup import readiness, warm_up_from_settings
+
+tracing.configure(settings.trace_exporter, settings.trace_service_name)
 
 # Initialize MCP server, SSE transport, and FastAPI
 mcp_app = Server("operateMysql")
@@ -30,8 +44,13 @@ async def list_tools() -> list[Tool]:
 @mcp_app.call_tool()
 async def call_tool(name: str, args: Dict[str, Any]) -> Sequence[TextContent]:
     """Call a tool by name with arguments."""
-    tool = ToolRegistry.get_tool(name)
-    result = await tool.run_tool(args)
+    meta = mcp_app.request_context.meta
+    traceparent = getattr(meta, tracing.TRACEPARENT, None) if meta is not None else None
+    try:
+        with tracing.span(f"mcp {name}", parent=traceparent, kind=tracing.SPAN_KIND_SERVER, tool=name):
+            result = await ToolRegistry.call(name, args)
+    except AdmissionRejected as e:
+        return CallToolResult(isError=True, content=[TextContent(type="text", text=json.dumps(e.to_dict()))])
     # Convert dict result to TextContent for MCP protocol
     if isinstance(result, dict):
         return [TextContent(type="text", text=json.dumps(result))]
@@ -42,16 +61,77 @@ async def call_tool(name: str, args: Dict[str, Any]) -> Sequence[TextContent]:
 @fastapi_app.post("/")
 async def root():
     """List available HTTP endpoints."""
-    return {"available http endpoints": ["train_test_split", "train_model", "predict", "evaluate"]}
+    return {"available http endpoints": ["train_test_split", "train_model", "predict", "evaluate",
+                                         "run_pipeline", "forecast_backtest", "stream_open",
+                                         "stream_append", "stream_close", "stream/{session_id}"]}
+
+
+@fastapi_app.get("/stats")
+async def stats():
+    """Report admission-control state per tool, open stream sessions, the model and preprocessing caches."""
+    return {"admission": ToolRegistry.admission.stats(), "streams": sessions.stats(),
+            "models": ModelStore.stats(), "preprocessing": preprocess_cache.cache.stats()}
+
+
+@fastapi_app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the startup warm-up has finished."""
+    return JSONResponse(readiness.to_dict(), status_code=200 if readiness.ready else 503)
+
+
+def rejection_response(e: AdmissionRejected) -> JSONResponse:
+    headers = {"Retry-After": str(int(e.retry_after))} if e.retry_after is not None else None
+    return JSONResponse(e.to_dict(), status_code=e.status_code, headers=headers)
+
+
+async def read_body(request: Request, admission) -> bytes:
+    """
+    Read a body of unknown size: compressed (the middleware drops Content-Length)
+    or chunked. The payload limit is checked and memory reserved from the decoded
+    size as chunks arrive, before the body is buffered any further.
+    """
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        await admission.grow(size)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def invalid_body_response(message: str) -> JSONResponse:
+    return JSONResponse({"error": message, "status_code": 422}, status_code=422)
 
 
 def register_fastapi_tool_route(app: FastAPI, tool_name: str):
     """Register a tool as a FastAPI route using the tool name as endpoint."""
     tool = ToolRegistry.get_tool(tool_name)
+    gate = ToolRegistry.admission.gate(tool)
 
     @app.post(f"/{tool_name}")
-    async def tool_route(args: Dict[str, Any]):
-        return await tool.run_tool(args)
+    async def tool_route(request: Request):
+        content_length = request.headers.get("content-length")
+        payload_bytes = int(content_length) if content_length and content_length.isdigit() else None
+        try:
+            with tracing.span(f"POST /{tool_name}", parent=request.headers.get(tracing.TRACEPARENT),
+                              kind=tracing.SPAN_KIND_SERVER, tool=tool_name, payload_bytes=payload_bytes):
+                # admit checks the header's size before the body is read or decoded
+                async with gate.admit(payload_bytes) as admission:
+                    with tracing.span("read_body"):
+                        if payload_bytes is None:
+                            body = await read_body(request, admission)
+                        else:
+                            body = await request.body()
+                    with tracing.span("parse"):
+                        try:
+                            args: Dict[str, Any] = json.loads(body)
+                        except ValueError as e:
+                            return invalid_body_response(f"request body is not valid JSON: {e}")
+                    if not isinstance(args, dict):
+                        return invalid_body_response("request body must be a JSON object of tool arguments")
+                    return await tool.run_tool(args)
+        except AdmissionRejected as e:
+            return rejection_response(e)
 
 
 # Register tools for HTTP calls
@@ -59,6 +139,60 @@ register_fastapi_tool_route(fastapi_app, "train_test_split")
 register_fastapi_tool_route(fastapi_app, "train_model")
 register_fastapi_tool_route(fastapi_app, "predict")
 register_fastapi_tool_route(fastapi_app, "evaluate")
+register_fastapi_tool_route(fastapi_app, "run_pipeline")
+register_fastapi_tool_route(fastapi_app, "forecast_backtest")
+register_fastapi_tool_route(fastapi_app, "stream_open")
+register_fastapi_tool_route(fastapi_app, "stream_append")
+register_fastapi_tool_route(fastapi_app, "stream_close")
+
+
+class DuplexNDJSONResponse(StreamingResponse):
+    """Streaming response whose body generator reads the request body itself.
+
+    StreamingResponse normally listens for a client disconnect on ``receive`` while
+    streaming, which would swallow request chunks the generator has not read yet;
+    here a disconnect surfaces as ClientDisconnect from ``request.stream()``.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@fastapi_app.post("/stream/{session_id}")
+async def stream_route(session_id: str, request: Request):
+    """Score NDJSON points as they arrive, answering with one NDJSON result line per point.
+
+    Lines that arrive in the same body chunk are scored together. Errors end
+    the response with an ``{"error": ...}`` line.
+    """
+    try:
+        stream = sessions.get(session_id)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    gate = ToolRegistry.admission.gate(ToolRegistry.get_tool("stream_append"))
+
+    async def results():
+        pending = b""
+        try:
+            async for chunk in request.stream():
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                if not chunk and pending.strip():
+                    lines, pending = lines + [pending], b""
+                points = [json.loads(line) for line in lines if line.strip()]
+                if not points:
+                    continue
+                async with gate.admit(sum(len(line) for line in lines)):
+                    scored = await asyncio.to_thread(stream.append, points)
+                yield "".join(json.dumps(result) + "\n" for result in scored)
+        except ClientDisconnect:
+            return
+        except (AdmissionRejected, ValueError) as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return DuplexNDJSONResponse(results())
+
 
 def run_server():
     async def handle_sse(request):
@@ -72,15 +206,30 @@ def run_server():
             Mount("/", app=mcp_app)
         ]
     )
+    http_app = ContentEncodingMiddleware(
+        fastapi_app,
+        minimum_size=settings.compression_min_size,
+        levels={"gzip": settings.gzip_level, "zstd": settings.zstd_level},
+        max_decoded_bytes=int(settings.max_payload_mb * MB) if settings.max_payload_mb else None,
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Connections are accepted while models warm up; /http/ready tells when to route traffic
+        warmup = asyncio.create_task(warm_up_from_settings())
+        yield
+        warmup.cancel()
+
     starlette_app = Starlette(
         routes=[
-            Mount("/http", app=fastapi_app),
+            Mount("/http", app=http_app),
             Mount("/mcp", app=mcp_subapp)
-        ]
+        ],
+        lifespan=lifespan
     )
 
 
-    uvicorn.run(starlette_app, host="0.0.0.0", port=9000)
+    uvicorn.run(starlette_app, host=settings.host, port=settings.port)
 
 if __name__ == "__main__":
     run_server()
@@ -0,0 +1,92 @@
+"""Server settings read from HYPERTS_MCP_* environment variables."""
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional
+from pydantic import BaseModel
+
+ENV_PREFIX = "HYPERTS_MCP_"
+
+
+class Settings(BaseModel):
+    """Server-wide configuration.
+
+    Every field can be set through ``HYPERTS_MCP_<FIELD_NAME>``; values starting
+    with ``{`` or ``[`` are parsed as JSON and an empty string means ``None``.
+    """
+    host: str = "0.0.0.0"
+    port: int = 9000
+
+    # Admission control
+    max_payload_mb: Optional[float] = 512
+    memory_budget_mb: Optional[float] = None
+    admission: Dict[str, Dict[str, Any]] = {}  # per-tool overrides of AdmissionLimits fields
+
+    # HTTP body compression
+    compression_min_size: int = 1024
+    gzip_level: int = 6
+    zstd_level: int = 3
+
+    # Decode request frames with float32 / narrow int / categorical columns unless a
+    # request sets compact_dtypes itself
+    compact_dtypes: bool = False
+
+    # Server-side data sources (*_source arguments): directories whose Parquet/Feather
+    # files requests may read (empty disables them), and the rows per batch
+    data_roots: List[str] = []
+    source_batch_rows: int = 65536
+
+    # Model storage: model_dir alone, or a bounded cache of model_store
+    # (s3://bucket/prefix or file:///shared/path)
+    model_dir: str = "./src/hypertsMCP/server/models"
+    model_store: Optional[str] = None
+    model_cache_mb: Optional[float] = 4096  # local cache size when model_store is set
+    s3_endpoint: str = "s3.amazonaws.com"
+    s3_access_key: Optional[str] = None
+    s3_secret_key: Optional[str] = None
+    s3_secure: bool = True
+    s3_region: Optional[str] = None
+    max_loaded_models: int = 16  # models kept unpickled in memory (0 disables)
+
+    # Data preprocessing results shared by experiments and predictions on the same data:
+    # an in-memory LRU (0 disables it) and optionally a disk tier
+    preprocess_cache_mb: float = 256
+    preprocess_cache_dir: Optional[str] = None
+    preprocess_cache_disk_mb: Optional[float] = 2048
+
+    # Startup warm-up: models to load and run once before /ready reports ready,
+    # given as IDs and/or the newest N of the model directory
+    warmup_models: List[str] = []
+    warmup_recent: int = 0
+    warmup_timeout: float = 120.0
+    warmup_concurrency: int = 4
+    # Store a few training rows in every trained model so warm-up can predict on them
+    # (forecast and detection models fall back to their stored history); off by default because saved models then carry raw training data
+    warmup_store_sample: bool = False
+
+    # Span export: file:///path/spans.jsonl or an OTLP/HTTP collector URL (off when unset)
+    trace_exporter: Optional[str] = None
+    trace_service_name: str = "hypertsMCP-server"
+
+    # Streaming detection sessions
+    stream_idle_timeout: float = 300.0  # seconds without appends before a session is evicted
+    stream_max_sessions: int = 256
+    stream_buffer_size: int = 1024  # points kept per session
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        environ = os.environ if environ is None else environ
+        values = {}
+        for name in cls.model_fields:
+            raw = environ.get(ENV_PREFIX + name.upper())
+            if raw is None:
+                continue
+            if raw == "":
+                values[name] = None
+            elif raw[:1] in "[{":
+                values[name] = json.loads(raw)
+            else:
+                values[name] = raw
+        return cls(**values)
+
+
+settings = Settings.from_env()
@@ -1,27 +1,308 @@
-"""Model storage management using local file system."""
+"""Model storage: loaded models in memory, a local directory, optionally a bounded cache in front of an object store."""
 import os
+import shutil
+import threading
 import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
 import joblib
+from .settings import settings
+from ..tracing import span
+
+try:
+    from minio import Minio
+    from minio.error import S3Error
+except ImportError:  # only needed for s3:// model stores
+    Minio = None
+
+
+class LocalObjectStore:
+    """Object store tier on a directory, e.g. a mount shared by all replicas."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def upload(self, key: str, path: str):
+        target = os.path.join(self.root, key)
+        part = f"{target}.{uuid.uuid4().hex}.part"
+        shutil.copyfile(path, part)
+        os.replace(part, target)
+
+    def download(self, key: str, path: str):
+        source = os.path.join(self.root, key)
+        if not os.path.exists(source):
+            raise FileNotFoundError(key)
+        shutil.copyfile(source, path)
+
+
+class S3ObjectStore:
+    """Object store tier on an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint: str = "s3.amazonaws.com",
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 secure: bool = True, region: Optional[str] = None):
+        if Minio is None:
+            raise ImportError("s3:// model stores need the minio package")
+        self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key,
+                            secure=secure, region=region)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        try:
+            if not self.client.bucket_exists(bucket):
+                self.client.make_bucket(bucket)
+        except S3Error as e:
+            raise ConnectionError(f"Failed to access or create bucket '{bucket}': {e}")
+
+    def upload(self, key: str, path: str):
+        self.client.fput_object(self.bucket, self.prefix + key, path)
+
+    def download(self, key: str, path: str):
+        try:
+            self.client.fget_object(self.bucket, self.prefix + key, path)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                raise FileNotFoundError(key) from e
+            raise
+
+
+def open_object_store(url: str, s=settings):
+    """Object store for ``s3://bucket/prefix`` or ``file:///path`` URLs."""
+    parsed = urlparse(url)
+    if parsed.scheme == "s3":
+        return S3ObjectStore(parsed.netloc, parsed.path, endpoint=s.s3_endpoint,
+                             access_key=s.s3_access_key, secret_key=s.s3_secret_key,
+                             secure=s.s3_secure, region=s.s3_region)
+    if parsed.scheme == "file":
+        return LocalObjectStore(parsed.path)
+    raise ValueError(f"unsupported model store: {url}")
+
+
+class DiskCache:
+    """Size-bounded LRU over the model files of a directory."""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        files = [entry for entry in os.scandir(directory) if entry.name.endswith(".pkl")]
+        for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+            self._entries[entry.name[:-4]] = entry.stat().st_size
+
+    def path(self, model_id: str) -> str:
+        return os.path.join(self.directory, f"{model_id}.pkl")
+
+    def touch(self, model_id: str) -> bool:
+        """Mark a cached model as used; False when it is not cached."""
+        with self._lock:
+            if model_id not in self._entries:
+                return False
+            self._entries.move_to_end(model_id)
+            self.hits += 1
+            return True
+
+    def add(self, model_id: str):
+        """Account for a file just written and evict the least recently used ones."""
+        size = os.path.getsize(self.path(model_id))
+        with self._lock:
+            self._entries[model_id] = size
+            self._entries.move_to_end(model_id)
+            if self.max_bytes is None:
+                return
+            total = sum(self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                oldest, oldest_size = self._entries.popitem(last=False)
+                try:
+                    os.remove(self.path(oldest))
+                except FileNotFoundError:
+                    pass
+                total -= oldest_size
+                self.evictions += 1
+
+    def discard(self, model_id: str):
+        with self._lock:
+            self._entries.pop(model_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"models": len(self._entries), "bytes": sum(self._entries.values()),
+                    "max_bytes": self.max_bytes, "hits": self.hits, "fetches": self.fetches,
+                    "evictions": self.evictions}
 
 
 class ModelStore:
-    """Store and retrieve trained models using local file system."""
+    """Store and retrieve trained models.
+
+    Models are pickled into ``base_dir``. With a ``remote`` object store, saves are
+    written through to it and ``base_dir`` becomes an LRU cache bounded by
+    ``cache_max_bytes``; a model missing locally is fetched once, however many
+    requests ask for it at the same time.
+
+    ``get`` additionally keeps the ``max_loaded`` most recently used models
+    unpickled in memory, so hot models skip ``joblib.load`` entirely; a model is
+    unpickled once however many requests ask for it at the same time.
+    """
     base_dir = "./src/hypertsMCP/server/models"
+    remote = None
+    cache_max_bytes: Optional[int] = None
+    max_loaded = 16
+    memory_hits = 0
+    _cache: Optional[DiskCache] = None
+    _loaded: "OrderedDict[str, Any]" = OrderedDict()
+    _loaded_lock = threading.Lock()
+    _loading: Dict[str, threading.Lock] = {}
+    _fetching: Dict[str, threading.Lock] = {}
+    _fetching_lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, base_dir: Optional[str] = None, remote=None,
+                  cache_max_bytes: Optional[int] = None):
+        if base_dir is not None:
+            cls.base_dir = base_dir
+        cls.remote = remote
+        cls.cache_max_bytes = cache_max_bytes
+        cls._cache = None
+        with cls._loaded_lock:
+            cls._loaded.clear()
+
+    @classmethod
+    def from_settings(cls, s):
+        remote = open_object_store(s.model_store, s) if s.model_store else None
+        max_bytes = int(s.model_cache_mb * 1024 * 1024) if s.model_cache_mb is not None else None
+        cls.configure(s.model_dir, remote, max_bytes)
+        cls.max_loaded = s.max_loaded_models
+
+    @classmethod
+    def cache(cls) -> DiskCache:
+        cache = cls._cache
+        if cache is None or cache.directory != cls.base_dir:
+            # Without a remote tier the directory is the only copy and is never evicted
+            cache = cls._cache = DiskCache(
+                cls.base_dir, cls.cache_max_bytes if cls.remote is not None else None)
+        return cache
 
     @classmethod
     def save(cls, model) -> str:
-        """Save a model to disk and return its unique ID."""
-        os.makedirs(cls.base_dir, exist_ok=True)
+        """Save a model to disk (and the remote store) and return its unique ID."""
+        cache = cls.cache()
         model_id = str(uuid.uuid4())
-        path = os.path.join(cls.base_dir, f"{model_id}.pkl")
-        joblib.dump(model, path)
+        path = cache.path(model_id)
+        part = f"{path}.part"
+        with span("model.save", model_id=model_id):
+            joblib.dump(model, part)
+            if cls.remote is not None:
+                with span("model.upload"):
+                    cls.remote.upload(f"{model_id}.pkl", part)
+            os.replace(part, path)
+            cache.add(model_id)
         return model_id
 
     @classmethod
     def load(cls, model_id: str):
-        """Load a model from disk by its ID."""
-        path = os.path.join(cls.base_dir, f"{model_id}.pkl")
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Model {model_id} not found")
-        return joblib.load(path)
+        """Load a model by its ID, fetching it from the remote store on a local miss."""
+        with span("model.load", model_id=model_id):
+            path = cls.fetch(model_id)
+            try:
+                return joblib.load(path)
+            except FileNotFoundError:
+                # Evicted between fetch and open
+                cls.cache().discard(model_id)
+                return joblib.load(cls.fetch(model_id))
+
+    @classmethod
+    def get(cls, model_id: str):
+        """Load a model by its ID, keeping it in memory for the next calls.
+
+        Concurrent calls for a model that is not in memory yet wait for a single load.
+        """
+        with cls._loaded_lock:
+            model = cls._memory_hit(model_id)
+            if model is not None:
+                return model
+            lock = cls._loading.setdefault(model_id, threading.Lock())
+        with lock:
+            try:
+                with cls._loaded_lock:
+                    model = cls._memory_hit(model_id)
+                if model is None:
+                    model = cls.load(model_id)
+                    with cls._loaded_lock:
+                        if cls.max_loaded > 0:
+                            cls._loaded[model_id] = model
+                            while len(cls._loaded) > cls.max_loaded:
+                                cls._loaded.popitem(last=False)
+            finally:
+                with cls._loaded_lock:
+                    cls._loading.pop(model_id, None)
+        return model
+
+    @classmethod
+    def _memory_hit(cls, model_id: str):
+        """The in-memory model, marked as used, or None; call with ``_loaded_lock`` held."""
+        model = cls._loaded.get(model_id)
+        if model is not None:
+            cls._loaded.move_to_end(model_id)
+            cls.memory_hits += 1
+        return model
+
+    @classmethod
+    def recent(cls, n: int) -> List[str]:
+        """
+        IDs of the ``n`` newest models in the local directory, newest first.
+
+        Models are ordered by when they were saved or downloaded here (file mtime
+        at startup); with a remote tier, local hits also move a model up.
+        """
+        cache = cls.cache()
+        with cache._lock:
+            return list(reversed(cache._entries))[:n]
+
+    @classmethod
+    def fetch(cls, model_id: str) -> str:
+        """Local path of a model, downloading it first if needed."""
+        cache = cls.cache()
+        path = cache.path(model_id)
+        if cls.remote is None:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model {model_id} not found")
+            return path
+        if cache.touch(model_id) and os.path.exists(path):
+            return path
+
+        with cls._fetching_lock:
+            lock = cls._fetching.setdefault(model_id, threading.Lock())
+        with lock:
+            try:
+                if not os.path.exists(path):
+                    part = f"{path}.{uuid.uuid4().hex}.part"
+                    try:
+                        with span("model.fetch", model_id=model_id):
+                            cls.remote.download(f"{model_id}.pkl", part)
+                    except FileNotFoundError:
+                        raise FileNotFoundError(f"Model {model_id} not found") from None
+                    os.replace(part, path)
+                    cache.fetches += 1
+                cache.add(model_id)
+            finally:
+                with cls._fetching_lock:
+                    cls._fetching.pop(model_id, None)
+        return path
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        result = cls.cache().stats()
+        result["remote"] = type(cls.remote).__name__ if cls.remote is not None else None
+        with cls._loaded_lock:
+            result["loaded"] = len(cls._loaded)
+        result["max_loaded"] = cls.max_loaded
+        result["memory_hits"] = cls.memory_hits
+        return result
+
 
+ModelStore.from_settings(settings)
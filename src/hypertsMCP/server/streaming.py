@@ -0,0 +1,166 @@
+"""Stateful streaming anomaly scoring for detection models."""
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from hyperts.utils import consts
+
+from .admission import AdmissionRejected
+from .handles.predict import predict_with_proba
+from .settings import settings
+
+
+def model_window(model) -> int:
+    """Largest input window of the ensemble members (0 for pointwise detectors)."""
+    estimator = model.sk_pipeline.steps[-1][1]
+    members = getattr(estimator, 'estimators', None) or [estimator]
+    windows = [0]
+    for member in members:
+        wrapper = getattr(member, 'model', None)
+        init_kwargs = getattr(wrapper, 'init_kwargs', None) or {}
+        windows.append(int(init_kwargs.get('window') or 0))
+    return max(windows)
+
+
+class DetectionStream:
+    """One client's stream: a ring buffer of recent points and their scores.
+
+    Only newly appended points are scored. The last ``context`` buffered points
+    are prepended as history for detectors that look at a window, and the fitted
+    pipeline runs once per append (no second pass for the confidence column).
+    """
+
+    def __init__(self, model, model_id: str, buffer_size: int, context: Optional[int] = None):
+        if getattr(model, 'task', None) not in consts.TASK_LIST_DETECTION:
+            raise ValueError('streaming is supported for detection models only.')
+        self.model = model
+        self.model_id = model_id
+        self.context = model_window(model) if context is None else context
+        self.buffer: deque = deque(maxlen=max(buffer_size, self.context, 1))
+        self.label_col = model.kwargs.get('anomaly_label_col')
+        self.points = 0
+        self.anomalies = 0
+        self.last_timestamp = None
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def append(self, points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score new points (in time order) and add them to the buffer."""
+        if not points:
+            return []
+        with self.lock:
+            self.last_used = time.monotonic()
+            new = pd.DataFrame.from_records(points)
+            if self.label_col is not None and self.label_col in new.columns:
+                new = new.drop(columns=[self.label_col])
+            timestamps = pd.to_datetime(new[self.model.timestamp])
+            if (not timestamps.is_monotonic_increasing
+                    or (self.last_timestamp is not None and timestamps.iloc[0] <= self.last_timestamp)):
+                raise ValueError('points must be appended in increasing timestamp order.')
+            new[self.model.timestamp] = timestamps
+
+            history = list(self.buffer)[-self.context:] if self.context else []
+            X = pd.concat([pd.DataFrame.from_records([p for p, _ in history]), new],
+                          ignore_index=True) if history else new
+            labels, proba, _ = predict_with_proba(self.model, X)
+            labels, severity = labels[-len(new):], proba[-len(new):, 1]
+
+            results = []
+            for record, label, score in zip(new.to_dict('records'), labels, severity):
+                result = {
+                    'timestamp': str(record[self.model.timestamp]),
+                    consts.ANOMALY_LABEL: int(label),
+                    consts.ANOMALY_CONFIDENCE: float(score),
+                }
+                self.buffer.append((record, result))
+                results.append(result)
+            self.points += len(results)
+            self.anomalies += sum(r[consts.ANOMALY_LABEL] for r in results)
+            self.last_timestamp = timestamps.iloc[-1]
+            return results
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Scores of the most recent ``n`` buffered points."""
+        results = [result for _, result in self.buffer]
+        return results[-n:] if n else results
+
+    def summary(self) -> Dict[str, Any]:
+        return {'model_id': self.model_id, 'points': self.points, 'anomalies': self.anomalies,
+                'buffered': len(self.buffer), 'context': self.context}
+
+
+class StreamSessions:
+    """Open streams keyed by session ID, evicting those idle for ``idle_timeout`` seconds."""
+
+    def __init__(self, idle_timeout: float = 300.0, max_sessions: int = 256,
+                 buffer_size: int = 1024):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.buffer_size = buffer_size
+        self._sessions: "OrderedDict[str, DetectionStream]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    @classmethod
+    def from_settings(cls, s) -> "StreamSessions":
+        return cls(s.stream_idle_timeout, s.stream_max_sessions, s.stream_buffer_size)
+
+    def open(self, model, model_id: str, context: Optional[int] = None,
+             buffer_size: Optional[int] = None) -> str:
+        stream = DetectionStream(model, model_id, buffer_size or self.buffer_size, context)
+        with self._lock:
+            self._sweep()
+            if len(self._sessions) >= self.max_sessions:
+                oldest = next(iter(self._sessions.values()))
+                retry_after = max(0.0, oldest.last_used + self.idle_timeout - time.monotonic())
+                raise AdmissionRejected(f"{self.max_sessions} stream sessions are open",
+                                        status_code=429, retry_after=math.ceil(retry_after))
+            session_id = str(uuid.uuid4())
+            self._sessions[session_id] = stream
+        return session_id
+
+    def get(self, session_id: str) -> DetectionStream:
+        with self._lock:
+            self._sweep()
+            stream = self._sessions.get(session_id)
+            if stream is None:
+                raise ValueError(f"unknown or expired stream session: {session_id}")
+            self._sessions.move_to_end(session_id)
+            stream.last_used = time.monotonic()
+            return stream
+
+    def close(self, session_id: str) -> DetectionStream:
+        with self._lock:
+            stream = self._sessions.pop(session_id, None)
+        if stream is None:
+            raise ValueError(f"unknown or expired stream session: {session_id}")
+        return stream
+
+    def sweep(self) -> int:
+        """Evict idle sessions now; returns how many were evicted."""
+        with self._lock:
+            return self._sweep()
+
+    def _sweep(self) -> int:
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [sid for sid, stream in self._sessions.items() if stream.last_used < deadline]
+        for sid in expired:
+            del self._sessions[sid]
+        self.evicted += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._sweep()
+            return {'open': len(self._sessions), 'evicted': self.evicted,
+                    'points': sum(s.points for s in self._sessions.values())}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+sessions = StreamSessions.from_settings(settings)
@@ -1,9 +1,55 @@
-"""Backward compatibility: re-export shared utils."""
+"""Server utilities: re-exports of the shared utils and settings-aware decoding."""
+from typing import Optional
+import pandas as pd
 from ..utils import (
     is_3d_array,
     is_nested,
     df_to_json,
-    json_to_df
+    json_to_df,
+    array_to_compact,
+    compact_to_array,
+    is_compact_array,
+    compact_dtypes,
+    frame_nbytes
 )
+from .settings import settings
+from ..tracing import span
 
-__all__ = ['is_3d_array', 'is_nested', 'df_to_json', 'json_to_df']
\ No newline at end of file
+__all__ = ['is_3d_array', 'is_nested', 'df_to_json', 'json_to_df',
+           'array_to_compact', 'compact_to_array', 'is_compact_array',
+           'compact_dtypes', 'frame_nbytes', 'use_compact', 'decode_frame', 'build_cell_indexes']
+
+
+def use_compact(compact: Optional[bool] = None) -> bool:
+    """A request's compact_dtypes flag, falling back to the server setting."""
+    return settings.compact_dtypes if compact is None else compact
+
+
+def decode_frame(json_data: str, compact: Optional[bool] = None) -> pd.DataFrame:
+    """Decode a request frame, with narrow dtypes when compact mode is on."""
+    with span("decode", bytes=len(json_data), compact=use_compact(compact)) as s:
+        df = json_to_df(json_data, compact=use_compact(compact))
+        if s is not None:
+            s.set_attribute("rows", len(df))
+        return df
+
+
+def build_cell_indexes(*frames: Optional[pd.DataFrame]):
+    """
+    Build the lookup tables of the nested series cells' indexes up front.
+
+    pandas fills an index's hash table lazily on the first label lookup, and two
+    threads doing that first lookup at once can miss labels (KeyError). Frames
+    whose cells are shared by concurrent fits or predictions must go through this
+    first, in a single thread.
+    """
+    for frame in frames:
+        if frame is None:
+            continue
+        for col in frame.columns:
+            values = frame[col]
+            if values.dtype != object:
+                continue
+            for cell in values:
+                if isinstance(cell, pd.Series) and len(cell):
+                    cell.index.get_loc(cell.index[0])
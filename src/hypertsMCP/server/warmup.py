@@ -0,0 +1,91 @@
+"""Startup warm-up: preload models and run one prediction each before reporting ready."""
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .handles.predict import predict_frame
+from .handles.train_model import WARMUP_ROWS
+from .storage_manager import ModelStore
+from .settings import settings
+from ..tracing import span
+
+
+class Readiness:
+    """Warm-up progress, reported by the readiness route."""
+
+    def __init__(self):
+        self.ready = False
+        self.started: Optional[float] = None
+        self.elapsed: Optional[float] = None
+        self.models: Dict[str, str] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "elapsed": self.elapsed, "models": dict(self.models)}
+
+
+readiness = Readiness()
+
+
+def warm_model(model_id: str) -> str:
+    """
+    Load a model into memory and run a tiny prediction through it.
+
+    The prediction replays the rows stored with the model at training time (see
+    ``settings.warmup_store_sample``) or, for forecast and detection models, the
+    tail of the history they keep anyway; it triggers lazy imports, JIT and graph
+    compilation. Classifiers and regressors trained without a sample are only loaded.
+    """
+    with span("warmup", model_id=model_id):
+        model = ModelStore.get(model_id)
+        sample = getattr(model, "warmup_sample_", None)
+        if sample is None and getattr(model, "history", None) is not None:
+            sample = model.history.iloc[-WARMUP_ROWS:].copy()
+        if sample is None:
+            return "loaded"
+        predict_frame(model, sample)
+        return "warm"
+
+
+def warmup_ids(model_ids: Iterable[str] = (), recent: int = 0) -> List[str]:
+    """Configured model IDs followed by the most recently saved ones, without duplicates."""
+    ids = list(dict.fromkeys([*model_ids, *ModelStore.recent(recent)]))
+    # Models beyond the in-memory capacity would only evict the ones warmed before them
+    return ids[:ModelStore.max_loaded] if ModelStore.max_loaded > 0 else []
+
+
+async def warm_up(model_ids: Iterable[str] = (), recent: int = 0, timeout: Optional[float] = None,
+                  concurrency: int = 4, state: Readiness = readiness) -> Readiness:
+    """
+    Warm models concurrently, then mark ``state`` ready.
+
+    Models still warming when ``timeout`` expires are reported as ``"timeout"``
+    and the server becomes ready regardless; they finish in the background.
+    """
+    state.ready = False
+    state.started = time.perf_counter()
+    ids = warmup_ids(model_ids, recent)
+    state.models = {model_id: "pending" for model_id in ids}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def warm(model_id: str):
+        async with semaphore:
+            try:
+                state.models[model_id] = await asyncio.to_thread(warm_model, model_id)
+            except Exception as e:
+                state.models[model_id] = f"failed: {type(e).__name__}: {e}"
+
+    tasks = [asyncio.create_task(warm(model_id)) for model_id in ids]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        for model_id, status in state.models.items():
+            if status == "pending":
+                state.models[model_id] = "timeout"
+    state.elapsed = round(time.perf_counter() - state.started, 3)
+    state.ready = True
+    return state
+
+
+async def warm_up_from_settings(s=settings) -> Readiness:
+    return await warm_up(s.warmup_models, s.warmup_recent, s.warmup_timeout, s.warmup_concurrency)
@@ -0,0 +1,265 @@
+"""Request tracing with W3C trace context, exported as OTLP/JSON spans.
+
+Spans are no-ops until ``configure`` is given an exporter:
+
+- ``file:///path/spans.jsonl`` appends one OTLP ``ExportTraceServiceRequest``
+  JSON document per line (the layout of the OpenTelemetry collector file exporter)
+- ``http://host:4318/v1/traces`` posts the same documents to an OTLP/HTTP
+  collector
+
+The current span lives in a context variable, so it follows ``await`` and
+``asyncio.to_thread``. Across processes it travels as a ``traceparent`` header
+or MCP request ``_meta`` entry.
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+TRACEPARENT = "traceparent"
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("hypertsmcp_span", default=None)
+
+
+def _hex_id(nbytes: int) -> str:
+    return f"{random.getrandbits(nbytes * 8) or 1:0{nbytes * 2}x}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span_id) of a W3C traceparent, or None when it is invalid."""
+    if not value:
+        return None
+    parts = value.strip().lower().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    trace_id, span_id = parts[1], parts[2]
+    try:
+        if len(trace_id) != 32 or len(span_id) != 16 or not int(trace_id, 16) or not int(span_id, 16):
+            return None
+    except ValueError:
+        return None
+    return trace_id, span_id
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Span:
+    """One timed operation of a trace."""
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = _hex_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            tracer.on_end(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class FileExporter:
+    """Appends OTLP/JSON export requests to a file, one per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, document: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(document) + "\n")
+
+
+class HTTPExporter:
+    """Posts OTLP/JSON export requests to a collector."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def export(self, document: Dict[str, Any]):
+        request = urllib.request.Request(self.url, data=json.dumps(document).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def make_exporter(url: str):
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return FileExporter(parsed.path)
+    if parsed.scheme in ("http", "https"):
+        return HTTPExporter(url)
+    raise ValueError(f"unsupported trace exporter: {url}")
+
+
+class Tracer:
+    """Collects finished spans and exports them in batches from a background thread."""
+
+    def __init__(self):
+        self.exporter = None
+        self.service_name = "hypertsMCP"
+        self.max_batch = 256
+        self.interval = 1.0
+        self.exported = 0
+        self.dropped = 0
+        self._pending: List[Span] = []
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, exporter=None, service_name: Optional[str] = None, interval: float = 1.0):
+        self.flush()
+        self.exporter = make_exporter(exporter) if isinstance(exporter, str) else exporter
+        if service_name:
+            self.service_name = service_name
+        self.interval = interval
+        if self.exporter is not None and self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._worker.start()
+
+    def on_end(self, span: Span):
+        with self._cond:
+            self._pending.append(span)
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Export finished spans now."""
+        with self._cond:
+            spans, self._pending = self._pending, []
+        if not spans or self.exporter is None:
+            return
+        document = {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "hypertsMCP"},
+                            "spans": [span.to_otlp() for span in spans]}],
+        }]}
+        try:
+            self.exporter.export(document)
+            self.exported += len(spans)
+        except Exception:
+            # Tracing must never fail a request
+            self.dropped += len(spans)
+
+
+tracer = Tracer()
+atexit.register(tracer.flush)
+
+
+def configure(exporter=None, service_name: Optional[str] = None, interval: float = 1.0):
+    """Enable span export to a URL (see module docstring) or exporter object; None disables it."""
+    tracer.configure(exporter, service_name, interval)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the current span, for outgoing calls."""
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+def start_span(name: str, parent: Union[Span, str, None] = None, kind: int = SPAN_KIND_INTERNAL,
+               **attributes) -> Optional[Span]:
+    """
+    Start a span that the caller ends; None when tracing is off.
+
+    ``parent`` is a Span, a traceparent string from a remote caller, or None for
+    the current span.
+    """
+    if not tracer.enabled:
+        return None
+    if isinstance(parent, str):
+        remote = parse_traceparent(parent)
+        trace_id, parent_id = remote if remote else (_hex_id(16), None)
+    else:
+        parent = parent or _current.get()
+        trace_id = parent.trace_id if parent is not None else _hex_id(16)
+        parent_id = parent.span_id if parent is not None else None
+    return Span(name, trace_id, parent_id, kind, attributes)
+
+
+@contextlib.contextmanager
+def span(name: str, parent: Union[Span, str, None] = None, kind: int = SPAN_KIND_INTERNAL,
+         **attributes) -> Iterator[Optional[Span]]:
+    """Run a block in a new current span; yields None when tracing is off."""
+    current = start_span(name, parent, kind, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
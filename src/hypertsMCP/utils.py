@@ -1,8 +1,10 @@
 """Shared utilities for DataFrame/JSON conversion with nested Series support."""
 import pandas as pd
 import numpy as np
-from typing import Union, Any, Dict, List
+from typing import Union, Any, Dict, List, Optional, Tuple
+import base64
 import json
+import sys
 
 
 def is_3d_array(arr: Union[np.ndarray, list]) -> bool:
@@ -55,12 +57,14 @@ def df_to_json(df: pd.DataFrame) -> str:
     return json.dumps(convert_series(df.to_dict()))
 
 
-def json_to_df(json_data: str) -> pd.DataFrame:
+def json_to_df(json_data: str, compact: bool = False) -> pd.DataFrame:
     """
     Convert JSON string back to DataFrame, reconstructing nested Series.
     
     Args:
         json_data: JSON string to convert
+        compact: Decode with narrow dtypes (see compact_dtypes); nested float
+            series are built as float32 directly
         
     Returns:
         Reconstructed DataFrame
@@ -68,7 +72,14 @@ def json_to_df(json_data: str) -> pd.DataFrame:
     def convert_back(obj):
         if isinstance(obj, dict):
             if obj.get('__type__') == 'series':
-                return pd.Series(obj['values'], index=obj['index'], dtype=obj['dtype'])
+                if not compact:
+                    return pd.Series(obj['values'], index=obj['index'], dtype=obj['dtype'])
+                index = obj['index']
+                if index == list(range(len(index))):
+                    index = None  # a RangeIndex instead of an int64 index per cell
+                dtype = np.dtype(obj['dtype'])
+                return pd.Series(obj['values'], index=index,
+                                 dtype=np.float32 if dtype.kind == 'f' else dtype)
             else:
                 return {k: convert_back(v) for k, v in obj.items()}
         elif isinstance(obj, list):
@@ -77,4 +88,92 @@ def json_to_df(json_data: str) -> pd.DataFrame:
             return obj
     
     data_dict = convert_back(json.loads(json_data))
-    return pd.DataFrame(data_dict)
+    df = pd.DataFrame(data_dict)
+    return compact_dtypes(df) if compact else df
+
+
+def compact_dtypes(df: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Downcast a frame to narrow dtypes.
+
+    Float columns and nested float series become float32, integer columns the
+    smallest integer type holding their values, and string columns with at most
+    ``category_ratio`` distinct values per row become categoricals.
+
+    Args:
+        df: DataFrame to downcast
+        category_ratio: Largest share of distinct values for a categorical column
+
+    Returns:
+        New DataFrame; df is not modified
+    """
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype.kind == 'f':
+            s = s.astype(np.float32)
+        elif s.dtype.kind in 'iu':
+            s = pd.to_numeric(s, downcast='integer' if s.dtype.kind == 'i' else 'unsigned')
+        elif s.dtype == object and len(s) > 0:
+            if s.map(lambda v: isinstance(v, pd.Series)).all():
+                s = s.map(lambda v: v.astype(np.float32) if v.dtype.kind == 'f' else v)
+            elif s.map(lambda v: isinstance(v, str)).all() and s.nunique() <= category_ratio * len(s):
+                s = s.astype('category')
+        columns[col] = s
+    return pd.DataFrame(columns, index=df.index)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Resident bytes of a frame including the values and index of nested series."""
+    total = int(df.memory_usage(index=True, deep=False).sum())
+    for col in df.columns:
+        if df[col].dtype == object:
+            total += sum(v.memory_usage(index=True) if isinstance(v, pd.Series)
+                         else sys.getsizeof(v) for v in df[col])
+    return total
+
+
+def array_to_compact(arr: np.ndarray, columns: Optional[List[Any]] = None,
+                     dtype: str = 'float64') -> Dict[str, Any]:
+    """
+    Encode a dense numeric array as base64 of its little-endian bytes.
+
+    Args:
+        arr: Array to encode
+        columns: Optional labels of the last axis (e.g. class labels)
+        dtype: Numeric dtype to encode with
+
+    Returns:
+        Dict with '__type__', 'dtype', 'shape', 'columns' and 'data' keys
+    """
+    arr = np.ascontiguousarray(arr, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {
+        '__type__': 'ndarray',
+        'dtype': np.dtype(dtype).name,
+        'shape': list(arr.shape),
+        'columns': [c.item() if isinstance(c, np.generic) else c for c in columns]
+                   if columns is not None else None,
+        'data': base64.b64encode(arr.tobytes()).decode('ascii'),
+    }
+
+
+def compact_to_array(obj: Dict[str, Any]) -> Tuple[np.ndarray, Optional[List[Any]]]:
+    """
+    Decode an array produced by array_to_compact.
+
+    Args:
+        obj: Dict produced by array_to_compact
+
+    Returns:
+        Tuple of (array, column labels or None)
+    """
+    if obj.get('__type__') != 'ndarray':
+        raise ValueError("not a compact array")
+    dtype = np.dtype(obj['dtype']).newbyteorder('<')
+    arr = np.frombuffer(base64.b64decode(obj['data']), dtype=dtype).reshape(obj['shape'])
+    return arr.astype(arr.dtype.newbyteorder('=')), obj.get('columns')
+
+
+def is_compact_array(obj: Any) -> bool:
+    """Check if obj is an array encoded by array_to_compact."""
+    return isinstance(obj, dict) and obj.get('__type__') == 'ndarray'
@@ -24,3 +24,13 @@ def sample_dataframe():
         'col2': ['a', 'b', 'c'],
         'col3': [1.1, 2.2, 3.3]
     })
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """Fixture pointing ModelStore at a temporary directory for a test module; restores it afterwards."""
+    from hypertsMCP.server.storage_manager import ModelStore
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    ModelStore.configure(str(tmp_path_factory.mktemp("models")))
+    yield ModelStore.base_dir
+    ModelStore.configure(*saved)
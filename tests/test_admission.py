@@ -0,0 +1,125 @@
+"""Tests for admission control."""
+import asyncio
+import httpx
+import pytest
+from hypertsMCP.server.admission import (
+    AdmissionController, AdmissionLimits, AdmissionRejected, MemoryBudget, ToolGate
+)
+from hypertsMCP.server.settings import Settings
+
+
+def make_gate(budget_bytes=None, **limits):
+    return ToolGate("tool", AdmissionLimits(**limits), MemoryBudget(budget_bytes))
+
+
+class TestToolGate:
+    """Tests for ToolGate admission decisions."""
+
+    @pytest.mark.asyncio
+    async def test_payload_limit(self):
+        """Should reject oversized payloads with 413."""
+        gate = make_gate(max_payload_bytes=10)
+        with pytest.raises(AdmissionRejected) as e:
+            async with gate.admit(11):
+                pass
+        assert e.value.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Should never run more calls than max_concurrency."""
+        gate = make_gate(max_concurrency=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with gate.admit():
+                peak = max(peak, gate.running)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_queue_full(self):
+        """Should reject with 429 and a retry-after hint once the queue is full."""
+        gate = make_gate(max_concurrency=1, max_queue=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.admit():
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as e:
+            async with gate.admit():
+                pass
+        assert e.value.status_code == 429
+        assert e.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Should reject with 503 when no slot frees up in time."""
+        gate = make_gate(max_concurrency=1, queue_timeout=0.01)
+        async with gate.admit():
+            with pytest.raises(AdmissionRejected) as e:
+                async with gate.admit():
+                    pass
+        assert e.value.status_code == 503
+        assert gate.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_memory_budget(self):
+        """Should hold back calls whose estimated memory does not fit."""
+        gate = make_gate(budget_bytes=100, memory_factor=1.0, queue_timeout=0.01)
+        async with gate.admit(60):
+            with pytest.raises(AdmissionRejected):
+                async with gate.admit(60):
+                    pass
+        async with gate.admit(60):
+            assert gate.budget.used == 60
+        assert gate.budget.used == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b'{"model_id": ', b'["not", "an", "object"]'])
+async def test_malformed_body(body):
+    """Should answer a body that is not a JSON object with 422 instead of an internal error."""
+    from hypertsMCP.server.server import fastapi_app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app),
+                                 base_url="http://test") as client:
+        response = await client.post("/predict", content=body,
+                                     headers={"content-type": "application/json"})
+    assert response.status_code == 422
+    assert response.json()["status_code"] == 422
+
+
+class TestAdmissionController:
+    """Tests for per-tool configuration."""
+
+    def test_overrides(self):
+        """Should apply configured overrides on top of handler defaults."""
+        class Tool:
+            name = "predict"
+            admission_limits = AdmissionLimits(max_concurrency=8)
+
+        controller = AdmissionController(max_payload_bytes=1000,
+                                         overrides={"predict": {"max_concurrency": 1}})
+        limits = controller.gate(Tool).limits
+        assert limits.max_concurrency == 1
+        assert limits.max_payload_bytes == 1000
+
+    def test_settings_from_env(self):
+        """Should read settings from HYPERTS_MCP_* variables."""
+        settings = Settings.from_env({
+            "HYPERTS_MCP_PORT": "9100",
+            "HYPERTS_MCP_MEMORY_BUDGET_MB": "256",
+            "HYPERTS_MCP_MAX_PAYLOAD_MB": "",
+            "HYPERTS_MCP_ADMISSION": '{"train_model": {"max_concurrency": 1}}',
+        })
+        assert settings.port == 9100
+        assert settings.memory_budget_mb == 256
+        assert settings.max_payload_mb is None
+        assert settings.admission["train_model"]["max_concurrency"] == 1
@@ -0,0 +1,117 @@
+"""Tests for the async client library."""
+import gc
+import httpx
+import pytest
+import pandas as pd
+from hypertsMCP.client import EncodingCache, HTTPTransport, HyperTSClient, RetryPolicy, ToolCallError
+from hypertsMCP.utils import df_to_json
+
+
+class FlakyTransport:
+    """Transport stub that fails a number of times before answering."""
+
+    def __init__(self, failures, retryable=True):
+        self.failures = failures
+        self.retryable = retryable
+        self.calls = []
+
+    async def call(self, tool, arguments):
+        self.calls.append((tool, arguments))
+        if len(self.calls) <= self.failures:
+            raise ToolCallError("busy", status_code=503, retry_after=0, retryable=self.retryable)
+        return {"prediction": [len(self.calls)]}
+
+
+class TestEncodingCache:
+    """Tests for EncodingCache."""
+
+    def test_encode_once(self, sample_dataframe):
+        """Should encode a frame once and reuse the payload."""
+        cache = EncodingCache()
+        first = cache.encode(sample_dataframe)
+        assert cache.encode(sample_dataframe) is first
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert first == df_to_json(sample_dataframe)
+
+    def test_decode_primes_cache(self, sample_dataframe):
+        """Should reuse the server payload for frames decoded from it."""
+        cache = EncodingCache()
+        encoded = df_to_json(sample_dataframe)
+        frame = cache.decode(encoded)
+        assert cache.encode(frame) is encoded
+        assert cache.misses == 0
+
+    def test_invalidate_and_release(self, sample_dataframe):
+        """Should drop entries on invalidate and when the frame is collected."""
+        cache = EncodingCache()
+        cache.encode(sample_dataframe)
+        cache.invalidate(sample_dataframe)
+        assert len(cache) == 0
+        frame = sample_dataframe.copy()
+        cache.encode(frame)
+        del frame
+        gc.collect()
+        assert len(cache) == 0
+
+    def test_size_bound(self):
+        """Should evict least recently used payloads beyond max_bytes."""
+        frames = [pd.DataFrame({"a": list(range(50))}) for _ in range(3)]
+        size = len(df_to_json(frames[0]))
+        cache = EncodingCache(max_bytes=2 * size)
+        for frame in frames:
+            cache.encode(frame)
+        assert len(cache) == 2
+
+
+class TestRetries:
+    """Tests for retry handling in HyperTSClient."""
+
+    @pytest.mark.asyncio
+    async def test_retries_retryable_errors(self, sample_dataframe):
+        """Should retry retryable failures and encode the frame only once."""
+        transport = FlakyTransport(failures=2)
+        client = HyperTSClient(transport, retry=RetryPolicy(retries=3, backoff=0))
+        assert await client.predict(sample_dataframe, "m") == [3]
+        assert client.cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up(self, sample_dataframe):
+        """Should raise non-retryable failures immediately."""
+        transport = FlakyTransport(failures=1, retryable=False)
+        client = HyperTSClient(transport, retry=RetryPolicy(retries=3, backoff=0))
+        with pytest.raises(ToolCallError):
+            await client.predict(sample_dataframe, "m")
+        assert len(transport.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_predict_many(self, sample_dataframe):
+        """Should return one prediction list per frame, in order."""
+        client = HyperTSClient(FlakyTransport(failures=0), concurrency=2)
+        results = await client.predict_many([sample_dataframe] * 4, "m")
+        assert len(results) == 4
+        assert client.cache.misses == 1
+
+
+class TestTransportErrors:
+    """Tests for which delivery failures are retried."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error, tool, retryable", [
+        (httpx.ConnectError("refused"), "train_model", True),
+        (httpx.PoolTimeout("pool"), "run_pipeline", True),
+        (httpx.ReadTimeout("slow"), "train_model", False),
+        (httpx.RemoteProtocolError("dropped"), "run_pipeline", False),
+        (httpx.ReadTimeout("slow"), "predict", True),
+    ])
+    async def test_retry_only_safe_calls(self, error, tool, retryable):
+        """Should retry connect failures always, and failures after sending only for idempotent tools."""
+        def handler(request):
+            raise error
+
+        transport = HTTPTransport(compression=None)
+        await transport.client.aclose()
+        transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with pytest.raises(ToolCallError) as e:
+            await transport.call(tool, {})
+        await transport.close()
+        assert e.value.retryable is retryable
@@ -0,0 +1,127 @@
+"""Tests for HTTP body compression."""
+import json
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from hypertsMCP.compression import compress, make_decompressor, negotiate, supported_encodings
+from hypertsMCP.server.compression import ContentEncodingMiddleware
+from hypertsMCP.utils import df_to_json
+
+
+def make_client(**kwargs):
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        return {"length": len(body), "data": json.loads(body)}
+
+    transport = httpx.ASGITransport(app=ContentEncodingMiddleware(app, **kwargs))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+class TestNegotiate:
+    """Tests for negotiate function."""
+
+    def test_prefers_supported(self):
+        """Should pick the first supported encoding the client accepts."""
+        assert negotiate("gzip, br") == "gzip"
+        assert negotiate("br") is None
+        assert negotiate("*") == supported_encodings()[0]
+
+    def test_q_zero(self):
+        """Should honour q=0 as a refusal."""
+        assert negotiate("gzip;q=0") is None
+
+
+class TestContentEncodingMiddleware:
+    """Tests for ContentEncodingMiddleware."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("encoding", supported_encodings())
+    async def test_compressed_request_and_response(self, encoding, nested_dataframe):
+        """Should decode compressed requests and compress large responses."""
+        payload = json.dumps({"data": df_to_json(nested_dataframe.head(10))}).encode()
+        body = compress(payload, encoding)
+        assert len(body) * 3 < len(payload)
+        async with make_client() as client:
+            res = await client.post("/echo", content=body, headers={
+                "Content-Encoding": encoding, "Accept-Encoding": encoding,
+                "Content-Type": "application/json"})
+        assert res.status_code == 200
+        assert res.headers["content-encoding"] == encoding
+        assert res.json()["length"] == len(payload)
+
+    @pytest.mark.asyncio
+    async def test_small_response_uncompressed(self):
+        """Should leave bodies below minimum_size alone."""
+        async with make_client(minimum_size=10_000) as client:
+            res = await client.post("/echo", json={"a": 1}, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in res.headers
+        assert res.json()["data"] == {"a": 1}
+
+    @pytest.mark.asyncio
+    async def test_unsupported_encoding(self):
+        """Should reject unknown request encodings with 415."""
+        async with make_client() as client:
+            res = await client.post("/echo", content=b"x", headers={"Content-Encoding": "br"})
+        assert res.status_code == 415
+
+    @pytest.mark.asyncio
+    async def test_decoded_size_limit(self):
+        """Should stop decoding once the decoded body exceeds the limit."""
+        body = compress(json.dumps({"a": "x" * 10_000}).encode(), "gzip")
+        async with make_client(max_decoded_bytes=1_000) as client:
+            res = await client.post("/echo", content=body, headers={"Content-Encoding": "gzip"})
+        assert res.status_code == 413
+
+    @pytest.mark.parametrize("encoding", supported_encodings())
+    def test_bounded_decompress(self, encoding):
+        """Should stop decoding a highly compressed chunk just past max_length."""
+        body = compress(b"\0" * 50_000_000, encoding)
+        assert len(body) < 100_000
+        decoded = make_decompressor(encoding).decompress(body, 1_001)
+        assert 1_001 <= len(decoded) < 1_000_000
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("encoding", supported_encodings())
+    async def test_truncated_body(self, encoding):
+        """Should reject a compressed body that ends before its stream does."""
+        body = compress(json.dumps({"a": "x" * 10_000}).encode(), encoding)
+        async with make_client() as client:
+            res = await client.post("/echo", content=body[:len(body) // 2],
+                                    headers={"Content-Encoding": encoding})
+        assert res.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_tool_route_reserves_decoded_size(self, monkeypatch, nested_dataframe):
+        """Should reserve memory for the decoded size of a compressed tool request."""
+        from hypertsMCP.server.handles.base import ToolRegistry
+        from hypertsMCP.server.server import fastapi_app
+        tool = ToolRegistry.get_tool("predict")
+        gate = ToolRegistry.admission.gate(tool)
+        monkeypatch.setattr(gate.budget, "budget_bytes", 10 ** 12)
+        used = []
+
+        async def run_tool(arguments):
+            used.append(gate.budget.used)
+            return {}
+
+        monkeypatch.setattr(tool, "run_tool", run_tool)
+        payload = json.dumps({"test_data": df_to_json(nested_dataframe.head(10)), "model_id": "m"}).encode()
+        transport = httpx.ASGITransport(app=ContentEncodingMiddleware(fastapi_app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            res = await client.post("/predict", content=compress(payload, "gzip"), headers={
+                "Content-Encoding": "gzip", "Content-Type": "application/json"})
+
+        assert res.status_code == 200
+        assert used == [int(len(payload) * gate.limits.memory_factor)]
+        assert gate.budget.used == 0
+
+    def test_streaming_decompressor(self):
+        """Should decode a body delivered in several chunks."""
+        payload = b"0123456789" * 1000
+        body = compress(payload, "gzip")
+        decompressor = make_decompressor("gzip")
+        decoded = b"".join(decompressor.decompress(body[i:i + 100]) for i in range(0, len(body), 100))
+        assert decoded == payload
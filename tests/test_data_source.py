@@ -0,0 +1,207 @@
+"""Tests for server-side Parquet/Feather data sources."""
+import numpy as np
+import pandas as pd
+import pytest
+from hyperts.datasets import load_basic_motions
+from hypertsMCP.server import data_source
+from hypertsMCP.server.admission import AdmissionController, AdmissionRejected
+from hypertsMCP.server.data_source import DataSource, estimate_bytes, iter_frames, read_frame, resolve_path
+from hypertsMCP.server.handles.base import ToolRegistry
+from hypertsMCP.server.handles.evaluate import RunEvaluate
+from hypertsMCP.server.handles.predict import RunPredict
+from hypertsMCP.server.handles.train_model import RunTrainModel
+from hypertsMCP.server.storage_manager import ModelStore
+from hypertsMCP.utils import df_to_json, json_to_df
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+feather = pytest.importorskip("pyarrow.feather")
+
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch):
+    """Fixture allowing data sources under tmp_path only."""
+    monkeypatch.setattr(data_source.settings, "data_roots", [str(tmp_path)])
+    return tmp_path
+
+
+@pytest.fixture
+def table(roots):
+    """Fixture writing 100 rows to Parquet in row groups of 10, and to Feather."""
+    df = pd.DataFrame({"x": np.arange(100, dtype=np.float64), "y": np.arange(100) % 3,
+                       "z": [f"s{i}" for i in range(100)]})
+    pq.write_table(pa.Table.from_pandas(df), roots / "data.parquet", row_group_size=10)
+    feather.write_feather(df, str(roots / "data.feather"), chunksize=16)
+    return df
+
+
+def test_allow_list(tmp_path, roots):
+    """Should refuse paths outside the data roots, including through '..', and all paths without roots."""
+    assert resolve_path(str(roots / "data.parquet")) == str((roots / "data.parquet").resolve())
+    with pytest.raises(PermissionError):
+        resolve_path(str(roots / ".." / "other.parquet"))
+    with pytest.raises(PermissionError):
+        resolve_path("/etc/passwd")
+    with pytest.raises(PermissionError):
+        resolve_path(str(roots / "data.parquet"), roots=[])
+
+
+@pytest.mark.parametrize("name", ["data.parquet", "data.feather"])
+def test_rows_and_columns(table, roots, name):
+    """Should read only the selected columns and row range, in batches of about batch_rows rows."""
+    source = DataSource(path=str(roots / name), columns=["x", "z"], start=25, stop=68)
+    frames = list(iter_frames(source, batch_rows=10, min_rows=3))
+    df = pd.concat(frames, ignore_index=True)
+
+    assert list(df.columns) == ["x", "z"]
+    pd.testing.assert_frame_equal(df, table.loc[25:67, ["x", "z"]].reset_index(drop=True))
+    assert all(len(f) >= 3 for f in frames)
+    pd.testing.assert_frame_equal(read_frame(source), df)
+
+
+def test_skips_row_groups(table, roots, monkeypatch):
+    """Should only ask Parquet for the row groups overlapping the range."""
+    requested = []
+    iter_batches = pq.ParquetFile.iter_batches
+
+    def spy(self, *args, row_groups=None, **kwargs):
+        requested.append(list(row_groups))
+        return iter_batches(self, *args, row_groups=row_groups, **kwargs)
+
+    monkeypatch.setattr(pq.ParquetFile, "iter_batches", spy)
+    df = read_frame(DataSource(path=str(roots / "data.parquet"), start=35, stop=52))
+
+    assert requested == [[3, 4, 5]]
+    assert df["x"].tolist() == list(range(35, 52))
+
+
+@pytest.mark.parametrize("name", ["data.parquet", "data.feather"])
+def test_estimate_bytes(table, roots, name):
+    """Should scale the metadata size of the selected columns with the selected rows."""
+    path = str(roots / name)
+    full = estimate_bytes(DataSource(path=path), path)
+    half = estimate_bytes(DataSource(path=path, start=50), path)
+    narrow = estimate_bytes(DataSource(path=path, columns=["x"]), path)
+
+    assert full > 0 and abs(half - full / 2) <= 1
+    assert 0 < narrow < full
+    assert estimate_bytes(DataSource(path=path), path, rows=10) == pytest.approx(full / 10, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_source_reads_reserve_memory(table, roots, monkeypatch):
+    """Should reserve the estimated memory of a source before reading it, and refuse one over budget."""
+    controller = AdmissionController(memory_budget_bytes=10 ** 9)
+    monkeypatch.setattr(ToolRegistry, "admission", controller)
+    source = {"path": str(roots / "data.parquet")}
+    reserved = []
+    record_batches = data_source._record_batches
+
+    def spy(*args, **kwargs):
+        reserved.append(controller.budget.used)
+        return record_batches(*args, **kwargs)
+
+    monkeypatch.setattr(data_source, "_record_batches", spy)
+    arguments = {"train_source": source, "task": "regression", "target": "y"}
+    # Fails after reading: regression needs nested cells
+    with pytest.raises(ValueError):
+        await ToolRegistry.call("train_model", arguments)
+    memory_factor = RunTrainModel.admission_limits.memory_factor
+    payload = int(len("regression" + "y") * memory_factor)
+    expected = int(estimate_bytes(DataSource(**source), str(roots / "data.parquet")) * memory_factor)
+    assert reserved == [payload + expected]
+    assert controller.budget.used == 0
+
+    monkeypatch.setattr(controller.budget, "budget_bytes", expected // 2)
+    reserved.clear()
+    with pytest.raises(AdmissionRejected) as e:
+        await ToolRegistry.call("train_model", arguments)
+    assert e.value.status_code == 413 and reserved == []
+
+
+def test_nested_cells(roots):
+    """Should turn list columns into nested series cells."""
+    df = load_basic_motions().iloc[:5]
+    flat = df.copy()
+    for col in df.columns[:-1]:
+        flat[col] = [s.to_numpy() for s in df[col]]
+    pq.write_table(pa.Table.from_pandas(flat), roots / "motions.parquet")
+    read = read_frame(DataSource(path=str(roots / "motions.parquet")), compact=True)
+
+    cell = read.iloc[0, 0]
+    assert isinstance(cell, pd.Series) and cell.dtype == np.float32
+    assert np.allclose(cell, df.iloc[0, 0])
+
+
+@pytest.mark.asyncio
+async def test_handlers_read_sources(tmp_path, roots):
+    """Should train from a source and give the same predictions and scores as inline frames."""
+    df = load_basic_motions()
+    flat = df.copy()
+    for col in df.columns[:-1]:
+        flat[col] = [s.to_numpy() for s in df[col]]
+    pq.write_table(pa.Table.from_pandas(flat), roots / "motions.parquet", row_group_size=16)
+    source = {"path": str(roots / "motions.parquet")}
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    ModelStore.configure(str(tmp_path / "models"))
+    try:
+        trained = await RunTrainModel().run_tool({
+            "train_source": {**source, "stop": 60}, "task": "classification", "target": "target",
+            "max_trials": 1, "random_state": 0, "verbose": 0})
+        model_id = trained["model_id"]
+        inline = await RunPredict().run_tool({"test_data": df_to_json(df.iloc[60:]), "model_id": model_id})
+        batched = await RunPredict().run_tool({"test_source": {**source, "start": 60}, "batch_rows": 7,
+                                               "model_id": model_id})
+        scores = await RunEvaluate().run_tool({"test_source": {**source, "start": 60}, "batch_rows": 7,
+                                               "model_id": model_id})
+        reference = await RunEvaluate().run_tool({"test_data": df_to_json(df.iloc[60:]),
+                                                  "y_pred": inline["prediction"], "model_id": model_id})
+    finally:
+        ModelStore.configure(*saved)
+
+    assert batched["prediction"] == inline["prediction"]
+    expected = json_to_df(reference["scores"]).set_index("Metirc")["Score"]
+    actual = json_to_df(scores["scores"]).set_index("Metirc")["Score"]
+    assert np.allclose(actual[expected.index], expected)
+
+
+
+@pytest.mark.asyncio
+async def test_batched_forecasts_match_unbatched(tmp_path, roots, monkeypatch):
+    """Should forecast a source in small batches exactly as the whole range in one frame."""
+    steps = np.arange(200)
+    df = pd.DataFrame({
+        "ts": pd.date_range("2024-01-01", periods=200, freq="D").strftime("%Y-%m-%d"),
+        "y": 10 + np.sin(steps / 7 * 2 * np.pi)
+    })
+    pq.write_table(pa.Table.from_pandas(df.iloc[150:], preserve_index=False), roots / "daily.parquet",
+                   row_group_size=10)
+    source = {"path": str(roots / "daily.parquet")}
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    ModelStore.configure(str(tmp_path / "models"))
+    try:
+        trained = await RunTrainModel().run_tool({
+            "train_data": df_to_json(df.iloc[:150]), "task": "univariate-forecast", "target": "y",
+            "timestamp": "ts", "freq": "D", "timestamp_format": "%Y-%m-%d", "max_trials": 1,
+            "random_state": 0, "verbose": 0})
+        model_id = trained["model_id"]
+        # Like deep learning forecasters, forecast the steps after the history whatever X's timestamps
+        predict = type(ModelStore.get(model_id)).predict
+
+        def from_history_end(self, X, forecast_start=None):
+            forecast = predict(self, X)
+            forecast["y"] = np.arange(1.0, len(forecast) + 1)
+            return forecast
+
+        monkeypatch.setattr(type(ModelStore.get(model_id)), "predict", from_history_end)
+        whole = await RunPredict().run_tool({"test_data": df_to_json(df.iloc[150:]), "model_id": model_id})
+        batched = await RunPredict().run_tool({"test_source": source, "batch_rows": 7, "model_id": model_id})
+        scores = await RunEvaluate().run_tool({"test_source": source, "batch_rows": 7, "model_id": model_id})
+        unbatched = await RunEvaluate().run_tool({"test_source": source, "batch_rows": 50,
+                                                  "model_id": model_id})
+    finally:
+        ModelStore.configure(*saved)
+
+    assert [row[1] for row in whole["prediction"]] == list(range(1, 51))
+    assert batched["prediction"] == whole["prediction"]
+    assert scores["scores"] == unbatched["scores"]
@@ -1,9 +1,22 @@
 """Tests for handler functions."""
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
 import pytest
 import pandas as pd
 from hyperts.datasets import load_basic_motions
 from hypertsMCP.server.handles.train_test_split import RunSplit
-from hypertsMCP.utils import df_to_json, json_to_df
+from hypertsMCP.server.handles.run_pipeline import PipelineArgs, RunPipeline
+from hypertsMCP.server.handles.train_model import TrainModelArgs, fit_model
+from hypertsMCP.server.handles.predict import RunPredict
+from hypertsMCP.server.handles.evaluate import RunEvaluate
+from hypertsMCP.server.handles import forecast_backtest, train_model
+from hypertsMCP.server.handles.forecast_backtest import (RunForecastBacktest, horizon_metrics, target_columns,
+                                                         window_actuals)
+from hypertsMCP.server.storage_manager import ModelStore
+from hypertsMCP.server.utils import build_cell_indexes
+from hypertsMCP.utils import df_to_json, json_to_df, compact_to_array, array_to_compact
 
 
 @pytest.fixture
@@ -60,3 +73,394 @@ class TestTrainTestSplit:
         
         # Check that structure type is preserved (nested if original was nested)
         # This is a basic check - full validation would require comparing values
+
+
+@pytest.mark.usefixtures("model_dir")
+class TestRunPipeline:
+    """Tests for run_pipeline handler."""
+
+    def test_shared_cells_concurrent_lookups(self, sample_data_for_split):
+        """Should let branches look up labels in shared nested cells concurrently (as sktime's NaN check does)."""
+        def lookup_all(df, errors):
+            try:
+                for cell in df.drop(columns="target").to_numpy().ravel():
+                    for k in range(cell.size):
+                        cell[k]
+            except KeyError as e:
+                errors.append(e)
+
+        for _ in range(20):
+            df = json_to_df(sample_data_for_split)
+            build_cell_indexes(df)
+            errors = []
+            threads = [threading.Thread(target=lookup_all, args=(df, errors)) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert errors == []
+
+    @pytest.mark.asyncio
+    async def test_rejects_misordered_steps(self, sample_data_for_split):
+        """Should reject steps that are out of order."""
+        with pytest.raises(ValueError):
+            await RunPipeline().run_tool({
+                "data": sample_data_for_split,
+                "steps": [{"op": "train"}, {"op": "split"}]
+            })
+
+    @pytest.mark.asyncio
+    async def test_branches(self, sample_data_for_split):
+        """Should train each branch and return model IDs, scores and timings."""
+        train_options = {"task": "classification", "target": "target", "max_trials": 1}
+        result = await RunPipeline().run_tool({
+            "data": sample_data_for_split,
+            "steps": [
+                {"op": "split", "options": {"test_size": 0.3, "random_state": 42}},
+                {"op": "train", "name": "a", "options": train_options},
+                {"op": "train", "name": "b", "options": {**train_options, "random_state": 1}},
+                {"op": "predict", "options": {"return_predictions": False}},
+                {"op": "evaluate"}
+            ]
+        })
+
+        assert [r["name"] for r in result["results"]] == ["a", "b"]
+        assert result["rows"] == {"train": 14, "test": 6}
+        for branch in result["results"]:
+            assert "prediction" not in branch
+            assert len(json_to_df(branch["scores"])) > 0
+            assert set(branch["timings"]) == {"train", "save", "predict", "evaluate"}
+
+    @pytest.mark.asyncio
+    async def test_forecast_branch(self):
+        """Should return a forecast branch's predictions as a frame of timestamps and targets."""
+        df = pd.DataFrame({
+            "ts": pd.date_range("2024-01-01", periods=120, freq="D").strftime("%Y-%m-%d"),
+            "y": 10 + np.sin(np.arange(120) / 7 * 2 * np.pi)
+        })
+        result = await RunPipeline().run_tool({
+            "data": df_to_json(df.iloc[:100]),
+            "test_data": df_to_json(df.iloc[100:]),
+            "steps": [
+                {"op": "train", "options": {"task": "univariate-forecast", "target": "y", "timestamp": "ts",
+                                            "freq": "D", "timestamp_format": "%Y-%m-%d", "max_trials": 1,
+                                            "random_state": 0}},
+                {"op": "predict"},
+                {"op": "evaluate"}
+            ]
+        })
+
+        forecast = json_to_df(result["results"][0]["prediction"])
+        assert list(forecast.columns) == ["ts", "y"] and len(forecast) == 20
+        assert len(json_to_df(result["results"][0]["scores"])) > 0
+
+    @pytest.mark.parametrize("options", [{"test_data": "{}"}, {"eval_source": {"path": "/data/e.parquet"}}])
+    def test_rejects_data_options(self, sample_data_for_split, options):
+        """Should reject train options carrying their own frames instead of dropping them."""
+        with pytest.raises(ValueError, match="cannot include"):
+            PipelineArgs(data=sample_data_for_split, steps=[
+                {"op": "train", "options": {"task": "classification", "target": "target", **options}}])
+
+    def test_bounds_max_parallel(self, sample_data_for_split):
+        """Should not let one request train more branches at once than train_model allows."""
+        with pytest.raises(ValueError):
+            PipelineArgs(data=sample_data_for_split, max_parallel=50, steps=[{"op": "train"}])
+
+
+@pytest.mark.parametrize("mode, overlap", [("stats", 2), ("dl", 1)])
+def test_concurrent_fits(monkeypatch, mode, overlap):
+    """Should run stats searches side by side and deep learning searches one at a time."""
+    make_experiment = train_model.make_experiment
+    running, peak = [], []
+
+    def tracked_experiment(**kwargs):
+        # TensorFlow may be missing; a stats search stands in for the deep learning one
+        experiment = make_experiment(**{**kwargs, "mode": "stats"})
+        run = experiment.run
+
+        def tracked_run(*args, **kw):
+            running.append(1)
+            peak.append(len(running))
+            time.sleep(0.5)
+            running.pop()
+            return run(*args, **kw)
+
+        experiment.run = tracked_run
+        return experiment
+
+    monkeypatch.setattr(train_model, "make_experiment", tracked_experiment)
+    df = load_basic_motions().iloc[:40]
+    args = TrainModelArgs(train_data="", task="classification", target="target", mode=mode,
+                          max_trials=1, random_state=0, verbose=0)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(fit_model(df, args))) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(models) == 2 and max(peak) == overlap
+
+
+@pytest.fixture(scope="module")
+def classifier(model_dir):
+    """Fixture providing a quickly trained classifier and its encoded test set."""
+    df = load_basic_motions()
+    train_df, test_df = df.iloc[:60], df.iloc[60:]
+    args = TrainModelArgs(train_data="", task="classification", target="target",
+                          max_trials=2, random_state=0, verbose=0)
+    model_id = ModelStore.save(fit_model(train_df, args))
+    return model_id, df_to_json(test_df)
+
+
+class TestPredictProba:
+    """Tests for single-pass probability prediction."""
+
+    @pytest.mark.asyncio
+    async def test_labels_match_plain_predict(self, classifier):
+        """Should return the same labels as predict plus a compact probability array."""
+        model_id, test_json = classifier
+        plain = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id})
+        result = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id,
+                                              "proba": True})
+
+        assert result["prediction"] == plain["prediction"]
+        proba, classes = compact_to_array(result["proba"])
+        assert proba.shape == (20, len(classes))
+        assert set(result["prediction"]) <= set(classes)
+        assert [classes[i] for i in proba.argmax(axis=1)] == result["prediction"]
+
+    @pytest.mark.asyncio
+    async def test_without_ensemble_internals(self, classifier, monkeypatch):
+        """Should fall back to predict_proba and its argmax when hypernets internals are missing."""
+        model_id, test_json = classifier
+        plain = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id,
+                                             "proba": True})
+        monkeypatch.setattr("hypertsMCP.server.handles.predict.ENSEMBLE_INTERNALS", ("_not_there",))
+        result = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id,
+                                              "proba": True})
+
+        assert result["prediction"] == plain["prediction"]
+        assert np.allclose(compact_to_array(result["proba"])[0], compact_to_array(plain["proba"])[0])
+
+    @pytest.mark.asyncio
+    async def test_server_compact_setting_keeps_list_output(self, classifier, monkeypatch):
+        """Should decode compactly under the server setting but answer with a list unless asked."""
+        model_id, test_json = classifier
+        plain = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id})
+        monkeypatch.setattr("hypertsMCP.server.utils.settings.compact_dtypes", True)
+        result = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id})
+        scores = await RunEvaluate().run_tool({"test_data": test_json, "y_pred": result["prediction"],
+                                               "model_id": model_id})
+
+        assert result["prediction"] == plain["prediction"]
+        assert "precision" not in scores
+
+    @pytest.mark.asyncio
+    async def test_evaluate_accepts_compact_proba(self, classifier):
+        """Should evaluate with probabilities in compact form."""
+        model_id, test_json = classifier
+        result = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id,
+                                              "proba": True})
+        scores = await RunEvaluate().run_tool({
+            "test_data": test_json,
+            "y_pred": result["prediction"],
+            "y_proba": result["proba"],
+            "model_id": model_id
+        })
+        assert len(json_to_df(scores["scores"])) > 0
+
+    @pytest.mark.asyncio
+    async def test_compact_dtypes_precision_report(self, classifier):
+        """Should predict and evaluate in compact mode and report the precision loss."""
+        model_id, test_json = classifier
+        plain = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id})
+        compact = await RunPredict().run_tool({"test_data": test_json, "model_id": model_id,
+                                               "compact_dtypes": True})
+        scores = await RunEvaluate().run_tool({
+            "test_data": test_json, "y_pred": compact["prediction"],
+            "model_id": model_id, "compact_dtypes": True, "precision_report": True
+        })
+
+        assert compact["prediction"] == plain["prediction"]
+        assert scores["precision"]["max_abs_diff"] == 0.0
+        assert set(scores["precision"]["metrics"]) == set(json_to_df(scores["scores"]).iloc[:, 0])
+
+
+class TestModelFreeEvaluate:
+    """Tests for evaluate without model_id."""
+
+    @pytest.mark.asyncio
+    async def test_matches_model_path(self, classifier):
+        """Should give the model-based scores from the target column alone."""
+        model_id, test_json = classifier
+        y_pred = (await RunPredict().run_tool({"test_data": test_json, "model_id": model_id}))["prediction"]
+        with_model = await RunEvaluate().run_tool({"test_data": test_json, "y_pred": y_pred,
+                                                   "model_id": model_id})
+        without = await RunEvaluate().run_tool({"test_data": test_json, "y_pred": y_pred,
+                                                "target": "target", "task": "classification"})
+        pd.testing.assert_frame_equal(json_to_df(without["scores"]), json_to_df(with_model["scores"]))
+
+    @pytest.mark.asyncio
+    async def test_many_prediction_sets(self):
+        """Should score named prediction sets against one compact y_true in one call."""
+        y_true = np.linspace(1, 10, 50)
+        result = await RunEvaluate().run_tool({
+            "y_true": array_to_compact(y_true, dtype="float64"), "task": "regression",
+            "y_preds": {"exact": y_true.tolist(), "shifted": (y_true + 1).tolist()},
+            "metrics": ["mae", "rmse", "r2"]
+        })
+        scores = json_to_df(result["scores"]).set_index("Metirc")
+
+        assert list(scores.columns) == ["exact", "shifted"]
+        assert scores.loc["mae"].tolist() == [0.0, 1.0] and scores.loc["r2", "exact"] == 1.0
+
+    def test_metrics_match_hyperts(self):
+        """Should reproduce HyperTS calc_score for every supported metric."""
+        from hyperts.utils.metrics import calc_score
+        from hypertsMCP.server.metrics import score_sets
+        rng = np.random.default_rng(0)
+        y_true = rng.normal(10, 2, (40, 2))
+        y_pred = y_true + rng.normal(0, 1, (40, 2))
+        metrics = ["mae", "mse", "rmse", "mape", "smape", "r2"]
+        ours = score_sets(y_true, {"Score": y_pred}, "multivariate-forecast", metrics=metrics)
+        assert np.allclose(ours["Score"], list(calc_score(y_true, y_pred, metrics=metrics, task="forecast").values()))
+
+        labels = rng.integers(0, 3, 60)
+        predicted = np.where(rng.random(60) < 0.7, labels, rng.integers(0, 3, 60))
+        proba = rng.dirichlet([1, 1, 1], 60)
+        metrics = ["accuracy", "f1", "precision", "recall", "roc_auc_score", "log_loss"]
+        ours = score_sets(labels, {"Score": predicted}, "univariate-multiclass", {"Score": proba}, metrics)
+        expected = calc_score(labels, predicted, proba, metrics=metrics, task="multiclass")
+        assert np.allclose(ours["Score"], list(expected.values()))
+
+    @pytest.mark.asyncio
+    async def test_requires_targets(self):
+        """Should reject a model-free call without y_true or target."""
+        with pytest.raises(ValueError, match="y_true"):
+            await RunEvaluate().run_tool({"y_pred": [1, 0], "task": "classification"})
+
+
+@pytest.fixture(scope="module")
+def forecaster(model_dir):
+    """Fixture providing a quickly trained daily forecaster and its full history."""
+    rng = np.random.default_rng(0)
+    steps = np.arange(200)
+    df = pd.DataFrame({
+        "ts": pd.date_range("2024-01-01", periods=200, freq="D").strftime("%Y-%m-%d"),
+        "y": 10 + np.sin(steps / 7 * 2 * np.pi) + rng.normal(0, 0.1, 200)
+    })
+    args = TrainModelArgs(train_data="", task="univariate-forecast", target="y", timestamp="ts",
+                          freq="D", timestamp_format="%Y-%m-%d", max_trials=1, random_state=0,
+                          verbose=0)
+    model_id = ModelStore.save(fit_model(df.iloc[:150], args))
+    return model_id, df
+
+
+class TestForecastBacktest:
+    """Tests for forecast_backtest handler."""
+
+    @pytest.mark.asyncio
+    async def test_stride_windows(self, forecaster):
+        """Should return a (cutoff x horizon x series) forecast and per-horizon metrics."""
+        model_id, df = forecaster
+        result = await RunForecastBacktest().run_tool({
+            "model_id": model_id, "data": df_to_json(df.iloc[140:]),
+            "horizon": 5, "stride": 3, "min_history": 10, "return_actuals": True
+        })
+
+        forecast, series = compact_to_array(result["forecast"])
+        actual, _ = compact_to_array(result["actual"])
+        assert series == ["y"] and result["origin"] == "fixed"
+        assert forecast.shape == actual.shape == (len(result["cutoffs"]), 5, 1)
+        assert result["cutoffs"][:2] == ["2024-05-29", "2024-06-01"]
+        np.testing.assert_allclose(actual[0, :, 0], df["y"].iloc[150:155], rtol=1e-6)
+        assert result["metrics"]["per_horizon"]["horizon"] == [1, 2, 3, 4, 5]
+        assert result["metrics"]["overall"]["mae"] < 1
+
+    @pytest.mark.asyncio
+    async def test_cutoffs_match_predict(self, forecaster):
+        """Should match plain predict for explicit cutoffs on an unordered history."""
+        model_id, df = forecaster
+        history = df.iloc[140:].sample(frac=1, random_state=0)
+        result = await RunForecastBacktest().run_tool({
+            "model_id": model_id, "data": df_to_json(history),
+            "horizon": 3, "cutoffs": ["2024-06-01", "2024-06-10"]
+        })
+        plain = ModelStore.load(model_id).predict(df.iloc[153:156][["ts"]].copy())
+
+        forecast, _ = compact_to_array(result["forecast"])
+        assert result["cutoffs"] == ["2024-06-01", "2024-06-10"]
+        np.testing.assert_allclose(forecast[0, :, 0], plain["y"], rtol=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_compact_dtypes(self, forecaster):
+        """Should give float32-close forecasts from a compact-decoded history."""
+        model_id, df = forecaster
+        request = {"model_id": model_id, "data": df_to_json(df.iloc[140:]), "horizon": 3,
+                   "stride": 5, "min_history": 10, "dtype": "float64"}
+        full = await RunForecastBacktest().run_tool(request)
+        compact = await RunForecastBacktest().run_tool({**request, "compact_dtypes": True})
+
+        np.testing.assert_allclose(compact_to_array(compact["forecast"])[0],
+                                   compact_to_array(full["forecast"])[0], rtol=1e-4)
+        assert compact["metrics"]["overall"]["mae"] == pytest.approx(
+            full["metrics"]["overall"]["mae"], abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_rolling_backtest_keeps_shared_model(self, forecaster, monkeypatch):
+        """Should leave the in-memory model's history and predictions as they were after a rolling backtest."""
+        model_id, df = forecaster
+        model = ModelStore.get(model_id)
+        history = model.history.copy()
+        before = await RunPredict().run_tool({"test_data": df_to_json(df.iloc[150:160]), "model_id": model_id})
+
+        # Deep learning models move their history to forecast_start on predict
+        predict = type(model).predict
+
+        def moving_predict(self, X, forecast_start=None):
+            if forecast_start is not None:
+                self.history = forecast_start.copy()
+            return predict(self, X)
+
+        monkeypatch.setattr(type(model), "predict", moving_predict)
+        monkeypatch.setattr(forecast_backtest, "forecast_origin", lambda m: "rolling")
+        result = await RunForecastBacktest().run_tool({
+            "model_id": model_id, "data": df_to_json(df.iloc[140:]), "horizon": 3, "stride": 5,
+            "min_history": 10
+        })
+        after = await RunPredict().run_tool({"test_data": df_to_json(df.iloc[150:160]), "model_id": model_id})
+
+        assert result["origin"] == "rolling"
+        assert ModelStore.get(model_id) is model
+        pd.testing.assert_frame_equal(model.history, history)
+        assert after["prediction"] == before["prediction"]
+
+    def test_string_target(self):
+        """Should treat a target stored as a single column name as one series."""
+        model = SimpleNamespace(target="y")
+        history = pd.DataFrame({"ts": range(6), "y": np.arange(6.0)})
+        actuals = window_actuals(model, history, np.array([0, 2]), 2)
+
+        assert target_columns(model) == ["y"]
+        assert actuals.shape == (2, 2, 1) and actuals[1, :, 0].tolist() == [3.0, 4.0]
+
+    @pytest.mark.asyncio
+    async def test_rejects_window_past_history(self, forecaster):
+        """Should reject a cutoff without a full horizon after it."""
+        model_id, df = forecaster
+        with pytest.raises(ValueError):
+            await RunForecastBacktest().run_tool({
+                "model_id": model_id, "data": df_to_json(df.iloc[140:]),
+                "horizon": 3, "cutoffs": ["2024-07-17"]
+            })
+
+    def test_horizon_metrics(self):
+        """Should average errors per horizon and skip zero actuals in MAPE."""
+        actuals = np.array([[[0.0], [2.0]], [[1.0], [4.0]]])
+        forecasts = actuals + np.array([[[1.0], [1.0]], [[1.0], [3.0]]])
+        metrics = horizon_metrics(forecasts, actuals)
+
+        assert metrics["per_horizon"]["mae"] == [1.0, 2.0]
+        assert metrics["per_horizon"]["mape"] == [1.0, 0.625]
+        assert metrics["overall"]["rmse"] == pytest.approx(np.sqrt(3.0))
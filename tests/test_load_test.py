@@ -0,0 +1,70 @@
+"""Tests for the load generator helpers."""
+import httpx
+import pytest
+from hypertsMCP.client import load_test
+from hypertsMCP.client.load_test import LoadStats, parse_mix
+
+
+class TestParseMix:
+    """Tests for parse_mix function."""
+
+    def test_weights_are_normalized(self):
+        """Should normalize weights so they sum to one."""
+        mix = parse_mix("split=1,predict=3")
+        assert mix == {"split": 0.25, "predict": 0.75}
+
+    def test_zero_weights_are_dropped(self):
+        """Should drop operations with zero weight."""
+        assert parse_mix("train=0,predict=2") == {"predict": 1.0}
+
+    def test_unknown_operation(self):
+        """Should reject operations that are not tools."""
+        with pytest.raises(ValueError):
+            parse_mix("split=1,fit=1")
+
+
+class TestLoadStats:
+    """Tests for LoadStats summaries."""
+
+    def test_summarize(self):
+        """Should report throughput, error rate and percentiles."""
+        stats = LoadStats(started=0.0)
+        for i in range(10):
+            stats.record(start=i * 0.1, op="predict", latency=0.01 * (i + 1), ok=i != 0)
+        summary = LoadStats.summarize(stats.samples, elapsed=1.0)
+        assert summary["requests"] == 10
+        assert summary["throughput"] == pytest.approx(10.0)
+        assert summary["error_rate"] == pytest.approx(0.1)
+        assert summary["p50"] == pytest.approx(0.055)
+
+    def test_window(self):
+        """Should only include calls started inside the window."""
+        stats = LoadStats(started=0.0)
+        stats.record(start=0.5, op="split", latency=0.2, ok=True)
+        stats.record(start=1.5, op="split", latency=0.2, ok=True)
+        assert stats.window(0.0, 1.0)["requests"] == 1
+        assert LoadStats.summarize([], 1.0)["p99"] is None
+
+
+def test_start_local_server_waits_for_ready(monkeypatch):
+    """Should return only once /http/ready answers 200, not when the port first accepts."""
+    class Process:
+        def poll(self):
+            return None
+
+    answers = iter([httpx.ConnectError("refused"), 503, 503, 200])
+    urls = []
+
+    def get(url, timeout):
+        urls.append(url)
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return httpx.Response(answer)
+
+    monkeypatch.setattr(load_test.subprocess, "Popen", lambda *args, **kwargs: Process())
+    monkeypatch.setattr(load_test.httpx, "get", get)
+    monkeypatch.setattr(load_test.time, "sleep", lambda _: None)
+    load_test.start_local_server("http://localhost:8000/")
+
+    assert urls == ["http://localhost:8000/http/ready"] * 4
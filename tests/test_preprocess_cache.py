@@ -0,0 +1,131 @@
+"""Tests for the shared preprocessing cache."""
+import os
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from hyperts.datasets import load_basic_motions
+from hypertsMCP.server import preprocess_cache
+from hypertsMCP.server.handles.predict import predict_frame
+from hypertsMCP.server.handles.train_model import TrainModelArgs, fit_model
+from hypertsMCP.server.preprocess_cache import PreprocessCache, fingerprint
+
+
+@pytest.fixture
+def cache():
+    """Fixture installing an empty in-memory cache; restores the configured one afterwards."""
+    saved = preprocess_cache.cache
+    fresh = PreprocessCache(max_bytes=64 * 1024 * 1024)
+    preprocess_cache.configure(fresh)
+    yield fresh
+    preprocess_cache.configure(saved)
+
+
+@pytest.fixture(scope="module")
+def series():
+    """Fixture providing a daily series with a few missing days."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "ts": pd.date_range("2024-01-01", periods=220, freq="D").strftime("%Y-%m-%d"),
+        "y": 10 + np.sin(np.arange(220) / 7 * 2 * np.pi) + rng.normal(0, 0.1, 220)
+    })
+    return df.drop(index=[20, 21, 90]).reset_index(drop=True)
+
+
+def forecast_args(**kwargs):
+    return TrainModelArgs(train_data="", task="univariate-forecast", target="y", timestamp="ts",
+                          freq="D", max_trials=1, random_state=0, verbose=0, **kwargs)
+
+
+class TestFingerprint:
+    """Tests for dataset fingerprints."""
+
+    def test_flat_and_nested(self):
+        """Should be stable for equal content and change with any value."""
+        df = load_basic_motions().iloc[:10]
+        changed = df.copy()
+        changed.iloc[3, 0] = changed.iloc[3, 0] + 1e-9
+        assert fingerprint(df, df["target"]) == fingerprint(df.copy(), df["target"].copy())
+        assert fingerprint(df) != fingerprint(changed)
+        assert fingerprint(df, None) != fingerprint(df)
+
+
+class TestPreprocessCache:
+    """Tests for the two-tier LRU."""
+
+    def test_memory_bound_and_disk_tier(self, tmp_path):
+        """Should evict by bytes in memory and serve evicted entries from disk."""
+        frame = pd.DataFrame({"x": np.zeros(1000)})
+        cache = PreprocessCache(max_bytes=12_000, directory=str(tmp_path))
+        cache.put("a", frame)
+        cache.put("b", frame)
+        assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 1
+
+        assert cache.get("a").equals(frame)
+        assert cache.get("missing") is None
+        stats = cache.stats()
+        assert stats["disk_hits"] == 1 and stats["misses"] == 1
+
+    def test_concurrent_puts_of_one_key(self, tmp_path):
+        """Should leave one whole pickle and no temporary files when puts of a key race."""
+        frames = [pd.DataFrame({"x": np.full(200_000, i, dtype=np.float64)}) for i in range(8)]
+        cache = PreprocessCache(max_bytes=0, directory=str(tmp_path))
+        errors = []
+
+        def put(frame):
+            try:
+                cache.put("fit-same", frame)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=put, args=(frame,)) for frame in frames]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert os.listdir(tmp_path) == ["fit-same.pkl"]
+        value = cache.get("fit-same")
+        assert any(value.equals(frame) for frame in frames)
+
+    def test_failed_dump_leaves_no_part_file(self, tmp_path, monkeypatch):
+        """Should remove the temporary file when writing the pickle fails."""
+        cache = PreprocessCache(max_bytes=0, directory=str(tmp_path))
+
+        def failing_dump(value, path):
+            open(path, "wb").write(b"half")
+            raise OSError("disk full")
+
+        monkeypatch.setattr(preprocess_cache.joblib, "dump", failing_dump)
+        with pytest.raises(OSError):
+            cache.put("fit-x", pd.DataFrame({"x": [1.0]}))
+        assert os.listdir(tmp_path) == []
+
+
+def test_experiments_share_preprocessing(cache, series):
+    """Should preprocess once for experiments on the same data and fit identical models."""
+    first = fit_model(series.iloc[:180], forecast_args())
+    second = fit_model(series.iloc[:180], forecast_args(early_stopping_rounds=5))
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    preprocess_cache.configure(PreprocessCache(max_bytes=0))
+    uncached = fit_model(series.iloc[:180], forecast_args(early_stopping_rounds=5))
+    test = series.iloc[180:]
+    assert np.allclose(predict_frame(second, test)["y"], predict_frame(uncached, test)["y"])
+    assert pickle.loads(pickle.dumps(first)) is not None
+
+
+def test_predict_reuses_transform(cache, series):
+    """Should transform a repeated prediction frame once and keep the model picklable."""
+    model = fit_model(series.iloc[:180], forecast_args())
+    test = series.iloc[180:]
+    first = predict_frame(model, test)
+    hits = cache.stats()["hits"]
+    second = predict_frame(model, test)
+
+    assert cache.stats()["hits"] == hits + 1
+    pd.testing.assert_frame_equal(first, second)
+    restored = pickle.loads(pickle.dumps(model))
+    assert np.allclose(predict_frame(restored, test)["y"], first["y"])
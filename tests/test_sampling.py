@@ -0,0 +1,88 @@
+"""Tests for training-set subsampling."""
+import numpy as np
+import pandas as pd
+import pytest
+from hyperts.datasets import load_basic_motions
+from hypertsMCP.server.handles.train_model import RunTrainModel, TrainModelArgs, fit_model
+from hypertsMCP.server.sampling import SamplingArgs, sample_rows, target_rows
+from hypertsMCP.utils import df_to_json
+
+
+def multiseries(n=200, k=4):
+    """Daily frame with k seasonal series."""
+    steps = np.arange(n)
+    return pd.DataFrame({
+        "ts": pd.date_range("2024-01-01", periods=n, freq="D").strftime("%Y-%m-%d"),
+        **{f"y{i}": 10 + np.sin(steps / 7 * 2 * np.pi + i) for i in range(k)}
+    })
+
+
+class TestSampleRows:
+    """Tests for row selection."""
+
+    def test_stratified_keeps_class_shares(self):
+        """Should keep every class in proportion to its frequency."""
+        labels = pd.Series(["a"] * 80 + ["b"] * 15 + ["c"] * 5)
+        rows = sample_rows(100, 20, "stratified", np.random.default_rng(0), labels)
+        assert len(rows) == 20
+        assert labels.iloc[rows].value_counts().to_dict() == {"a": 16, "b": 3, "c": 1}
+
+    def test_stratified_never_exceeds_n(self):
+        """Should keep the sample at n rows with many rare classes and refuse more classes than rows."""
+        labels = pd.Series(["a"] * 90 + [f"r{i}" for i in range(10)])
+        rows = sample_rows(100, 12, "stratified", np.random.default_rng(0), labels)
+        assert len(rows) == 12 and labels.iloc[rows].nunique() == 11
+        with pytest.raises(ValueError, match="cannot keep all 11 classes"):
+            sample_rows(100, 5, "stratified", np.random.default_rng(0), labels)
+
+    def test_recent_takes_tail(self):
+        """Should keep the latest rows in order."""
+        rows = sample_rows(100, 10, "recent", np.random.default_rng(0))
+        assert rows.tolist() == list(range(90, 100))
+
+    def test_target_rows_bounds(self):
+        """Should apply fraction and max_rows but never go below min_rows."""
+        assert target_rows(1000, SamplingArgs(fraction=0.5, max_rows=300)) == 300
+        assert target_rows(1000, SamplingArgs(fraction=0.01)) == 50
+        assert target_rows(30, SamplingArgs(max_rows=10)) == 30
+
+
+class TestTrainSampling:
+    """Tests for train_model with a sampling stage."""
+
+    @pytest.mark.asyncio
+    async def test_stratified_classification(self, model_dir):
+        """Should search on a stratified subset and report it."""
+        result = await RunTrainModel().run_tool({
+            "train_data": df_to_json(load_basic_motions()), "task": "classification",
+            "target": "target", "max_trials": 1, "random_state": 0, "verbose": 0,
+            "sampling": {"max_rows": 20, "min_rows": 10, "random_state": 0}
+        })
+        sampling = result["sampling"]
+        assert sampling["strategy"] == "stratified"
+        assert sampling["rows"]["used"] == 20 < sampling["rows"]["total"]
+        assert sampling["final_retrain_on_wholedata"] is True
+
+    def test_series_sampling_forecasts_every_series(self):
+        """Should search on some series and still forecast all of them."""
+        df = multiseries()
+        args = TrainModelArgs(train_data="", task="multivariate-forecast", timestamp="ts",
+                              freq="D", timestamp_format="%Y-%m-%d", max_trials=2,
+                              ensemble_size=3, random_state=0, verbose=0,
+                              sampling={"strategy": "series", "max_series": 2, "random_state": 0})
+        model = fit_model(df.iloc[:150], args)
+        forecast = model.predict(df.iloc[150:155][["ts"]].copy())
+
+        assert len(model.sampling_["series"]["used"]) == 2
+        assert forecast.filter(like="y").shape == (5, 4)
+        np.testing.assert_allclose(forecast.filter(like="y"), df.iloc[150:155].filter(like="y"),
+                                   atol=0.5)
+
+    def test_series_sampling_needs_retrain(self):
+        """Should refuse series sampling without a whole-data retrain."""
+        args = TrainModelArgs(train_data="", task="multivariate-forecast", timestamp="ts",
+                              freq="D", timestamp_format="%Y-%m-%d", max_trials=1, verbose=0,
+                              final_retrain_on_wholedata=False,
+                              sampling={"strategy": "series", "max_series": 2})
+        with pytest.raises(ValueError):
+            fit_model(multiseries(), args)
@@ -0,0 +1,49 @@
+"""Tests for latency/size-budgeted model selection."""
+import pytest
+from hyperts.datasets import load_basic_motions
+from hypertsMCP.server.handles.train_model import RunTrainModel
+from hypertsMCP.server.selection import choose
+from hypertsMCP.utils import df_to_json
+
+
+def candidate(no, latency, size=1.0):
+    return {"trial_no": no, "latency_ms": latency, "size_mb": size}
+
+
+class TestChoose:
+    """Tests for budgeted candidate choice."""
+
+    def test_fills_budget_in_reward_order(self):
+        """Should skip candidates that would overflow the summed latency."""
+        candidates = [candidate(1, 5.0), candidate(2, 4.0), candidate(3, 2.0), candidate(4, 1.0)]
+        chosen = choose(candidates, max_members=10, max_latency_ms=7.0, max_size_mb=None)
+        assert [c["trial_no"] for c in chosen] == [1, 3]
+
+    def test_size_budget_and_member_cap(self):
+        """Should respect the size budget and the ensemble size."""
+        candidates = [candidate(1, 1.0, 3.0), candidate(2, 1.0, 1.0), candidate(3, 1.0, 1.0)]
+        chosen = choose(candidates, max_members=1, max_latency_ms=None, max_size_mb=2.0)
+        assert [c["trial_no"] for c in chosen] == [2]
+
+    def test_falls_back_to_fastest(self):
+        """Should return the fastest candidate when none fits."""
+        candidates = [candidate(1, 5.0), candidate(2, 3.0)]
+        assert [c["trial_no"] for c in choose(candidates, 10, 1.0, None)] == [2]
+
+
+@pytest.mark.asyncio
+async def test_train_model_reports_latency(model_dir):
+    """Should build from the fastest trial under a tiny budget and report measured latency."""
+    df = load_basic_motions()
+    result = await RunTrainModel().run_tool({
+        "train_data": df_to_json(df.iloc[:60]), "task": "classification", "target": "target",
+        "max_trials": 3, "ensemble_size": 3, "random_state": 0, "verbose": 0,
+        "max_inference_latency_ms": 1e-6
+    })
+    selection = result["selection"]
+    selected = [c for c in selection["candidates"] if c["selected"]]
+
+    assert len(selected) == 1
+    assert selected[0]["latency_ms"] == min(c["latency_ms"] for c in selection["candidates"])
+    assert selection["latency_ms"] > 0 and selection["within_budget"] is False
+    assert selection["measured_on"] == "train_data" and selection["candidates_measured_on"] == "eval_split"
@@ -0,0 +1,140 @@
+"""Tests for tiered model storage."""
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from hypertsMCP.server.storage_manager import LocalObjectStore, ModelStore
+
+
+class SlowStore(LocalObjectStore):
+    """Directory store counting (slow) downloads."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.downloads = 0
+
+    def download(self, key, path):
+        self.downloads += 1
+        time.sleep(0.2)
+        super().download(key, path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture configuring ModelStore with a directory remote tier; restores it afterwards."""
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    remote = SlowStore(str(tmp_path / "remote"))
+    ModelStore.configure(str(tmp_path / "replica-1"), remote, cache_max_bytes=None)
+    yield remote, tmp_path
+    ModelStore.configure(*saved)
+
+
+def model(seed=0):
+    return {"weights": np.random.default_rng(seed).random(10_000)}
+
+
+class TestTieredStore:
+    """Tests for ModelStore with a remote tier."""
+
+    def test_write_through_and_cold_fetch(self, store):
+        """Should upload on save and serve a fresh replica after one fetch."""
+        remote, tmp_path = store
+        model_id = ModelStore.save(model())
+        assert os.path.exists(os.path.join(remote.root, f"{model_id}.pkl"))
+
+        ModelStore.configure(str(tmp_path / "replica-2"), remote)
+        first = ModelStore.load(model_id)
+        ModelStore.load(model_id)
+        assert np.array_equal(first["weights"], model()["weights"])
+        assert remote.downloads == 1
+        assert ModelStore.stats()["fetches"] == 1 and ModelStore.stats()["hits"] == 1
+
+    def test_concurrent_fetch_coalesced(self, store):
+        """Should download once for many concurrent loads of a cold model."""
+        remote, tmp_path = store
+        model_id = ModelStore.save(model())
+        ModelStore.configure(str(tmp_path / "replica-2"), remote)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(ModelStore.load(model_id)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == 8 and remote.downloads == 1
+
+    def test_concurrent_get_coalesced(self, store, monkeypatch):
+        """Should unpickle once and hand every concurrent get of a cold model the same object."""
+        model_id = ModelStore.save(model())
+        loads = []
+        load = ModelStore.load.__func__
+
+        def slow_load(cls, model_id):
+            loads.append(model_id)
+            time.sleep(0.2)
+            return load(cls, model_id)
+
+        monkeypatch.setattr(ModelStore, "load", classmethod(slow_load))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(ModelStore.get(model_id)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(loads) == 1 and all(r is results[0] for r in results)
+
+    def test_lru_eviction(self, store):
+        """Should keep the local tier under its byte bound and refetch evicted models."""
+        remote, tmp_path = store
+        ModelStore.configure(str(tmp_path / "replica-1"), remote, cache_max_bytes=200_000)
+        ids = [ModelStore.save(model(i)) for i in range(3)]
+        ModelStore.load(ids[1])  # ids[0] is now least recently used
+        ModelStore.save(model(3))
+
+        local = os.listdir(ModelStore.base_dir)
+        assert f"{ids[0]}.pkl" not in local and f"{ids[1]}.pkl" in local
+        assert ModelStore.stats()["bytes"] <= 200_000
+        assert np.array_equal(ModelStore.load(ids[0])["weights"], model(0)["weights"])
+
+    def test_missing_model(self, store):
+        """Should raise FileNotFoundError when no tier has the model."""
+        with pytest.raises(FileNotFoundError):
+            ModelStore.load("missing")
+
+
+def test_local_only_never_evicts(tmp_path):
+    """Should not bound the directory when it is the only copy."""
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    ModelStore.configure(str(tmp_path), None, cache_max_bytes=1)
+    try:
+        ids = [ModelStore.save(model(i)) for i in range(2)]
+        assert all(ModelStore.load(i) is not None for i in ids)
+    finally:
+        ModelStore.configure(*saved)
+
+
+def test_s3_store(tmp_path):
+    """Should round-trip a model through an S3 stand-in (moto server)."""
+    pytest.importorskip("minio")
+    moto_server = pytest.importorskip("moto.server")
+    from hypertsMCP.server.storage_manager import S3ObjectStore
+
+    server = moto_server.ThreadedMotoServer(port=0)
+    server.start()
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    try:
+        host, port = server.get_host_and_port()
+        remote = S3ObjectStore("models", "hyperts", endpoint=f"{host}:{port}", access_key="test",
+                               secret_key="test", secure=False, region="us-east-1")
+        ModelStore.configure(str(tmp_path / "a"), remote)
+        model_id = ModelStore.save(model())
+        ModelStore.configure(str(tmp_path / "b"), remote)
+        assert np.array_equal(ModelStore.load(model_id)["weights"], model()["weights"])
+        with pytest.raises(FileNotFoundError):
+            ModelStore.load("missing")
+    finally:
+        ModelStore.configure(*saved)
+        server.stop()
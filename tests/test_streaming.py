@@ -0,0 +1,119 @@
+"""Tests for streaming anomaly detection sessions."""
+import json
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from hypertsMCP.server.admission import AdmissionRejected
+from hypertsMCP.server.handles.stream_detect import RunStreamOpen, RunStreamAppend, RunStreamClose
+from hypertsMCP.server.handles.train_model import TrainModelArgs, fit_model
+from hypertsMCP.server.storage_manager import ModelStore
+from hypertsMCP.server.streaming import StreamSessions, sessions
+
+
+@pytest.fixture(scope="module")
+def detector(model_dir):
+    """Fixture providing a quickly trained detection model and its data."""
+    rng = np.random.default_rng(0)
+    steps = np.arange(300)
+    df = pd.DataFrame({
+        "ts": pd.date_range("2024-01-01", periods=300, freq="H").strftime("%Y-%m-%d %H:%M:%S"),
+        "x1": np.sin(steps / 24 * 2 * np.pi) + rng.normal(0, 0.1, 300),
+        "x2": rng.normal(0, 1, 300)
+    })
+    df.loc[[50, 120, 200], "x1"] += 6
+    args = TrainModelArgs(train_data="", task="detection", timestamp="ts", freq="H",
+                          max_trials=1, random_state=0, verbose=0)
+    model = fit_model(df, args)
+    return model, ModelStore.save(model), df
+
+
+class TestStreamHandlers:
+    """Tests for stream_open / stream_append / stream_close."""
+
+    @pytest.mark.asyncio
+    async def test_matches_batch_predict(self, detector):
+        """Should flag the same points as a batch predict, one append at a time."""
+        model, model_id, df = detector
+        window = df.iloc[190:210]
+        opened = await RunStreamOpen().run_tool({"model_id": model_id})
+        flags = []
+        for record in window.to_dict("records"):
+            result = await RunStreamAppend().run_tool({"session_id": opened["session_id"],
+                                                       "points": [record]})
+            flags.append(result["results"][0]["anomaly"])
+        summary = await RunStreamClose().run_tool({"session_id": opened["session_id"], "recent": 3})
+
+        assert flags == model.predict(window.copy())["anomaly"].tolist()
+        assert summary["points"] == 20 and summary["anomalies"] == sum(flags)
+        assert [r["timestamp"] for r in summary["recent"]][-1] == "2024-01-09 17:00:00"
+
+    @pytest.mark.asyncio
+    async def test_sessions_share_model(self, detector):
+        """Should open every session on the one in-memory model instead of unpickling a copy each."""
+        _, model_id, _ = detector
+        first = await RunStreamOpen().run_tool({"model_id": model_id})
+        second = await RunStreamOpen().run_tool({"model_id": model_id})
+        opened = [sessions.get(s["session_id"]) for s in (first, second)]
+
+        assert opened[0].model is opened[1].model is ModelStore.get(model_id)
+
+    @pytest.mark.asyncio
+    async def test_rejects_out_of_order(self, detector):
+        """Should reject points older than the last appended one."""
+        _, model_id, df = detector
+        opened = await RunStreamOpen().run_tool({"model_id": model_id})
+        records = df.iloc[10:12].to_dict("records")
+        await RunStreamAppend().run_tool({"session_id": opened["session_id"], "points": records[1:]})
+        with pytest.raises(ValueError):
+            await RunStreamAppend().run_tool({"session_id": opened["session_id"],
+                                              "points": records[:1]})
+
+
+class TestStreamSessions:
+    """Tests for StreamSessions bookkeeping."""
+
+    def test_idle_eviction(self, detector):
+        """Should evict sessions idle longer than idle_timeout."""
+        model, model_id, _ = detector
+        sessions = StreamSessions(idle_timeout=0.0)
+        session_id = sessions.open(model, model_id)
+        assert sessions.sweep() == 1
+        with pytest.raises(ValueError):
+            sessions.get(session_id)
+        assert sessions.stats()["evicted"] == 1
+
+    def test_session_cap(self, detector):
+        """Should refuse new sessions with 429 once max_sessions are open."""
+        model, model_id, _ = detector
+        sessions = StreamSessions(max_sessions=1)
+        sessions.open(model, model_id)
+        with pytest.raises(AdmissionRejected) as e:
+            sessions.open(model, model_id)
+        assert e.value.status_code == 429
+
+    def test_ring_buffer_bounded(self, detector):
+        """Should keep at most buffer_size points."""
+        model, model_id, df = detector
+        sessions = StreamSessions(buffer_size=5)
+        stream = sessions.get(sessions.open(model, model_id))
+        stream.append(df.iloc[:12].to_dict("records"))
+        assert len(stream.buffer) == 5 and stream.points == 12
+
+
+@pytest.mark.asyncio
+async def test_ndjson_route(detector):
+    """Should answer an NDJSON body with one result line per point."""
+    from hypertsMCP.server.server import fastapi_app
+    _, model_id, df = detector
+    opened = await RunStreamOpen().run_tool({"model_id": model_id})
+    body = "".join(json.dumps(r) + "\n" for r in df.iloc[195:205].to_dict("records"))
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        res = await client.post(f"/stream/{opened['session_id']}", content=body)
+        missing = await client.post("/stream/unknown", content=body)
+
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert len(lines) == 10 and lines[5]["anomaly"] == 1
+    assert missing.status_code == 404
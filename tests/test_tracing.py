@@ -0,0 +1,104 @@
+"""Tests for request tracing and span export."""
+import json
+import httpx
+import pytest
+from hyperts.datasets import load_basic_motions
+from hypertsMCP import tracing
+from hypertsMCP.client.async_client import HyperTSClient
+from hypertsMCP.client.transport import HTTPTransport
+from hypertsMCP.server.handles.train_model import RunTrainModel
+from hypertsMCP.utils import df_to_json
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """Fixture exporting spans to a file; returns a function reading them back."""
+    path = tmp_path / "spans.jsonl"
+    tracing.configure(f"file://{path}", "test")
+
+    def read():
+        tracing.tracer.flush()
+        if not path.exists():
+            return []
+        return [span for line in path.read_text().splitlines()
+                for resource in json.loads(line)["resourceSpans"]
+                for scope in resource["scopeSpans"] for span in scope["spans"]]
+
+    yield read
+    tracing.configure(None)
+
+
+class TestTraceparent:
+    """Tests for W3C traceparent parsing."""
+
+    def test_valid(self):
+        """Should return the trace and parent span IDs."""
+        value = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        assert tracing.parse_traceparent(value) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+
+    @pytest.mark.parametrize("value", [None, "", "garbage", "ff-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01",
+                                       "00-00000000000000000000000000000000-00f067aa0ba902b7-01",
+                                       "00-4bf92f3577b34da6a3ce929d0e0e4736-xyz067aa0ba902b7-01"])
+    def test_invalid(self, value):
+        """Should reject malformed or all-zero IDs."""
+        assert tracing.parse_traceparent(value) is None
+
+
+def test_disabled_spans_are_noops():
+    """Should yield None and export nothing while tracing is off."""
+    with tracing.span("noop") as current:
+        assert current is None
+        assert tracing.current_traceparent() is None
+
+
+def test_nested_spans(exported):
+    """Should parent nested spans and record errors."""
+    with tracing.span("outer", rows=3) as outer:
+        with tracing.span("inner"):
+            pass
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("boom")
+    spans = {s["name"]: s for s in exported()}
+
+    assert spans["inner"]["parentSpanId"] == outer.span_id
+    assert spans["inner"]["traceId"] == spans["outer"]["traceId"]
+    assert "parentSpanId" not in spans["outer"]
+    assert spans["failing"]["status"] == {"code": 2, "message": "ValueError: boom"}
+    assert {"key": "rows", "value": {"intValue": "3"}} in spans["outer"]["attributes"]
+
+
+@pytest.mark.asyncio
+async def test_client_to_server_trace(exported):
+    """Should follow one call from the client through the HTTP route into the handler."""
+    from hypertsMCP.server.server import fastapi_app
+    transport = HTTPTransport(compression=None)
+    await transport.client.aclose()
+    transport.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app), base_url="http://test")
+    transport.base_url = "http://test/"
+    df = load_basic_motions().iloc[:20]
+    async with HyperTSClient(transport) as client:
+        await client.train_test_split(df, test_size=0.25)
+    spans = exported()
+    names = {s["name"] for s in spans}
+
+    assert {"client train_test_split", "encode", "POST /train_test_split", "decode"} <= names
+    assert len({s["traceId"] for s in spans}) == 1
+    ids = {s["spanId"] for s in spans}
+    assert all(s.get("parentSpanId") in ids for s in spans if s["name"] != "client train_test_split")
+
+
+@pytest.mark.asyncio
+async def test_trial_spans(exported, model_dir):
+    """Should record every search trial under the train span."""
+    df = load_basic_motions().iloc[:60]
+    await RunTrainModel().run_tool({
+        "train_data": df_to_json(df), "task": "classification", "target": "target",
+        "max_trials": 2, "random_state": 0, "verbose": 0
+    })
+    spans = exported()
+    train = next(s for s in spans if s["name"] == "train")
+    trials = [s for s in spans if s["name"] == "trial"]
+
+    assert len(trials) == 2
+    assert all(t["parentSpanId"] == train["spanId"] for t in trials)
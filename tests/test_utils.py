@@ -1,7 +1,11 @@
 """Tests for utility functions."""
 import pandas as pd
 import pytest
-from hypertsMCP.utils import is_nested, is_3d_array, df_to_json, json_to_df
+from hypertsMCP.utils import (
+    is_nested, is_3d_array, df_to_json, json_to_df,
+    array_to_compact, compact_to_array, is_compact_array,
+    compact_dtypes, frame_nbytes
+)
 
 
 class TestIsNested:
@@ -81,3 +85,62 @@ class TestDataFrameJsonConversion:
                     assert all(v1 == v2 for v1, v2 in zip(val1, val2))
                 else:
                     assert val1 == val2
+
+
+class TestCompactArray:
+    """Tests for compact array encoding."""
+
+    def test_roundtrip(self):
+        """Should preserve values, shape and column labels."""
+        import numpy as np
+        arr = np.random.rand(5, 3)
+        encoded = array_to_compact(arr, columns=np.array(['a', 'b', 'c']))
+        decoded, columns = compact_to_array(encoded)
+        assert is_compact_array(encoded)
+        assert decoded.shape == (5, 3)
+        assert np.array_equal(decoded, arr)
+        assert columns == ['a', 'b', 'c']
+
+    def test_float32(self):
+        """Should encode with the requested dtype."""
+        import numpy as np
+        arr = np.random.rand(4, 2)
+        decoded, columns = compact_to_array(array_to_compact(arr, dtype='float32'))
+        assert decoded.dtype == np.float32
+        assert columns is None
+        assert np.allclose(decoded, arr, atol=1e-6)
+
+
+class TestCompactDtypes:
+    """Tests for compact (narrow dtype) decoding."""
+
+    def test_downcasts_columns(self):
+        """Should narrow floats, ints and repeated strings but keep unique strings."""
+        import numpy as np
+        df = pd.DataFrame({
+            "x": np.linspace(0, 1, 6), "n": [1, 2, 3, 4, 5, 6],
+            "label": ["a", "b", "a", "b", "a", "b"], "ts": [f"2024-01-0{i}" for i in range(1, 7)]
+        })
+        compact = json_to_df(df_to_json(df), compact=True)
+        assert compact["x"].dtype == np.float32
+        assert compact["n"].dtype == np.int8
+        assert str(compact["label"].dtype) == "category"
+        assert compact["ts"].dtype == object
+        assert np.allclose(compact["x"], df["x"], atol=1e-7)
+
+    def test_nested_series_halved(self):
+        """Should build nested series as float32 with a RangeIndex, at least halving memory."""
+        import numpy as np
+        df = pd.DataFrame({"dim": [pd.Series(np.random.rand(100)) for _ in range(20)],
+                           "target": ["a", "b"] * 10})
+        encoded = df_to_json(df)
+        full, compact = json_to_df(encoded), json_to_df(encoded, compact=True)
+        cell = compact["dim"].iloc[0]
+        assert cell.dtype == np.float32 and isinstance(cell.index, pd.RangeIndex)
+        assert frame_nbytes(compact) * 2 <= frame_nbytes(full)
+
+    def test_does_not_modify_input(self):
+        """Should return a new frame."""
+        df = pd.DataFrame({"x": [1.0, 2.0]})
+        compact_dtypes(df)
+        assert df["x"].dtype == "float64"
@@ -0,0 +1,112 @@
+"""Tests for startup model preloading and warm-up."""
+import time
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from hyperts.datasets import load_basic_motions
+from hypertsMCP.server import warmup
+from hypertsMCP.server.handles.predict import RunPredict
+from hypertsMCP.server.handles.train_model import TrainModelArgs, fit_model
+from hypertsMCP.server.settings import settings
+from hypertsMCP.server.storage_manager import ModelStore
+from hypertsMCP.utils import df_to_json
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """Fixture providing a small fitted classifier, saved with a warm-up sample, and its data."""
+    df = load_basic_motions()
+    args = TrainModelArgs(train_data="", task="classification", target="target", max_trials=1,
+                          random_state=0, verbose=0)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "warmup_store_sample", True)
+        return fit_model(df.iloc[:60], args), df
+
+
+@pytest.fixture
+def store(tmp_path, trained):
+    """Fixture saving the classifier into an empty model directory; restores the store afterwards."""
+    saved = (ModelStore.base_dir, ModelStore.remote, ModelStore.cache_max_bytes)
+    ModelStore.configure(str(tmp_path))
+    yield ModelStore.save(trained[0]), trained[1]
+    ModelStore.configure(*saved)
+
+
+@pytest.mark.asyncio
+async def test_warm_up_then_serve_from_memory(store):
+    """Should run the stored sample through the model and serve predict from memory."""
+    model_id, df = store
+    state = await warmup.warm_up([model_id], state=warmup.Readiness())
+    hits = ModelStore.memory_hits
+    await RunPredict().run_tool({"test_data": df_to_json(df.iloc[60:64]), "model_id": model_id})
+
+    assert state.ready and state.models == {model_id: "warm"}
+    assert ModelStore.memory_hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_recent_and_failures(store, trained):
+    """Should add the most recently used models and report failures without blocking readiness."""
+    model_id, _ = store
+    newer = ModelStore.save(trained[0])
+    state = await warmup.warm_up(["missing"], recent=1, state=warmup.Readiness())
+
+    assert state.ready and list(state.models) == ["missing", newer]
+    assert state.models["missing"].startswith("failed: FileNotFoundError")
+    assert state.models[newer] == "warm"
+
+
+@pytest.mark.asyncio
+async def test_no_sample_by_default(store):
+    """Should keep training rows out of models by default and only load them at warm-up."""
+    _, df = store
+    args = TrainModelArgs(train_data="", task="classification", target="target", max_trials=1,
+                          random_state=0, verbose=0)
+    model = fit_model(df.iloc[:60], args)
+    model_id = ModelStore.save(model)
+    state = await warmup.warm_up([model_id], state=warmup.Readiness())
+
+    assert not hasattr(model, "warmup_sample_")
+    assert state.models == {model_id: "loaded"}
+
+
+@pytest.mark.asyncio
+async def test_forecast_warms_from_history(store):
+    """Should predict on the stored history of a forecast model saved without a sample."""
+    df = pd.DataFrame({"ts": pd.date_range("2024-01-01", periods=120, freq="D").strftime("%Y-%m-%d"),
+                       "y": np.sin(np.arange(120) / 7 * 2 * np.pi)})
+    args = TrainModelArgs(train_data="", task="univariate-forecast", target="y", timestamp="ts",
+                          freq="D", max_trials=1, random_state=0, verbose=0)
+    model_id = ModelStore.save(fit_model(df, args))
+    state = await warmup.warm_up([model_id], state=warmup.Readiness())
+
+    assert state.models == {model_id: "warm"}
+
+
+@pytest.mark.asyncio
+async def test_timeout(store, monkeypatch):
+    """Should become ready when the time limit expires and report unfinished models."""
+    model_id, _ = store
+    monkeypatch.setattr(warmup, "warm_model", lambda _: time.sleep(1) or "warm")
+    started = time.perf_counter()
+    state = await warmup.warm_up([model_id], timeout=0.1, state=warmup.Readiness())
+
+    assert time.perf_counter() - started < 0.9
+    assert state.ready and state.models == {model_id: "timeout"}
+
+
+@pytest.mark.asyncio
+async def test_ready_route(monkeypatch):
+    """Should answer 503 until warm-up has finished."""
+    from hypertsMCP.server.server import fastapi_app
+    state = warmup.Readiness()
+    monkeypatch.setattr("hypertsMCP.server.server.readiness", state)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app),
+                                 base_url="http://test") as client:
+        before = await client.get("/ready")
+        await warmup.warm_up(state=state)
+        after = await client.get("/ready")
+
+    assert before.status_code == 503 and after.status_code == 200
+    assert after.json()["ready"] is True